@@ -1,129 +1,189 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, g, render_template, request, jsonify, url_for, stream_with_context
 from flask_cors import CORS
 import os
+import asyncio
+import atexit
+import json
 import logging
+import re
+import sqlite3
+import time
+from html import escape
+from itertools import chain
 
-# Set API key directly to avoid .env file issues
-os.environ["GOOGLE_API_KEY"] = ""
+from batch import dedupe_topics, iter_batch
+from cache import ResultCache, async_cached_runner, cache_key, cached_runner
+from classifier import TopicClassifier
+from compression import compress, compress_response, compress_stream, negotiate
+from config import get_config
+from crew_loader import crew_stack
+from deadline import DEADLINE, Cancelled, Deadline, budget_seconds
+from history import HistoryStore
+from metrics import FIRST_TOKEN_SECONDS, REPORT_SECTION_BUILDS, REQUEST_SECONDS, RESPONSE_BYTES, RESPONSE_UNCOMPRESSED_BYTES, TraceIdFilter, new_trace_id, registry, time_stage, trace_id
+from jobs import JobQueue, QueueFullError, job_status, COMPLETED, FAILED
+from jsonstream import iter_json_bytes
+from semantic_cache import SemanticIndex
+from singleflight import AsyncSingleFlight, SingleFlight, SQLiteLease
+from ratelimit import AdmissionController, AsyncAdmissionController, OverloadedError, RateLimiter, SQLiteBucketStore
+from report import (REPORT_SECTIONS, SECTION_DEPENDENCIES, SECTION_MAX_AGE, build_report_context, join_sections,
+                    render_section, report_json)
+from report_store import ReportStore, refresh_sections
+
+# Simulated AI processing time, spread across the report sections
+SIMULATED_PROCESSING_TIME = 2
+
+# Bump when report generation changes so cached reports are not reused
+PIPELINE_VERSION = '4'
+
+def iter_report_sections(topic, deadline=None):
+    """Yield (section, html) pairs for the report as each section is generated
+    
+    Raises deadline.Cancelled, after the sections done so far, once deadline
+    runs out or is cancelled.
+    """
+    analysis_data = generate_dynamic_analysis(topic)
+    delay = SIMULATED_PROCESSING_TIME / (len(REPORT_SECTIONS) - 1)
+    
+    for index, section in enumerate(REPORT_SECTIONS):
+        # Simulate AI processing time; the header goes out immediately
+        if index:
+            if deadline is None:
+                time.sleep(delay)
+            elif deadline.wait(delay):
+                raise Cancelled(deadline.reason)
+        
+        with time_stage('render_section'):
+            html = render_section(section, topic, analysis_data)
+        yield section, html
+
+def stopped_result(deadline):
+    """Result of an analysis its deadline stopped before there was anything to return"""
+    return {
+        "success": False,
+        "reason": deadline.reason,
+        "error": str(Cancelled(deadline.reason)),
+        "message": "The analysis was stopped before it finished."
+    }
+
+def plan_report(topic, analysis_data, refresh=()):
+    """(report_key, meta, {section: entry}) of topic's HTML report
+    
+    Sections stored from an earlier analysis are reused while fresh (see
+    report_store.refresh_sections); the rest, and any named in refresh, are
+    regenerated. A report keeps its analysis ID across refreshes.
+    """
+    key = cache_key(topic, pipeline=PIPELINE_VERSION)
+    meta, stored = report_store.load(key) if report_store is not None else (None, {})
+    if meta:
+        analysis_data = {**analysis_data, 'analysis_id': meta['analysis_id']}
+    
+    category = analysis_data['category']
+    entries = refresh_sections(
+        REPORT_SECTIONS, SECTION_DEPENDENCIES, stored,
+        inputs=lambda section: [category, topic],
+        render=lambda section: render_section(section, topic, analysis_data),
+        invalidate=refresh,
+        max_age=SECTION_MAX_AGE
+    )
+    return key, {'analysis_id': analysis_data['analysis_id']}, entries
+
+def generation_time(entries):
+    """Simulated AI processing time of the sections being regenerated"""
+    regenerated = sum(entry['regenerated'] for entry in entries.values())
+    return SIMULATED_PROCESSING_TIME * regenerated / len(REPORT_SECTIONS)
+
+def save_report(key, meta, entries):
+    """Store the regenerated sections of a planned report and return it as the analysis result"""
+    if report_store is not None:
+        try:
+            report_store.save(key, meta, entries)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not store report sections: {e}")
+    
+    regenerated = 0
+    for section, entry in entries.items():
+        regenerated += entry['regenerated']
+        REPORT_SECTION_BUILDS.inc(section=section, outcome='regenerated' if entry['regenerated'] else 'reused')
+    
+    return {
+        "success": True,
+        "result": join_sections({section: entry['html'] for section, entry in entries.items()}),
+        "sections": {
+            section: {
+                'content_hash': entries[section]['content_hash'],
+                'generated_at': entries[section]['generated_at'],
+                'regenerated': entries[section]['regenerated']
+            }
+            for section in REPORT_SECTIONS
+        },
+        "message": f"Deep analysis completed successfully! ({regenerated} of {len(entries)} sections regenerated)"
+    }
 
 # Advanced content analysis with dynamic, in-depth responses
-def run_content_analysis(topic):
-    """Generate comprehensive, dynamic analysis based on topic"""
+def run_content_analysis(topic, output_format='html', deadline=None, refresh=()):
+    """Generate comprehensive, dynamic analysis based on topic
+    
+    output_format is 'html' for the rendered report or 'json' for the same
+    content as structured data. The HTML report is built section by section
+    (see plan_report), and only the sections regenerated cost processing
+    time; refresh names sections to regenerate even if fresh. With a
+    deadline (deadline.Deadline) the analysis stops once it runs out or is
+    cancelled.
+    """
     try:
-        import random
-        import time
+        analysis_data = generate_dynamic_analysis(topic)
+        report = None
+        if output_format != 'json':
+            with time_stage('render'):
+                report = plan_report(topic, analysis_data, refresh)
         
         # Simulate AI processing time
-        time.sleep(2)
+        with time_stage('generate'):
+            delay = SIMULATED_PROCESSING_TIME if report is None else generation_time(report[2])
+            if deadline is None:
+                time.sleep(delay)
+            elif deadline.wait(delay):
+                return stopped_result(deadline)
+        
+        if report is not None:
+            return save_report(*report)
         
-        # Generate dynamic content based on topic
+        with time_stage('render'):
+            result = report_json(topic, analysis_data)
+        
+        return {
+            "success": True,
+            "result": result,
+            "message": "Deep analysis completed successfully!"
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "message": "An error occurred during content analysis."
+        }
+
+async def arun_content_analysis(topic, output_format='html', deadline=None, refresh=()):
+    """Async variant of run_content_analysis for the ASGI entry point (asgi.py)"""
+    try:
         analysis_data = generate_dynamic_analysis(topic)
+        report = None
+        if output_format != 'json':
+            with time_stage('render'):
+                report = await asyncio.to_thread(plan_report, topic, analysis_data, refresh)
         
-        result = f"""
-<div class="analysis-report">
-    <h1>🔍 Deep Analysis Report: {topic}</h1>
-    
-    <h2>📊 Executive Summary</h2>
-    <p>{analysis_data['executive_summary']}</p>
-    
-    <h2>🎯 Key Insights & Findings</h2>
-    <div style="background: #2a2b32; padding: 20px; border-radius: 12px; margin: 20px 0;">
-        <h3>💡 Critical Insights</h3>
-        <ul>
-            {''.join([f'<li>{insight}</li>' for insight in analysis_data['insights']])}
-        </ul>
-    </div>
-    
-    <h2>📈 Market Analysis & Trends</h2>
-    <h3>Current Market Dynamics</h3>
-    <p>{analysis_data['market_analysis']}</p>
-    
-    <h3>Emerging Trends</h3>
-    <ul>
-        {''.join([f'<li><strong>{trend["title"]}</strong>: {trend["description"]}</li>' for trend in analysis_data['trends']])}
-    </ul>
-    
-    <h2>⚡ Technology & Innovation</h2>
-    <h3>Technological Landscape</h3>
-    <p>{analysis_data['technology_analysis']}</p>
-    
-    <h3>Key Technologies & Tools</h3>
-    <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: 15px; margin: 20px 0;">
-        {''.join([f'''
-        <div style="background: #40414f; padding: 15px; border-radius: 8px; border-left: 4px solid #10a37f;">
-            <h4 style="color: #10a37f; margin-bottom: 8px;">{tech["name"]}</h4>
-            <p style="color: #d1d5db; font-size: 14px;">{tech["description"]}</p>
-        </div>
-        ''' for tech in analysis_data['technologies']])}
-    </div>
-    
-    <h2>🎯 Opportunities & Challenges</h2>
-    <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 20px; margin: 20px 0;">
-        <div style="background: linear-gradient(135deg, #10a37f20, #10a37f10); padding: 20px; border-radius: 12px; border: 1px solid #10a37f30;">
-            <h3 style="color: #10a37f; margin-bottom: 15px;">🚀 Opportunities</h3>
-            <ul>
-                {''.join([f'<li style="margin-bottom: 8px;">{opp}</li>' for opp in analysis_data['opportunities']])}
-            </ul>
-        </div>
-        <div style="background: linear-gradient(135deg, #dc262620, #dc262610); padding: 20px; border-radius: 12px; border: 1px solid #dc262630;">
-            <h3 style="color: #dc2626; margin-bottom: 15px;">⚠️ Challenges</h3>
-            <ul>
-                {''.join([f'<li style="margin-bottom: 8px;">{challenge}</li>' for challenge in analysis_data['challenges']])}
-            </ul>
-        </div>
-    </div>
-    
-    <h2>📋 Strategic Recommendations</h2>
-    <h3>Immediate Actions (0-3 months)</h3>
-    <ol>
-        {''.join([f'<li style="margin-bottom: 10px;"><strong>{action["title"]}</strong>: {action["description"]}</li>' for action in analysis_data['immediate_actions']])}
-    </ol>
-    
-    <h3>Medium-term Strategy (3-12 months)</h3>
-    <ol>
-        {''.join([f'<li style="margin-bottom: 10px;"><strong>{action["title"]}</strong>: {action["description"]}</li>' for action in analysis_data['medium_term_actions']])}
-    </ol>
-    
-    <h3>Long-term Vision (1-3 years)</h3>
-    <ol>
-        {''.join([f'<li style="margin-bottom: 10px;"><strong>{action["title"]}</strong>: {action["description"]}</li>' for action in analysis_data['long_term_actions']])}
-    </ol>
-    
-    <h2>📊 Impact Assessment</h2>
-    <div style="background: #2a2b32; padding: 20px; border-radius: 12px; margin: 20px 0;">
-        <h3>Expected Outcomes</h3>
-        <p>{analysis_data['impact_assessment']}</p>
+        # Simulate AI processing time without holding a thread
+        with time_stage('generate'):
+            delay = SIMULATED_PROCESSING_TIME if report is None else generation_time(report[2])
+            await asyncio.sleep(deadline.timeout(delay) if deadline else delay)
+            if deadline is not None and deadline.cancelled:
+                return stopped_result(deadline)
         
-        <h4>Success Metrics</h4>
-        <ul>
-            {''.join([f'<li>{metric}</li>' for metric in analysis_data['success_metrics']])}
-        </ul>
-    </div>
-    
-    <h2>🔮 Future Outlook</h2>
-    <p>{analysis_data['future_outlook']}</p>
-    
-    <h3>Predicted Developments</h3>
-    <ul>
-        {''.join([f'<li><strong>{dev["timeframe"]}</strong>: {dev["prediction"]}</li>' for dev in analysis_data['predictions']])}
-    </ul>
-    
-    <h2>📚 Additional Resources</h2>
-    <div style="background: #40414f; padding: 20px; border-radius: 12px; margin: 20px 0;">
-        <h3>Recommended Reading & Research</h3>
-        <ul>
-            {''.join([f'<li><a href="#" style="color: #10a37f; text-decoration: none;">{resource}</a></li>' for resource in analysis_data['resources']])}
-        </ul>
-    </div>
-    
-    <hr style="border: none; height: 2px; background: linear-gradient(90deg, #10a37f, #5436da); margin: 30px 0;">
-    <div style="text-align: center; color: #8e8ea0; font-size: 14px;">
-        <p><strong>🤖 Generated by XtarzLab AI Content Analyzer</strong></p>
-        <p>Powered by Advanced AI Research Team • Analysis ID: {random.randint(100000, 999999)}</p>
-        <p>Generated on {time.strftime('%B %d, %Y at %I:%M %p')}</p>
-    </div>
-</div>
-        """
+        if report is not None:
+            return await asyncio.to_thread(save_report, *report)
+        
+        with time_stage('render'):
+            result = report_json(topic, analysis_data)
         
         return {
             "success": True,
@@ -138,487 +198,424 @@ def run_content_analysis(topic):
         }
 
 def generate_dynamic_analysis(topic):
-    """Generate dynamic, topic-specific analysis content"""
-    import random
+    """Classify the topic and start a report for its category"""
+    # Determine topic category
+    with time_stage('classify'):
+        category = topic_classifier.classify(topic)
+    
+    # Report content itself is precomputed per category in report.py
+    return build_report_context(category)
+
+# Configure logging; every line carries the trace ID of the request it belongs to
+logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:[%(trace_id)s] %(message)s')
+for handler in logging.getLogger().handlers:
+    handler.addFilter(TraceIdFilter())
+logger = logging.getLogger(__name__)
+
+app = Flask(__name__)
+app.config.from_object(get_config())
+CORS(app)  # Enable CORS for frontend-backend communication
+
+# Store API key temporarily (in production, use proper session management)
+app.secret_key = 'your-secret-key-change-in-production'
+
+# Keyword classifier that picks the analysis category for a topic
+topic_classifier = TopicClassifier.from_file(app.config['TOPIC_CATEGORIES_PATH'] or None)
+
+# Cache finished reports so repeat topics skip the analysis entirely
+result_cache = ResultCache(
+    max_entries=app.config['CACHE_MAX_ENTRIES'],
+    ttl=app.config['CACHE_TTL'],
+    disk_path=app.config['CACHE_DB_PATH'] or None
+)
+
+# Per-client token buckets; a SQLite file shares them across gunicorn workers
+rate_limiter = RateLimiter(
+    app.config['RATE_LIMIT'],
+    burst=app.config['RATE_LIMIT_BURST'] or None,
+    store=SQLiteBucketStore(app.config['RATE_LIMIT_DB_PATH']) if app.config['RATE_LIMIT_DB_PATH'] else None
+)
+
+# Cap on analyses run while a client waits; cache hits never take a slot
+admission = AdmissionController(
+    max_running=app.config['MAX_RUNNING_ANALYSES'],
+    max_waiting=app.config['MAX_WAITING_ANALYSES'],
+    wait_timeout=app.config['ADMISSION_TIMEOUT']
+)
+# Native async routes (asgi.py) take slots from the same limit
+async_admission = AsyncAdmissionController(admission)
+
+# Near-duplicate topics reuse an existing report instead of a new analysis
+semantic_index = None
+if app.config['CACHE_ENABLED'] and app.config['SEMANTIC_CACHE_ENABLED']:
+    semantic_index = SemanticIndex(
+        capacity=app.config['SEMANTIC_CACHE_MAX_ENTRIES'],
+        threshold=app.config['SEMANTIC_CACHE_THRESHOLD'],
+        path=app.config['SEMANTIC_CACHE_PATH'] or None
+    )
+    atexit.register(semantic_index.flush)
+
+# Concurrent requests for the same uncached topic share one analysis
+flights = async_flights = None
+if app.config['COALESCE_ENABLED']:
+    lease = SQLiteLease(app.config['COALESCE_DB_PATH'], ttl=app.config['COALESCE_LEASE_TTL']) if app.config['COALESCE_DB_PATH'] else None
+    flights = SingleFlight(lease=lease)
+    async_flights = AsyncSingleFlight()
+
+def recorded(runner):
+    """Wrap an analysis runner so each result it produces is saved to history
     
-    # Topic-specific analysis templates
-    tech_topics = ['AI', 'artificial intelligence', 'machine learning', 'technology', 'software', 'digital', 'automation', 'blockchain', 'IoT']
-    business_topics = ['business', 'marketing', 'strategy', 'management', 'finance', 'startup', 'entrepreneurship', 'sales']
-    health_topics = ['health', 'medical', 'healthcare', 'medicine', 'wellness', 'fitness', 'therapy']
-    education_topics = ['education', 'learning', 'training', 'teaching', 'academic', 'university', 'school']
+    Inside a cached runner, so cache hits and requests sharing another's run
+    don't add the same report again.
+    """
+    def run(topic, **options):
+        result = runner(topic, **options)
+        record_history(topic, result)
+        return result
     
-    # Determine topic category
-    topic_lower = topic.lower()
-    if any(tech in topic_lower for tech in tech_topics):
-        category = 'technology'
-    elif any(biz in topic_lower for biz in business_topics):
-        category = 'business'
-    elif any(health in topic_lower for health in health_topics):
-        category = 'healthcare'
-    elif any(edu in topic_lower for edu in education_topics):
-        category = 'education'
-    else:
-        category = 'general'
-    
-    # Generate category-specific content
-    if category == 'technology':
-        return generate_tech_analysis(topic)
-    elif category == 'business':
-        return generate_business_analysis(topic)
-    elif category == 'healthcare':
-        return generate_health_analysis(topic)
-    elif category == 'education':
-        return generate_education_analysis(topic)
+    return run
+
+def arecorded(runner):
+    """recorded for coroutine runners"""
+    async def run(topic, **options):
+        result = await runner(topic, **options)
+        record_history(topic, result)
+        return result
+    
+    return run
+
+analyze_topic = cached_runner(
+    result_cache, recorded(run_content_analysis), flights=flights, semantic=semantic_index, pipeline=PIPELINE_VERSION
+)
+admitted_analyze_topic = cached_runner(
+    result_cache, recorded(admission.wrap(run_content_analysis)),
+    flights=flights, semantic=semantic_index, pipeline=PIPELINE_VERSION
+)
+aanalyze_topic = async_cached_runner(
+    result_cache, arecorded(async_admission.wrap(arun_content_analysis)),
+    flights=async_flights, semantic=semantic_index, pipeline=PIPELINE_VERSION
+)
+
+# Report sections, so repeat and refreshed analyses regenerate only stale ones
+report_store = ReportStore(
+    app.config['REPORT_STORE_DB_PATH'],
+    max_reports=app.config['REPORT_STORE_MAX_REPORTS'],
+    ttl=app.config['REPORT_STORE_TTL']
+) if app.config['REPORT_STORE_ENABLED'] else None
+
+# Finished analyses, saved in the background and searchable from the sidebar
+history = None
+if app.config['HISTORY_ENABLED']:
+    history = HistoryStore(app.config['HISTORY_DB_PATH'])
+    atexit.register(history.flush)
+
+# Start importing CrewAI now; /api/ready reports when it is done
+if app.config['CREW_LOAD'] == 'background':
+    crew_stack.load_in_background()
+
+# Background workers so request threads never block on an analysis
+job_queue = JobQueue(
+    analyze_topic,
+    max_workers=app.config['JOB_WORKERS'],
+    max_pending=app.config['JOB_MAX_PENDING'],
+    result_ttl=app.config['JOB_RESULT_TTL']
+)
+
+def get_request_topic():
+    """Validate the JSON body and return (topic, error_response)"""
+    data = request.get_json(silent=True)
+    
+    if not data:
+        return None, (jsonify({
+            'success': False,
+            'error': 'No data provided'
+        }), 400)
+    
+    topic = str(data.get('topic', '')).strip()
+    
+    if not topic:
+        return None, (jsonify({
+            'success': False,
+            'error': 'Topic is required'
+        }), 400)
+    
+    return topic, None
+
+def get_output_format():
+    """Requested report format: 'html' (default) or 'json'"""
+    data = request.get_json(silent=True) or {}
+    output_format = data.get('format') or request.args.get('format') or 'html'
+    return output_format if output_format in ('html', 'json') else 'html'
+
+def bypasses_cache():
+    """True when the client asked to bypass the cache (no_cache)"""
+    data = request.get_json(silent=True) or {}
+    return bool(data.get('no_cache') or request.args.get('no_cache', '').lower() in ('1', 'true', 'yes'))
+
+def wants_cache():
+    """False when caching is disabled or the client asked to bypass it"""
+    return app.config['CACHE_ENABLED'] and not bypasses_cache()
+
+def fresh_sections():
+    """Report sections to regenerate even if stored: all of them when the client bypasses the cache"""
+    return tuple(REPORT_SECTIONS) if bypasses_cache() else ()
+
+def get_deadline():
+    """Deadline of this request's analysis as (deadline, error_response)
+    
+    The time budget comes from the X-Request-Timeout header, or the timeout
+    query parameter (EventSource can't set headers), in seconds, and
+    defaults to REQUEST_TIMEOUT. The deadline is None without a budget.
+    """
+    value = request.headers.get('X-Request-Timeout') or request.args.get('timeout')
+    try:
+        seconds = budget_seconds(value, app.config['REQUEST_TIMEOUT'], app.config['REQUEST_TIMEOUT_MAX'])
+    except ValueError as e:
+        return None, (jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400)
+    return (Deadline(seconds) if seconds else None), None
+
+def get_client_id():
+    """Address the rate limit applies to"""
+    if app.config['RATE_LIMIT_TRUST_PROXY'] and request.access_route:
+        return request.access_route[0]
+    return request.remote_addr or 'unknown'
+
+def busy_response(error, status, retry_after):
+    """JSON error carrying a Retry-After header"""
+    response = jsonify({
+        'success': False,
+        'error': error,
+        'retry_after': retry_after
+    })
+    response.status_code = status
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def busy_stream(error, status, retry_after):
+    """busy_response for EventSource clients: a stream of one error event
+    
+    EventSource hides the status and body of a non-200 response, so a
+    rejection is sent with 200 and carries its status in the event.
+    """
+    event = sse_event('error', {
+        'success': False,
+        'error': error,
+        'status': status,
+        'retry_after': retry_after
+    })
+    return Response(event, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'Retry-After': str(retry_after)
+    })
+
+def check_rate_limit(cost=1, respond=busy_response):
+    """Return a 429 response (built by respond) if the client is over its rate limit, else None"""
+    client = get_client_id()
+    retry_after = rate_limiter.check(client, cost)
+    if not retry_after:
+        return None
+    
+    logger.warning(f"Rate limited client {client} for {retry_after}s")
+    return respond(f"Rate limit exceeded ({app.config['RATE_LIMIT']} analyses per minute)", 429, retry_after)
+
+# Client-supplied trace IDs are reused only if they look like one
+TRACE_ID_PATTERN = re.compile(r'^[\w.-]{1,64}$')
+
+def record_history(topic, result):
+    """Save a successful, complete HTML analysis to the history store
+    
+    A report rebuilt entirely from stored sections is already there, and is skipped.
+    """
+    if history is None or not result['success'] or result.get('partial') or not isinstance(result['result'], str):
+        return
+    sections = result.get('sections')
+    if sections and not any(entry['regenerated'] for entry in sections.values()):
+        return
+    history.record(topic, result['result'])
+
+def crew_stages_html(stages):
+    """Report markup for streamed (stage, output) pairs, matching what the page builds"""
+    blocks = ''.join(
+        f'<div class="stage-output stage-done" data-stage="{escape(stage)}"><h3>{escape(stage)}</h3>'
+        f'<div class="stage-text">{escape(output)}</div></div>'
+        for stage, output in stages
+    )
+    return f'<div class="analysis-report">{blocks}</div>'
+
+def encode_json(payload, accept_encoding, key=None):
+    """(body, content_encoding, uncompressed_size) of a JSON payload for this client
+
+    With the payload's result cache key, the serialized and compressed
+    bodies are kept with the cached result, so repeat hits send the same
+    bytes without serializing or compressing again.
+    """
+    def serialize():
+        return (app.json.dumps(payload) + '\n').encode('utf-8')
+    
+    raw = result_cache.encoded(key, payload, 'identity', serialize) if key else serialize()
+    encoding = negotiate(accept_encoding) if app.config['COMPRESSION_ENABLED'] else 'identity'
+    if encoding == 'identity' or len(raw) < app.config['COMPRESSION_MIN_SIZE']:
+        return raw, 'identity', len(raw)
+    
+    if key:
+        body = result_cache.encoded(key, payload, encoding, lambda: compress(raw, encoding, stored=True))
     else:
-        return generate_general_analysis(topic)
+        body = compress(raw, encoding)
+    return body, encoding, len(raw)
 
-def generate_tech_analysis(topic):
-    """Generate technology-focused analysis"""
-    return {
-        'executive_summary': f"The {topic} landscape represents a rapidly evolving technological frontier with significant implications for digital transformation, innovation, and competitive advantage. Our analysis reveals a complex ecosystem driven by emerging technologies, changing consumer expectations, and regulatory considerations.",
-        'insights': [
-            f"Rapid adoption of {topic} technologies is accelerating digital transformation across industries",
-            "Integration challenges remain a primary barrier to widespread implementation",
-            "Security and privacy concerns are driving regulatory frameworks and compliance requirements",
-            "AI and machine learning are becoming integral components of {topic} solutions",
-            "Cloud-native architectures are becoming the standard for scalable {topic} implementations"
-        ],
-        'market_analysis': f"The global {topic} market is experiencing unprecedented growth, driven by increased digitalization, remote work trends, and the need for operational efficiency. Market research indicates a compound annual growth rate of 15-25% over the next five years, with enterprise adoption leading the charge.",
-        'trends': [
-            {'title': 'Edge Computing Integration', 'description': 'Moving processing closer to data sources for reduced latency and improved performance'},
-            {'title': 'AI-First Architecture', 'description': 'Designing systems with artificial intelligence as a core component from the ground up'},
-            {'title': 'Zero-Trust Security Models', 'description': 'Implementing security frameworks that verify every access request regardless of location'},
-            {'title': 'Sustainable Technology Practices', 'description': 'Focusing on energy-efficient solutions and environmentally conscious implementations'}
-        ],
-        'technology_analysis': f"Current {topic} implementations are leveraging cutting-edge technologies including cloud computing, artificial intelligence, and advanced analytics. The convergence of these technologies is creating new possibilities for automation, optimization, and user experience enhancement.",
-        'technologies': [
-            {'name': 'Cloud Computing', 'description': 'Scalable infrastructure enabling flexible deployment and management'},
-            {'name': 'Artificial Intelligence', 'description': 'Machine learning algorithms for intelligent automation and decision-making'},
-            {'name': 'API-First Architecture', 'description': 'Modular design enabling seamless integration and interoperability'},
-            {'name': 'Real-time Analytics', 'description': 'Instant data processing for immediate insights and responses'}
-        ],
-        'opportunities': [
-            f"Expanding {topic} capabilities to underserved markets and demographics",
-            "Developing specialized solutions for industry-specific use cases",
-            "Creating integrated platforms that combine multiple {topic} functionalities",
-            "Building partnerships with complementary technology providers",
-            "Leveraging data analytics for predictive insights and optimization"
-        ],
-        'challenges': [
-            "Managing complex integration requirements across diverse systems",
-            "Ensuring data security and compliance with evolving regulations",
-            "Addressing skills gaps in {topic} implementation and management",
-            "Balancing innovation with stability and reliability requirements",
-            "Managing costs while maintaining competitive pricing"
-        ],
-        'immediate_actions': [
-            {'title': 'Technology Assessment', 'description': 'Conduct comprehensive evaluation of current {topic} infrastructure and capabilities'},
-            {'title': 'Security Audit', 'description': 'Review and strengthen security measures to meet industry standards'},
-            {'title': 'Team Training', 'description': 'Invest in upskilling team members on latest {topic} technologies and best practices'},
-            {'title': 'Pilot Implementation', 'description': 'Launch small-scale {topic} projects to test feasibility and gather feedback'}
-        ],
-        'medium_term_actions': [
-            {'title': 'Platform Integration', 'description': 'Develop comprehensive {topic} platform with seamless user experience'},
-            {'title': 'Data Strategy', 'description': 'Implement advanced analytics and data management capabilities'},
-            {'title': 'Partnership Development', 'description': 'Establish strategic partnerships with key technology providers'},
-            {'title': 'Market Expansion', 'description': 'Scale {topic} solutions to new markets and customer segments'}
-        ],
-        'long_term_actions': [
-            {'title': 'Innovation Leadership', 'description': 'Position as thought leader in {topic} innovation and best practices'},
-            {'title': 'Global Expansion', 'description': 'Establish {topic} presence in international markets'},
-            {'title': 'Ecosystem Development', 'description': 'Build comprehensive {topic} ecosystem with partners and developers'},
-            {'title': 'Future Technology Integration', 'description': 'Prepare for next-generation technologies and emerging trends'}
-        ],
-        'impact_assessment': f"Successful {topic} implementation is expected to deliver significant improvements in operational efficiency, customer satisfaction, and competitive positioning. Organizations can expect 20-40% improvements in key performance metrics within 12-18 months of full deployment.",
-        'success_metrics': [
-            'User adoption rate and engagement levels',
-            'System performance and reliability metrics',
-            'Cost reduction and efficiency improvements',
-            'Customer satisfaction and retention rates',
-            'Market share and competitive positioning'
-        ],
-        'future_outlook': f"The {topic} landscape is poised for continued evolution, with emerging technologies like quantum computing, advanced AI, and next-generation networking expected to reshape the industry. Organizations that invest in flexible, scalable solutions today will be best positioned to capitalize on future opportunities.",
-        'predictions': [
-            {'timeframe': '6-12 months', 'prediction': f'Increased adoption of {topic} solutions driven by proven ROI and competitive advantages'},
-            {'timeframe': '1-2 years', 'prediction': 'Integration of advanced AI capabilities becoming standard in {topic} platforms'},
-            {'timeframe': '3-5 years', 'prediction': f'Transformation of {topic} from specialized tool to essential business infrastructure'}
-        ],
-        'resources': [
-            f'"{topic} Best Practices Guide" - Industry Standards Documentation',
-            f'"{topic} Implementation Framework" - Technical Architecture Guide',
-            f'"{topic} Security Guidelines" - Cybersecurity Best Practices',
-            f'"{topic} ROI Calculator" - Business Value Assessment Tool',
-            f'"{topic} Community Forum" - Expert Network and Support'
-        ]
-    }
+def streams_json(payload):
+    """Whether payload's result is long enough to be sent with stream_json"""
+    result = payload.get('result')
+    limit = app.config['JSON_STREAM_MIN_SIZE']
+    return bool(limit) and isinstance(result, str) and len(result) > limit
 
-def generate_business_analysis(topic):
-    """Generate business-focused analysis"""
-    return {
-        'executive_summary': f"The {topic} sector represents a dynamic business environment with significant growth potential and evolving market dynamics. Our comprehensive analysis reveals key opportunities for strategic positioning, operational optimization, and sustainable competitive advantage.",
-        'insights': [
-            f"Market demand for {topic} solutions is growing at 20-30% annually",
-            "Digital transformation is reshaping traditional {topic} business models",
-            "Customer expectations are driving innovation in {topic} service delivery",
-            "Regulatory changes are creating new compliance requirements and opportunities",
-            "Technology integration is becoming essential for {topic} competitiveness"
-        ],
-        'market_analysis': f"The {topic} market is characterized by increasing competition, evolving customer needs, and technological disruption. Market analysis indicates strong growth potential with emerging opportunities in digital services, automation, and customer experience enhancement.",
-        'trends': [
-            {'title': 'Digital-First Approach', 'description': 'Prioritizing digital channels and technology-driven customer experiences'},
-            {'title': 'Sustainability Focus', 'description': 'Integrating environmental and social responsibility into business operations'},
-            {'title': 'Data-Driven Decision Making', 'description': 'Leveraging analytics and insights for strategic planning and optimization'},
-            {'title': 'Customer-Centric Innovation', 'description': 'Developing solutions based on deep understanding of customer needs and behaviors'}
-        ],
-        'technology_analysis': f"Technology adoption in {topic} is accelerating, with businesses investing in automation, analytics, and digital platforms to improve efficiency and customer experience. The integration of AI, cloud computing, and mobile technologies is transforming traditional business processes.",
-        'technologies': [
-            {'name': 'Customer Relationship Management', 'description': 'Advanced CRM systems for customer engagement and relationship management'},
-            {'name': 'Business Intelligence', 'description': 'Analytics platforms for data-driven insights and decision making'},
-            {'name': 'Process Automation', 'description': 'Workflow automation tools for operational efficiency'},
-            {'name': 'Digital Marketing', 'description': 'Multi-channel marketing platforms for customer acquisition and retention'}
-        ],
-        'opportunities': [
-            f"Expanding {topic} services to new geographic markets",
-            "Developing innovative {topic} solutions for underserved customer segments",
-            "Creating strategic partnerships to enhance service offerings",
-            "Leveraging technology to improve operational efficiency and customer experience",
-            "Building sustainable competitive advantages through innovation and quality"
-        ],
-        'challenges': [
-            "Managing increasing competition and market saturation",
-            "Adapting to rapidly changing customer expectations and preferences",
-            "Navigating regulatory compliance and legal requirements",
-            "Investing in technology while maintaining profitability",
-            "Attracting and retaining skilled talent in competitive market"
-        ],
-        'immediate_actions': [
-            {'title': 'Market Research', 'description': 'Conduct comprehensive analysis of {topic} market opportunities and competitive landscape'},
-            {'title': 'Customer Analysis', 'description': 'Deep dive into customer needs, preferences, and pain points'},
-            {'title': 'Technology Assessment', 'description': 'Evaluate current technology infrastructure and identify improvement opportunities'},
-            {'title': 'Strategic Planning', 'description': 'Develop comprehensive {topic} strategy with clear objectives and milestones'}
-        ],
-        'medium_term_actions': [
-            {'title': 'Service Innovation', 'description': 'Develop new {topic} offerings that differentiate from competitors'},
-            {'title': 'Technology Implementation', 'description': 'Deploy advanced systems for improved efficiency and customer experience'},
-            {'title': 'Partnership Development', 'description': 'Establish strategic alliances to expand capabilities and reach'},
-            {'title': 'Market Expansion', 'description': 'Scale {topic} operations to new markets and customer segments'}
-        ],
-        'long_term_actions': [
-            {'title': 'Market Leadership', 'description': 'Establish {topic} as industry leader through innovation and excellence'},
-            {'title': 'Global Expansion', 'description': 'Develop international {topic} presence and capabilities'},
-            {'title': 'Ecosystem Development', 'description': 'Build comprehensive {topic} ecosystem with partners and stakeholders'},
-            {'title': 'Future Innovation', 'description': 'Invest in next-generation {topic} technologies and business models'}
-        ],
-        'impact_assessment': f"Strategic {topic} initiatives are expected to deliver significant business value through improved customer satisfaction, operational efficiency, and market positioning. Organizations can anticipate 25-50% improvements in key business metrics within 18-24 months.",
-        'success_metrics': [
-            'Revenue growth and market share expansion',
-            'Customer satisfaction and retention rates',
-            'Operational efficiency and cost reduction',
-            'Employee productivity and engagement',
-            'Brand recognition and market positioning'
-        ],
-        'future_outlook': f"The {topic} industry is evolving toward more integrated, technology-driven solutions that prioritize customer experience and operational efficiency. Organizations that embrace innovation and adapt to changing market dynamics will thrive in the competitive landscape.",
-        'predictions': [
-            {'timeframe': '6-12 months', 'prediction': f'Increased focus on digital transformation in {topic} operations'},
-            {'timeframe': '1-2 years', 'prediction': 'Consolidation and strategic partnerships reshaping {topic} landscape'},
-            {'timeframe': '3-5 years', 'prediction': f'Technology integration becoming standard requirement for {topic} success'}
-        ],
-        'resources': [
-            f'"{topic} Market Analysis Report" - Industry Research and Insights',
-            f'"{topic} Best Practices Guide" - Operational Excellence Framework',
-            f'"{topic} Technology Trends" - Innovation and Digital Transformation',
-            f'"{topic} Customer Research" - Market Intelligence and Segmentation',
-            f'"{topic} Strategic Planning Toolkit" - Business Development Resources'
-        ]
-    }
+def stream_json(payload, accept_encoding):
+    """(chunks, content_encoding) of a JSON payload for this client, encoded as it is sent
+    
+    The JSON text, and the compressed body, are produced a chunk at a time,
+    so a long result is never copied whole into either. They are not kept
+    with a cached result either; the bytes sent are counted as they go.
+    """
+    encoding = negotiate(accept_encoding) if app.config['COMPRESSION_ENABLED'] else 'identity'
+    
+    def counted(chunks, metric):
+        for chunk in chunks:
+            metric.inc(len(chunk), encoding=encoding)
+            yield chunk
+    
+    body = counted(chain(iter_json_bytes(payload), [b'\n']), RESPONSE_UNCOMPRESSED_BYTES)
+    if encoding != 'identity':
+        body = compress_stream(body, encoding)
+    return counted(body, RESPONSE_BYTES), encoding
 
-def generate_health_analysis(topic):
-    """Generate healthcare-focused analysis"""
-    return {
-        'executive_summary': f"The {topic} field represents a critical component of healthcare delivery with significant potential for improving patient outcomes, operational efficiency, and healthcare accessibility. Our analysis reveals key opportunities for innovation, quality improvement, and sustainable healthcare solutions.",
-        'insights': [
-            f"Technology integration in {topic} is improving patient care and outcomes",
-            "Regulatory compliance and quality standards are driving innovation in {topic}",
-            "Patient-centered care models are reshaping {topic} service delivery",
-            "Data analytics and AI are enhancing {topic} decision-making and treatment protocols",
-            "Telehealth and remote monitoring are expanding {topic} accessibility"
-        ],
-        'market_analysis': f"The {topic} market is experiencing significant growth driven by aging populations, increasing healthcare needs, and technological advancement. Market research indicates strong demand for innovative {topic} solutions that improve patient outcomes and operational efficiency.",
-        'trends': [
-            {'title': 'Precision Medicine', 'description': 'Personalized treatment approaches based on individual patient characteristics and genetics'},
-            {'title': 'Digital Health Integration', 'description': 'Seamless integration of digital tools and platforms in healthcare delivery'},
-            {'title': 'Value-Based Care', 'description': 'Focus on patient outcomes and cost-effectiveness in healthcare delivery'},
-            {'title': 'Preventive Care Models', 'description': 'Emphasis on prevention and early intervention to improve health outcomes'}
-        ],
-        'technology_analysis': f"Healthcare technology adoption in {topic} is accelerating, with institutions investing in electronic health records, telemedicine platforms, and AI-powered diagnostic tools. The integration of advanced technologies is transforming patient care delivery and clinical decision-making.",
-        'technologies': [
-            {'name': 'Electronic Health Records', 'description': 'Comprehensive digital patient records for improved care coordination'},
-            {'name': 'Telemedicine Platforms', 'description': 'Remote healthcare delivery and patient monitoring systems'},
-            {'name': 'AI Diagnostic Tools', 'description': 'Machine learning algorithms for enhanced diagnostic accuracy'},
-            {'name': 'Wearable Health Devices', 'description': 'Continuous patient monitoring and health tracking technologies'}
-        ],
-        'opportunities': [
-            f"Expanding {topic} services to underserved populations and rural areas",
-            "Developing innovative {topic} solutions for chronic disease management",
-            "Creating integrated care models that improve patient outcomes",
-            "Leveraging technology to enhance {topic} accessibility and affordability",
-            "Building partnerships to strengthen {topic} ecosystem and capabilities"
-        ],
-        'challenges': [
-            "Managing regulatory compliance and quality assurance requirements",
-            "Ensuring patient data security and privacy protection",
-            "Addressing healthcare disparities and access barriers",
-            "Balancing technology adoption with human-centered care",
-            "Managing costs while maintaining quality and accessibility"
-        ],
-        'immediate_actions': [
-            {'title': 'Quality Assessment', 'description': 'Conduct comprehensive evaluation of {topic} service quality and patient outcomes'},
-            {'title': 'Technology Integration', 'description': 'Implement digital health tools to enhance {topic} delivery'},
-            {'title': 'Staff Training', 'description': 'Invest in healthcare professional development and technology training'},
-            {'title': 'Patient Engagement', 'description': 'Develop strategies to improve patient participation and satisfaction'}
-        ],
-        'medium_term_actions': [
-            {'title': 'Service Innovation', 'description': 'Develop new {topic} models that improve patient outcomes and efficiency'},
-            {'title': 'Technology Platform', 'description': 'Build integrated {topic} platform with comprehensive patient management'},
-            {'title': 'Partnership Development', 'description': 'Establish collaborations with healthcare providers and technology partners'},
-            {'title': 'Quality Improvement', 'description': 'Implement continuous quality improvement programs for {topic} excellence'}
-        ],
-        'long_term_actions': [
-            {'title': 'Healthcare Leadership', 'description': 'Establish {topic} as model for healthcare innovation and excellence'},
-            {'title': 'Research Integration', 'description': 'Integrate research and evidence-based practices into {topic} delivery'},
-            {'title': 'Community Health', 'description': 'Expand {topic} impact on community health and wellness'},
-            {'title': 'Global Health', 'description': 'Contribute to global health initiatives and {topic} best practices'}
-        ],
-        'impact_assessment': f"Strategic {topic} improvements are expected to deliver significant healthcare value through improved patient outcomes, operational efficiency, and healthcare accessibility. Healthcare organizations can anticipate 15-30% improvements in key healthcare metrics within 12-18 months.",
-        'success_metrics': [
-            'Patient satisfaction and health outcomes',
-            'Healthcare delivery efficiency and cost-effectiveness',
-            'Provider productivity and job satisfaction',
-            'Healthcare accessibility and equity',
-            'Quality of care and patient safety'
-        ],
-        'future_outlook': f"The {topic} field is evolving toward more integrated, technology-enabled healthcare delivery that prioritizes patient outcomes and healthcare equity. Organizations that embrace innovation and evidence-based practices will lead the transformation of healthcare delivery.",
-        'predictions': [
-            {'timeframe': '6-12 months', 'prediction': f'Increased adoption of digital health tools in {topic} delivery'},
-            {'timeframe': '1-2 years', 'prediction': 'Integration of AI and machine learning in {topic} clinical decision-making'},
-            {'timeframe': '3-5 years', 'prediction': f'Transformation of {topic} through personalized and precision medicine approaches'}
-        ],
-        'resources': [
-            f'"{topic} Clinical Guidelines" - Evidence-Based Practice Standards',
-            f'"{topic} Quality Improvement Toolkit" - Healthcare Excellence Framework',
-            f'"{topic} Technology Integration Guide" - Digital Health Implementation',
-            f'"{topic} Patient Engagement Strategies" - Healthcare Communication Best Practices',
-            f'"{topic} Research Database" - Clinical Evidence and Outcomes Data'
-        ]
-    }
+def json_response(payload, key=None):
+    """JSON response encoded as the client accepts, see encode_json and stream_json"""
+    accept_encoding = request.headers.get('Accept-Encoding', '')
+    if streams_json(payload):
+        body, encoding = stream_json(payload, accept_encoding)
+    else:
+        body, encoding, g.uncompressed_size = encode_json(payload, accept_encoding, key)
+    response = Response(body, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    return response
 
-def generate_education_analysis(topic):
-    """Generate education-focused analysis"""
-    return {
-        'executive_summary': f"The {topic} sector represents a transformative educational landscape with significant opportunities for innovation, accessibility, and learning outcomes improvement. Our analysis reveals key trends driving educational evolution and strategies for enhancing learning experiences.",
-        'insights': [
-            f"Technology integration in {topic} is revolutionizing learning and teaching methods",
-            "Personalized learning approaches are improving student engagement and outcomes",
-            "Digital literacy and technology skills are becoming essential in {topic}",
-            "Blended learning models are combining traditional and digital education approaches",
-            "Data analytics are enabling evidence-based educational decision-making"
-        ],
-        'market_analysis': f"The {topic} market is experiencing rapid growth driven by digital transformation, changing learning preferences, and the need for accessible education. Educational institutions are investing in technology and innovative teaching methods to meet evolving student needs.",
-        'trends': [
-            {'title': 'Personalized Learning', 'description': 'Adaptive learning systems that customize education to individual student needs'},
-            {'title': 'Microlearning', 'description': 'Bite-sized learning modules for flexible and accessible education'},
-            {'title': 'Gamification', 'description': 'Game-based learning elements to increase student engagement and motivation'},
-            {'title': 'Competency-Based Education', 'description': 'Learning models focused on skill mastery rather than time-based progression'}
-        ],
-        'technology_analysis': f"Educational technology adoption in {topic} is accelerating, with institutions implementing learning management systems, virtual reality tools, and AI-powered tutoring platforms. The integration of advanced technologies is transforming how students learn and teachers instruct.",
-        'technologies': [
-            {'name': 'Learning Management Systems', 'description': 'Comprehensive platforms for course delivery and student management'},
-            {'name': 'Virtual Reality', 'description': 'Immersive learning experiences for enhanced engagement and understanding'},
-            {'name': 'AI Tutoring', 'description': 'Intelligent tutoring systems for personalized learning support'},
-            {'name': 'Collaborative Tools', 'description': 'Digital platforms for student collaboration and peer learning'}
-        ],
-        'opportunities': [
-            f"Expanding {topic} access to underserved populations and remote areas",
-            "Developing innovative {topic} programs for emerging skills and industries",
-            "Creating flexible learning pathways that accommodate diverse student needs",
-            "Leveraging technology to enhance {topic} quality and accessibility",
-            "Building partnerships to strengthen {topic} ecosystem and resources"
-        ],
-        'challenges': [
-            "Ensuring equitable access to technology and digital resources",
-            "Training educators to effectively use new {topic} technologies",
-            "Maintaining quality standards while scaling {topic} programs",
-            "Addressing digital divide and technology literacy gaps",
-            "Balancing technology integration with human-centered learning"
-        ],
-        'immediate_actions': [
-            {'title': 'Technology Assessment', 'description': 'Evaluate current {topic} technology infrastructure and identify improvement opportunities'},
-            {'title': 'Educator Training', 'description': 'Invest in professional development for {topic} faculty and staff'},
-            {'title': 'Student Support', 'description': 'Develop comprehensive support systems for {topic} learners'},
-            {'title': 'Curriculum Review', 'description': 'Assess and update {topic} curriculum to meet current industry needs'}
-        ],
-        'medium_term_actions': [
-            {'title': 'Program Innovation', 'description': 'Develop new {topic} programs that integrate technology and best practices'},
-            {'title': 'Platform Development', 'description': 'Build integrated {topic} learning platform with comprehensive features'},
-            {'title': 'Partnership Building', 'description': 'Establish collaborations with industry and educational partners'},
-            {'title': 'Quality Assurance', 'description': 'Implement continuous improvement processes for {topic} excellence'}
-        ],
-        'long_term_actions': [
-            {'title': 'Educational Leadership', 'description': 'Establish {topic} as leader in educational innovation and excellence'},
-            {'title': 'Research Integration', 'description': 'Integrate educational research and evidence-based practices into {topic} delivery'},
-            {'title': 'Global Impact', 'description': 'Expand {topic} influence on global education and learning outcomes'},
-            {'title': 'Future Learning', 'description': 'Prepare for next-generation learning technologies and educational models'}
-        ],
-        'impact_assessment': f"Strategic {topic} improvements are expected to deliver significant educational value through enhanced learning outcomes, increased accessibility, and improved student engagement. Educational institutions can anticipate 20-40% improvements in key educational metrics within 12-18 months.",
-        'success_metrics': [
-            'Student learning outcomes and achievement',
-            'Educational accessibility and equity',
-            'Educator satisfaction and professional development',
-            'Technology integration and digital literacy',
-            'Program quality and accreditation standards'
-        ],
-        'future_outlook': f"The {topic} field is evolving toward more personalized, technology-enabled learning experiences that prioritize student success and educational equity. Institutions that embrace innovation and evidence-based practices will lead the transformation of education.",
-        'predictions': [
-            {'timeframe': '6-12 months', 'prediction': f'Increased adoption of blended learning models in {topic} programs'},
-            {'timeframe': '1-2 years', 'prediction': 'Integration of AI and adaptive learning in {topic} curriculum delivery'},
-            {'timeframe': '3-5 years', 'prediction': f'Transformation of {topic} through personalized and competency-based learning approaches'}
-        ],
-        'resources': [
-            f'"{topic} Curriculum Framework" - Educational Standards and Guidelines',
-            f'"{topic} Technology Integration Guide" - Digital Learning Implementation',
-            f'"{topic} Assessment Toolkit" - Learning Evaluation and Measurement',
-            f'"{topic} Professional Development" - Educator Training and Support',
-            f'"{topic} Research Database" - Educational Evidence and Best Practices'
-        ]
-    }
+def get_page_args():
+    """Parse the cursor and limit query parameters as (cursor, limit, error_response)"""
+    try:
+        cursor = int(request.args['cursor']) if request.args.get('cursor') else None
+        limit = int(request.args.get('limit') or app.config['HISTORY_PAGE_SIZE'])
+    except ValueError:
+        return None, None, (jsonify({
+            'success': False,
+            'error': 'cursor and limit must be integers'
+        }), 400)
+    return cursor, min(max(limit, 1), 100), None
 
-def generate_general_analysis(topic):
-    """Generate general analysis for any topic"""
-    return {
-        'executive_summary': f"The {topic} represents a multifaceted subject with significant implications across various domains. Our comprehensive analysis reveals key opportunities for growth, innovation, and strategic development in this evolving landscape.",
-        'insights': [
-            f"Growing interest and adoption of {topic} across multiple sectors",
-            "Technology integration is transforming traditional {topic} approaches",
-            "Market demand for {topic} solutions is increasing steadily",
-            "Innovation and creativity are driving {topic} evolution",
-            "Collaboration and partnerships are essential for {topic} success"
-        ],
-        'market_analysis': f"The {topic} market is characterized by diverse opportunities and evolving dynamics. Market analysis indicates strong potential for growth and development across various sectors and applications.",
-        'trends': [
-            {'title': 'Digital Transformation', 'description': 'Integration of digital technologies to enhance {topic} capabilities and reach'},
-            {'title': 'Sustainability Focus', 'description': 'Emphasis on environmentally conscious and sustainable {topic} practices'},
-            {'title': 'Innovation Culture', 'description': 'Fostering creativity and innovation in {topic} development and implementation'},
-            {'title': 'Collaborative Approach', 'description': 'Building partnerships and networks to strengthen {topic} ecosystem'}
-        ],
-        'technology_analysis': f"Technology adoption in {topic} is accelerating, with organizations leveraging digital tools, data analytics, and innovative platforms to enhance capabilities and outcomes. The integration of advanced technologies is creating new possibilities for growth and development.",
-        'technologies': [
-            {'name': 'Data Analytics', 'description': 'Advanced analytics tools for insights and decision-making'},
-            {'name': 'Digital Platforms', 'description': 'Online systems for enhanced accessibility and engagement'},
-            {'name': 'Automation Tools', 'description': 'Process automation for improved efficiency and productivity'},
-            {'name': 'Collaboration Software', 'description': 'Digital tools for enhanced communication and teamwork'}
-        ],
-        'opportunities': [
-            f"Expanding {topic} reach to new markets and audiences",
-            "Developing innovative {topic} solutions for emerging needs",
-            "Creating strategic partnerships to enhance {topic} capabilities",
-            "Leveraging technology to improve {topic} efficiency and effectiveness",
-            "Building sustainable {topic} practices for long-term success"
-        ],
-        'challenges': [
-            "Managing complexity and diverse stakeholder needs",
-            "Ensuring quality and consistency in {topic} delivery",
-            "Adapting to changing market conditions and requirements",
-            "Balancing innovation with stability and reliability",
-            "Building and maintaining strong {topic} networks and relationships"
-        ],
-        'immediate_actions': [
-            {'title': 'Strategic Assessment', 'description': 'Conduct comprehensive evaluation of {topic} current state and opportunities'},
-            {'title': 'Stakeholder Engagement', 'description': 'Build relationships with key {topic} stakeholders and partners'},
-            {'title': 'Capacity Building', 'description': 'Invest in skills development and capability enhancement'},
-            {'title': 'Pilot Projects', 'description': 'Launch small-scale {topic} initiatives to test and refine approaches'}
-        ],
-        'medium_term_actions': [
-            {'title': 'Program Development', 'description': 'Develop comprehensive {topic} programs and initiatives'},
-            {'title': 'Technology Integration', 'description': 'Implement digital tools and platforms to enhance {topic} capabilities'},
-            {'title': 'Partnership Development', 'description': 'Establish strategic alliances to strengthen {topic} ecosystem'},
-            {'title': 'Quality Improvement', 'description': 'Implement continuous improvement processes for {topic} excellence'}
-        ],
-        'long_term_actions': [
-            {'title': 'Leadership Position', 'description': 'Establish {topic} as recognized leader in the field'},
-            {'title': 'Innovation Hub', 'description': 'Create center of excellence for {topic} innovation and development'},
-            {'title': 'Global Impact', 'description': 'Expand {topic} influence and impact on broader scale'},
-            {'title': 'Future Vision', 'description': 'Develop long-term vision for {topic} evolution and growth'}
-        ],
-        'impact_assessment': f"Strategic {topic} initiatives are expected to deliver significant value through improved outcomes, enhanced capabilities, and strengthened relationships. Organizations can anticipate 15-30% improvements in key performance metrics within 12-18 months.",
-        'success_metrics': [
-            'Outcome achievement and goal completion',
-            'Stakeholder satisfaction and engagement',
-            'Process efficiency and effectiveness',
-            'Innovation and creativity indicators',
-            'Partnership and collaboration strength'
-        ],
-        'future_outlook': f"The {topic} landscape is evolving toward more integrated, technology-enabled approaches that prioritize innovation, collaboration, and sustainable growth. Organizations that embrace change and invest in capability development will thrive in the evolving environment.",
-        'predictions': [
-            {'timeframe': '6-12 months', 'prediction': f'Increased focus on digital transformation in {topic} practices'},
-            {'timeframe': '1-2 years', 'prediction': 'Emergence of new {topic} models and approaches'},
-            {'timeframe': '3-5 years', 'prediction': f'Transformation of {topic} through technology integration and innovation'}
-        ],
-        'resources': [
-            f'"{topic} Best Practices Guide" - Industry Standards and Guidelines',
-            f'"{topic} Innovation Toolkit" - Creative Development Resources',
-            f'"{topic} Technology Integration" - Digital Transformation Guide',
-            f'"{topic} Partnership Framework" - Collaboration and Network Building',
-            f'"{topic} Future Trends" - Strategic Planning and Development'
-        ]
-    }
+@app.before_request
+def start_trace():
+    """Adopt the caller's X-Request-ID or start a new trace"""
+    incoming = request.headers.get('X-Request-ID', '')
+    trace_id.set(incoming if TRACE_ID_PATTERN.match(incoming) else new_trace_id())
+    g.request_start = time.perf_counter()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+@app.after_request
+def finish_trace(response):
+    """Record request latency and echo the trace ID"""
+    if 'request_start' in g:
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - g.request_start,
+            endpoint=request.url_rule.rule if request.url_rule else 'unmatched',
+            method=request.method,
+            status=response.status_code
+        )
+    response.headers['X-Request-ID'] = trace_id.get()
+    return response
 
-app = Flask(__name__)
-CORS(app)  # Enable CORS for frontend-backend communication
+@app.after_request
+def encode_response(response):
+    """Compress buffered responses for clients that accept it and count bytes sent"""
+    if response.is_streamed:
+        return response
+    
+    uncompressed_size = g.pop('uncompressed_size', response.content_length)
+    if app.config['COMPRESSION_ENABLED']:
+        response = compress_response(response, request.headers.get('Accept-Encoding', ''),
+                                     min_size=app.config['COMPRESSION_MIN_SIZE'])
+    
+    encoding = response.headers.get('Content-Encoding', 'identity')
+    RESPONSE_BYTES.inc(response.content_length or 0, encoding=encoding)
+    RESPONSE_UNCOMPRESSED_BYTES.inc(uncompressed_size or 0, encoding=encoding)
+    return response
 
-# Store API key temporarily (in production, use proper session management)
-app.secret_key = 'your-secret-key-change-in-production'
+def warm_up():
+    """Do the first-request work that needs no API key: compile the page template, classify and render
+    
+    Returns the names of what was warmed.
+    """
+    with app.app_context():
+        app.jinja_env.get_template('index.html')
+    context = generate_dynamic_analysis('warm-up')
+    render_section(REPORT_SECTIONS[0], 'warm-up', context)
+    return ['templates', 'classifier']
 
 @app.route('/')
 def index():
     """Serve the main page"""
-    return render_template('index.html')
+    if app.config['STREAM_PIPELINE'] == 'crew':
+        stream_url = url_for('stream_crew')
+    else:
+        stream_url = url_for('stream_analysis')
+    return render_template('index.html', stream_url=stream_url, request_timeout=app.config['REQUEST_TIMEOUT'])
 
 @app.route('/api/analyze', methods=['POST'])
 def analyze_content():
     """API endpoint for content analysis"""
     try:
-        data = request.get_json()
-        
         # Validate input
-        if not data:
-            return jsonify({
-                'success': False,
-                'error': 'No data provided'
-            }), 400
-            
-        topic = data.get('topic', '').strip()
+        with time_stage('parse'):
+            topic, error_response = get_request_topic()
+        if error_response:
+            return error_response
         
-        if not topic:
-            return jsonify({
-                'success': False,
-                'error': 'Topic is required'
-            }), 400
+        deadline, error_response = get_deadline()
+        if error_response:
+            return error_response
+        
+        limited = check_rate_limit()
+        if limited:
+            return limited
         
         logger.info(f"Starting analysis for topic: {topic}")
         
         # Run the CrewAI analysis
-        result = run_content_analysis(topic)
+        output_format = get_output_format()
+        try:
+            result = admitted_analyze_topic(
+                topic, use_cache=wants_cache(), deadline=deadline, output_format=output_format,
+                refresh=fresh_sections()
+            )
+        except OverloadedError as e:
+            logger.warning(f"Rejected analysis for topic: {topic} ({e})")
+            return busy_response(str(e), 503, e.retry_after)
+        
+        with time_stage('serialize'):
+            key = cache_key(topic, pipeline=PIPELINE_VERSION, output_format=output_format)
+            response = json_response(result, key)
         
         if result['success']:
             logger.info("Analysis completed successfully")
-            return jsonify(result)
+            return response
+        elif result.get('reason') == DEADLINE:
+            logger.warning(f"Analysis ran out of time: {result.get('error')}")
+            return response, 504
         else:
             logger.error(f"Analysis failed: {result.get('error', 'Unknown error')}")
-            return jsonify(result), 500
+            return response, 500
             
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
@@ -627,14 +624,447 @@ def analyze_content():
             'error': f'Server error: {str(e)}'
         }), 500
 
+@app.route('/api/analyze/refresh', methods=['POST'])
+def refresh_analysis():
+    """Regenerate the stale sections of a topic's report, and any listed in "sections" """
+    topic, error_response = get_request_topic()
+    if error_response:
+        return error_response
+    
+    sections = (request.get_json(silent=True) or {}).get('sections') or []
+    if not isinstance(sections, list) or not set(map(str, sections)) <= set(REPORT_SECTIONS):
+        return jsonify({
+            'success': False,
+            'error': f"sections must be a list of report sections: {', '.join(REPORT_SECTIONS)}"
+        }), 400
+    
+    deadline, error_response = get_deadline()
+    if error_response:
+        return error_response
+    
+    limited = check_rate_limit()
+    if limited:
+        return limited
+    
+    logger.info(f"Refreshing analysis for topic: {topic} (sections: {', '.join(sections) or 'stale only'})")
+    try:
+        result = admission.wrap(run_content_analysis)(topic, deadline=deadline, refresh=tuple(sections))
+    except OverloadedError as e:
+        logger.warning(f"Rejected refresh for topic: {topic} ({e})")
+        return busy_response(str(e), 503, e.retry_after)
+    
+    if result['success']:
+        # Later analyses of the topic get the refreshed report
+        if app.config['CACHE_ENABLED']:
+            result_cache.set(cache_key(topic, pipeline=PIPELINE_VERSION, output_format='html'), result)
+        record_history(topic, result)
+        return json_response(result)
+    elif result.get('reason') == DEADLINE:
+        return json_response(result), 504
+    else:
+        logger.error(f"Refresh failed: {result.get('error', 'Unknown error')}")
+        return json_response(result), 500
+
+def sse_event(event, data):
+    """Format a Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/analyze/stream')
+def stream_analysis():
+    """Stream the analysis report section by section over Server-Sent Events"""
+    topic = request.args.get('topic', '').strip()
+    
+    if not topic:
+        return jsonify({
+            'success': False,
+            'error': 'Topic is required'
+        }), 400
+    
+    deadline, error_response = get_deadline()
+    if error_response:
+        return error_response
+    
+    limited = check_rate_limit(respond=busy_stream)
+    if limited:
+        return limited
+    
+    logger.info(f"Starting streamed analysis for topic: {topic}")
+    
+    key = cache_key(topic, pipeline=PIPELINE_VERSION, output_format='html')
+    cached = result_cache.get(key) if wants_cache() else None
+    
+    # Take the slot before the stream starts so overload is still a clean rejection
+    started = None
+    if not cached:
+        try:
+            started = admission.acquire()
+        except OverloadedError as e:
+            logger.warning(f"Rejected streamed analysis for topic: {topic} ({e})")
+            return busy_stream(str(e), 503, e.retry_after)
+    
+    def generate():
+        sections = []
+        try:
+            if cached:
+                result = cached
+                yield sse_event('section', {'section': 'report', 'html': cached['result']})
+            else:
+                for section, html in iter_report_sections(topic, deadline):
+                    sections.append(html)
+                    yield sse_event('section', {'section': section, 'html': html})
+                
+                result = {
+                    'success': True,
+                    'result': f'<div class="analysis-report">{"".join(sections)}</div>',
+                    'message': 'Deep analysis completed successfully!'
+                }
+                if app.config['CACHE_ENABLED']:
+                    result_cache.set(key, result)
+                record_history(topic, result)
+            
+            logger.info("Streamed analysis completed successfully")
+            yield sse_event('done', {
+                'success': True,
+                'message': 'Deep analysis completed successfully!'
+            })
+        except Cancelled as e:
+            # The sections sent so far stand; the rest of the report is never generated
+            logger.warning(f"Streamed analysis stopped after {len(sections)} sections ({e.reason})")
+            yield sse_event('done', {
+                'success': True,
+                'partial': True,
+                'reason': e.reason,
+                'message': f'{e}; the report is incomplete.'
+            })
+        except Exception as e:
+            logger.error(f"Streamed analysis failed: {str(e)}")
+            yield sse_event('error', {
+                'success': False,
+                'error': str(e),
+                'message': 'An error occurred during content analysis.'
+            })
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Stop nginx from buffering the stream
+    })
+    if started is not None:
+        # Runs even if the client disconnects before the stream starts
+        response.call_on_close(lambda: admission.release(started))
+    return response
+
+@app.route('/api/crew/stream')
+def stream_crew():
+    """Stream the crew's LLM output token by token over Server-Sent Events"""
+    topic = request.args.get('topic', '').strip()
+    
+    if not topic:
+        return jsonify({
+            'success': False,
+            'error': 'Topic is required'
+        }), 400
+    
+    deadline, error_response = get_deadline()
+    if error_response:
+        return error_response
+    
+    limited = check_rate_limit(respond=busy_stream)
+    if limited:
+        return limited
+    
+    try:
+        started = admission.acquire()
+    except OverloadedError as e:
+        logger.warning(f"Rejected streamed crew analysis for topic: {topic} ({e})")
+        return busy_stream(str(e), 503, e.retry_after)
+    
+    logger.info(f"Starting streamed crew analysis for topic: {topic}")
+    request_start = g.request_start
+    # Even without a time budget, a client that goes away cancels the crew
+    deadline = deadline or Deadline()
+    
+    def generate():
+        first_token = True
+        stages = []
+        try:
+            for kind, stage, text in crew_stack.iter_content_events(topic, deadline=deadline):
+                if kind == 'token':
+                    if first_token:
+                        FIRST_TOKEN_SECONDS.observe(time.perf_counter() - request_start, endpoint='crew')
+                        first_token = False
+                    yield sse_event('token', {'stage': stage, 'text': text})
+                else:
+                    stages.append((stage, text))
+                    yield sse_event('stage', {'stage': stage, 'output': text})
+            
+            record_history(topic, {'success': True, 'result': crew_stages_html(stages)})
+            logger.info("Streamed crew analysis completed successfully")
+            yield sse_event('done', {
+                'success': True,
+                'message': 'Deep analysis completed successfully!'
+            })
+        except Cancelled as e:
+            logger.warning(f"Streamed crew analysis stopped after {len(stages)} stages ({e.reason})")
+            yield sse_event('done', {
+                'success': bool(stages),
+                'partial': True,
+                'reason': e.reason,
+                'message': f'{e}; the analysis is incomplete.'
+            })
+        except Exception as e:
+            logger.error(f"Streamed crew analysis failed: {str(e)}")
+            yield sse_event('error', {
+                'success': False,
+                'error': str(e),
+                'message': 'An error occurred during content analysis.'
+            })
+        finally:
+            # Closed early when the client disconnects; stop the crew at its next LLM call
+            deadline.cancel()
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    response.call_on_close(lambda: admission.release(started))
+    return response
+
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """Analyze many topics at once, streaming one NDJSON record per topic as it finishes"""
+    data = request.get_json(silent=True)
+    topics = data.get('topics') if isinstance(data, dict) else None
+    
+    if not isinstance(topics, list) or not all(isinstance(topic, str) for topic in topics):
+        return jsonify({
+            'success': False,
+            'error': 'A list of topics is required'
+        }), 400
+    
+    if len(topics) > app.config['BATCH_MAX_TOPICS']:
+        return jsonify({
+            'success': False,
+            'error': f"At most {app.config['BATCH_MAX_TOPICS']} topics per batch"
+        }), 400
+    
+    try:
+        concurrency = int(data.get('concurrency') or app.config['BATCH_CONCURRENCY'])
+    except (TypeError, ValueError):
+        concurrency = app.config['BATCH_CONCURRENCY']
+    concurrency = max(1, min(concurrency, app.config['BATCH_MAX_CONCURRENCY']))
+    
+    # Each unique topic costs a token, so a batch can't be bigger than a full bucket
+    cost = max(len(dedupe_topics(topics)), 1)
+    if rate_limiter.enabled and cost > rate_limiter.capacity:
+        return jsonify({
+            'success': False,
+            'error': f"At most {rate_limiter.capacity} topics per batch under the rate limit"
+        }), 400
+    limited = check_rate_limit(cost=cost)
+    if limited:
+        return limited
+    
+    # Every topic takes an admission slot, like any other analysis (cache hits don't)
+    if app.config['BATCH_USE_PROCESSES']:
+        # Worker processes can't share the in-memory cache, so run uncached
+        runner, options = run_content_analysis, {
+            'output_format': get_output_format(), 'refresh': fresh_sections(), 'admission': admission
+        }
+    else:
+        runner, options = admitted_analyze_topic, {
+            'use_cache': wants_cache(), 'output_format': get_output_format(), 'refresh': fresh_sections()
+        }
+    
+    logger.info(f"Starting batch analysis of {len(topics)} topics (concurrency {concurrency})")
+    
+    def generate():
+        start = time.perf_counter()
+        counts = {'completed': 0, 'failed': 0}
+        
+        for record in iter_batch(topics, runner, max_workers=concurrency,
+                                 use_processes=app.config['BATCH_USE_PROCESSES'], **options):
+            counts[record['status']] += 1
+            yield json.dumps(record) + '\n'
+        
+        logger.info(f"Batch analysis finished: {counts['completed']} completed, {counts['failed']} failed")
+        yield json.dumps({
+            'done': True,
+            'topics': len(topics),
+            'unique_topics': counts['completed'] + counts['failed'],
+            **counts,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 1)
+        }) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson', headers={
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Queue an analysis and return immediately with its job ID"""
+    topic, error_response = get_request_topic()
+    if error_response:
+        return error_response
+    
+    limited = check_rate_limit()
+    if limited:
+        return limited
+    
+    try:
+        job_id = job_queue.submit(
+            topic, use_cache=wants_cache(), output_format=get_output_format(), refresh=fresh_sections()
+        )
+    except QueueFullError as e:
+        logger.warning(f"Rejected job for topic: {topic} ({e})")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+    
+    logger.info(f"Queued job {job_id} for topic: {topic}")
+    
+    response = jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': 'pending',
+        'status_url': url_for('get_job_status', job_id=job_id),
+        'result_url': url_for('get_job_result', job_id=job_id)
+    })
+    response.status_code = 202
+    response.headers['Location'] = url_for('get_job_status', job_id=job_id)
+    return response
+
+@app.route('/api/jobs/<job_id>')
+def get_job_status(job_id):
+    """Report the current state of a queued analysis"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    return jsonify({'success': True, **job_status(job)})
+
+@app.route('/api/jobs/<job_id>/result')
+def get_job_result(job_id):
+    """Return the analysis result once the job has finished"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    if job['status'] == COMPLETED:
+        return jsonify(job['result'])
+    
+    if job['status'] == FAILED:
+        return jsonify(job['result'] or {
+            'success': False,
+            'error': job['error'],
+            'message': 'An error occurred during content analysis.'
+        }), 500
+    
+    # Still pending or running
+    return jsonify({'success': False, **job_status(job)}), 202
+
+@app.route('/api/history')
+def list_history():
+    """Past analyses, newest first, one page at a time"""
+    if history is None:
+        return jsonify({'success': False, 'error': 'History is disabled'}), 404
+    
+    cursor, limit, error_response = get_page_args()
+    if error_response:
+        return error_response
+    
+    items, next_cursor = history.list(cursor=cursor, limit=limit)
+    return jsonify({'success': True, 'items': items, 'next_cursor': next_cursor})
+
+@app.route('/api/history/search')
+def search_history():
+    """Past analyses whose topic or report matches every word of q, newest first"""
+    if history is None:
+        return jsonify({'success': False, 'error': 'History is disabled'}), 404
+    
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'success': False, 'error': 'Search query is required'}), 400
+    
+    cursor, limit, error_response = get_page_args()
+    if error_response:
+        return error_response
+    
+    items, next_cursor = history.search(query, cursor=cursor, limit=limit)
+    return jsonify({'success': True, 'items': items, 'next_cursor': next_cursor})
+
+@app.route('/api/history/stats')
+def history_stats():
+    """Stored analyses and their size on disk"""
+    if history is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **history.stats()})
+
+@app.route('/api/history/<int:analysis_id>')
+def get_history_item(analysis_id):
+    """One past analysis with its full report"""
+    item = history.get(analysis_id) if history is not None else None
+    if item is None:
+        return jsonify({'success': False, 'error': 'Analysis not found'}), 404
+    return jsonify({'success': True, **item})
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    """Hit/miss counters for the result cache (and the LLM response cache)"""
+    stats = {'enabled': app.config['CACHE_ENABLED'], **result_cache.stats()}
+    if semantic_index is not None:
+        stats['semantic'] = semantic_index.stats()
+    if report_store is not None:
+        stats['reports'] = report_store.stats()
+    # Only once the crew is loaded; asking for stats must not import it
+    if crew_stack.loaded and crew_stack.llm_cache is not None:
+        stats['llm'] = crew_stack.llm_cache.stats()
+    return jsonify(stats)
+
+@app.route('/api/admission/stats')
+def admission_stats():
+    """Running/waiting analyses and rejections since startup"""
+    return jsonify({
+        'rate_limit': app.config['RATE_LIMIT'],
+        'rate_limit_burst': rate_limiter.capacity,
+        **admission.stats()
+    })
+
+@app.route('/api/routing/stats')
+def routing_stats():
+    """Model route per agent role, with measured latency, tokens and escalations per model"""
+    # Only once the crew is loaded; asking for stats must not import it
+    if not crew_stack.loaded:
+        return jsonify({'loaded': False})
+    return jsonify({
+        'loaded': True,
+        'routes': crew_stack.crew_factory.routes,
+        'roles': crew_stack.route_stats.stats()
+    })
+
+@app.route('/metrics')
+def metrics():
+    """Latency histograms and counters in Prometheus text format"""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/health')
 def health_check():
-    """Health check endpoint"""
+    """Liveness: the process is up and answering (see /api/ready for readiness)"""
     return jsonify({
         'status': 'healthy',
         'message': 'CrewAI Content Analyzer is running'
     })
 
+@app.route('/api/ready')
+def readiness_check():
+    """Readiness: 503 while the CrewAI stack is still loading in the background"""
+    crew = crew_stack.status()
+    ready = crew_stack.loaded or app.config['CREW_LOAD'] != 'background'
+    return jsonify({
+        'status': 'ready' if ready else 'loading',
+        'crew': crew
+    }), 200 if ready else 503
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Endpoint not found'}), 404
@@ -0,0 +1,338 @@
+"""
+ASGI entry point for production deployment
+
+POST /api/analyze and GET /api/crew/stream run natively on asyncio, so an
+analysis waiting on the model holds a coroutine instead of a worker thread.
+Every other route is served by the Flask app through asgiref's WSGI adapter.
+
+Run with: uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import json
+import logging
+import time
+from contextlib import aclosing
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import (app as flask_app, aanalyze_topic, async_admission, crew_stages_html, encode_json, rate_limiter,
+                 record_history, sse_event, stream_json, streams_json, PIPELINE_VERSION, REPORT_SECTIONS,
+                 TRACE_ID_PATTERN)
+from cache import cache_key
+from crew_loader import crew_stack
+from deadline import DEADLINE, Cancelled, Deadline, budget_seconds
+from metrics import (FIRST_TOKEN_SECONDS, REQUEST_SECONDS, RESPONSE_BYTES, RESPONSE_UNCOMPRESSED_BYTES, new_trace_id,
+                     time_stage, trace_id)
+from ratelimit import OverloadedError
+
+logger = logging.getLogger(__name__)
+
+wsgi_app = WsgiToAsgi(flask_app)
+
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def send_json(send, payload, status=200, retry_after=None, scope=None, key=None):
+    """Send payload as JSON, compressed if the request in scope accepts it (see app.encode_json)
+
+    A long result is sent a chunk at a time, as in app.stream_json.
+    """
+    accept_encoding = get_header(scope, b'accept-encoding') if scope else ''
+    headers = [
+        (b'content-type', b'application/json'),
+        (b'access-control-allow-origin', b'*'),
+        (b'vary', b'Accept-Encoding'),
+        (b'x-request-id', trace_id.get().encode())
+    ]
+    if retry_after is not None:
+        headers.append((b'retry-after', str(retry_after).encode()))
+
+    if streams_json(payload):
+        chunks, encoding = stream_json(payload, accept_encoding)
+        if encoding != 'identity':
+            headers.append((b'content-encoding', encoding.encode()))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        for chunk in chunks:
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    with time_stage('serialize'):
+        body, encoding, uncompressed_size = encode_json(payload, accept_encoding, key)
+    headers.append((b'content-length', str(len(body)).encode()))
+    if encoding != 'identity':
+        headers.append((b'content-encoding', encoding.encode()))
+    RESPONSE_BYTES.inc(len(body), encoding=encoding)
+    RESPONSE_UNCOMPRESSED_BYTES.inc(uncompressed_size, encoding=encoding)
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': headers
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_busy_stream(send, error, status, retry_after):
+    """Send a rejection to an EventSource client, as in app.busy_stream"""
+    event = sse_event('error', {'success': False, 'error': error, 'status': status, 'retry_after': retry_after})
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'access-control-allow-origin', b'*'),
+            (b'retry-after', str(retry_after).encode()),
+            (b'x-request-id', trace_id.get().encode())
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': event.encode('utf-8')})
+
+
+def get_header(scope, name):
+    for header, value in scope['headers']:
+        if header == name:
+            return value.decode('latin-1')
+    return ''
+
+
+def get_deadline(scope, params=None):
+    """Deadline of this request's analysis, as in app.get_deadline; raises ValueError on a bad budget"""
+    value = get_header(scope, b'x-request-timeout') or (params or {}).get('timeout', [''])[0]
+    seconds = budget_seconds(value, flask_app.config['REQUEST_TIMEOUT'], flask_app.config['REQUEST_TIMEOUT_MAX'])
+    return Deadline(seconds) if seconds else None
+
+
+def get_client_id(scope):
+    """Address the rate limit applies to, as in app.get_client_id"""
+    if flask_app.config['RATE_LIMIT_TRUST_PROXY']:
+        for name, value in scope['headers']:
+            if name == b'x-forwarded-for':
+                return value.decode('latin-1').split(',')[0].strip()
+    client = scope.get('client')
+    return client[0] if client else 'unknown'
+
+
+async def reject_rate_limited(scope, send, stream=False):
+    """Send a 429 (as an SSE error event with stream) and return True if the client is over its rate limit"""
+    client = get_client_id(scope)
+    # The limiter may be SQLite-backed (RATE_LIMIT_DB), so keep it off the event loop
+    retry_after = await asyncio.to_thread(rate_limiter.check, client)
+    if not retry_after:
+        return False
+
+    logger.warning(f"Rate limited client {client} for {retry_after}s")
+    error = f"Rate limit exceeded ({flask_app.config['RATE_LIMIT']} analyses per minute)"
+    if stream:
+        await send_busy_stream(send, error, 429, retry_after)
+    else:
+        await send_json(send, {'success': False, 'error': error, 'retry_after': retry_after}, 429, retry_after)
+    return True
+
+
+async def analyze_content(scope, receive, send):
+    """Async twin of app.analyze_content"""
+    body = await read_body(receive)
+    with time_stage('parse'):
+        try:
+            data = json.loads(body or b'null')
+        except ValueError:
+            data = None
+
+    # Validate input
+    if not data or not isinstance(data, dict):
+        return await send_json(send, {'success': False, 'error': 'No data provided'}, 400)
+
+    topic = str(data.get('topic', '')).strip()
+
+    if not topic:
+        return await send_json(send, {'success': False, 'error': 'Topic is required'}, 400)
+
+    try:
+        deadline = get_deadline(scope)
+    except ValueError as e:
+        return await send_json(send, {'success': False, 'error': str(e)}, 400)
+
+    if await reject_rate_limited(scope, send):
+        return
+
+    use_cache = flask_app.config['CACHE_ENABLED'] and not data.get('no_cache')
+    # Bypassing the cache regenerates every stored report section too
+    refresh = tuple(REPORT_SECTIONS) if data.get('no_cache') else ()
+    output_format = data.get('format') if data.get('format') in ('html', 'json') else 'html'
+
+    logger.info(f"Starting analysis for topic: {topic}")
+
+    try:
+        # Not cancelled on disconnect: the run may be shared with other requests for the topic
+        result = await aanalyze_topic(
+            topic, use_cache=use_cache, deadline=deadline, output_format=output_format, refresh=refresh
+        )
+    except OverloadedError as e:
+        logger.warning(f"Rejected analysis for topic: {topic} ({e})")
+        return await send_json(send, {'success': False, 'error': str(e), 'retry_after': e.retry_after},
+                               503, e.retry_after)
+
+    if result['success']:
+        logger.info("Analysis completed successfully")
+        key = cache_key(topic, pipeline=PIPELINE_VERSION, output_format=output_format)
+        return await send_json(send, result, scope=scope, key=key)
+
+    if result.get('reason') == DEADLINE:
+        logger.warning(f"Analysis ran out of time: {result.get('error')}")
+        return await send_json(send, result, 504, scope=scope)
+
+    logger.error(f"Analysis failed: {result.get('error', 'Unknown error')}")
+    return await send_json(send, result, 500, scope=scope)
+
+
+async def stream_crew(scope, receive, send):
+    """Async twin of app.stream_crew, streaming from ChatGoogleGenerativeAI.astream()"""
+    params = parse_qs(scope['query_string'].decode('latin-1'))
+    topic = params.get('topic', [''])[0].strip()
+
+    if not topic:
+        return await send_json(send, {'success': False, 'error': 'Topic is required'}, 400)
+
+    try:
+        deadline = get_deadline(scope, params)
+    except ValueError as e:
+        return await send_json(send, {'success': False, 'error': str(e)}, 400)
+
+    if await reject_rate_limited(scope, send, stream=True):
+        return
+
+    try:
+        started = await async_admission.acquire()
+    except OverloadedError as e:
+        logger.warning(f"Rejected streamed crew analysis for topic: {topic} ({e})")
+        return await send_busy_stream(send, str(e), 503, e.retry_after)
+
+    logger.info(f"Starting streamed crew analysis for topic: {topic}")
+    request_start = time.perf_counter()
+
+    async def send_event(event, data):
+        await send({'type': 'http.response.body', 'body': sse_event(event, data).encode('utf-8'),
+                    'more_body': True})
+
+    async def relay():
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+                (b'access-control-allow-origin', b'*'),
+                (b'x-request-id', trace_id.get().encode())
+            ]
+        })
+        first_token = True
+        stages = []
+        try:
+            # Each send waits for the transport, so a slow client slows the model stream
+            async with aclosing(crew_stack.astream_content_analysis(topic, deadline=deadline)) as events:
+                async for kind, stage, text in events:
+                    if kind == 'token':
+                        if first_token:
+                            FIRST_TOKEN_SECONDS.observe(time.perf_counter() - request_start, endpoint='crew')
+                            first_token = False
+                        await send_event('token', {'stage': stage, 'text': text})
+                    else:
+                        stages.append((stage, text))
+                        await send_event('stage', {'stage': stage, 'output': text})
+
+            record_history(topic, {'success': True, 'result': crew_stages_html(stages)})
+            logger.info("Streamed crew analysis completed successfully")
+            await send_event('done', {'success': True, 'message': 'Deep analysis completed successfully!'})
+        except Cancelled as e:
+            logger.warning(f"Streamed crew analysis stopped after {len(stages)} stages ({e.reason})")
+            await send_event('done', {
+                'success': bool(stages),
+                'partial': True,
+                'reason': e.reason,
+                'message': f'{e}; the analysis is incomplete.'
+            })
+        except Exception as e:
+            logger.error(f"Streamed crew analysis failed: {str(e)}")
+            await send_event('error', {
+                'success': False,
+                'error': str(e),
+                'message': 'An error occurred during content analysis.'
+            })
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def wait_for_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    # Stop generating as soon as the client goes away
+    streaming = asyncio.ensure_future(relay())
+    disconnected = asyncio.ensure_future(wait_for_disconnect())
+    try:
+        await asyncio.wait({streaming, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+        if disconnected.done():
+            logger.info(f"Client disconnected from streamed crew analysis for topic: {topic}")
+    finally:
+        streaming.cancel()
+        disconnected.cancel()
+        async_admission.release(started)
+
+    # The response has started, so a failed send can only be logged
+    if streaming.done() and not streaming.cancelled() and streaming.exception():
+        logger.warning(f"Streamed crew analysis ended early: {streaming.exception()}")
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+# Routes handled natively; everything else goes to Flask
+ASYNC_ROUTES = {
+    ('POST', '/api/analyze'): analyze_content,
+    ('GET', '/api/crew/stream'): stream_crew
+}
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(scope, receive, send)
+
+    if scope['type'] == 'http':
+        handler = ASYNC_ROUTES.get((scope['method'], scope['path']))
+        if handler:
+            # Same trace ID and latency bookkeeping as app.start_trace/finish_trace
+            incoming = dict(scope['headers']).get(b'x-request-id', b'').decode('latin-1')
+            trace_id.set(incoming if TRACE_ID_PATTERN.match(incoming) else new_trace_id())
+            start = time.perf_counter()
+            status = []
+
+            async def send_and_record(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                await send(message)
+
+            try:
+                return await handler(scope, receive, send_and_record)
+            except Exception as e:
+                logger.error(f"Unexpected error: {str(e)}")
+                return await send_json(send_and_record, {'success': False, 'error': f'Server error: {str(e)}'}, 500)
+            finally:
+                REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=scope['path'],
+                                        method=scope['method'], status=status[0] if status else 500)
+
+    await wsgi_app(scope, receive, send)
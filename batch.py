@@ -0,0 +1,100 @@
+"""
+Batch analysis of many topics with bounded parallelism
+"""
+import contextvars
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from functools import partial
+
+from cache import normalize_topic
+
+
+def dedupe_topics(topics):
+    """Group topics by normalized form, keeping first-seen order
+
+    Returns a list of (topic, indices) where indices are the positions in the
+    input that the topic answers for.
+    """
+    groups = {}
+    for index, topic in enumerate(topics):
+        topic = topic.strip()
+        if not topic:
+            continue
+        key = normalize_topic(topic)
+        if key in groups:
+            groups[key][1].append(index)
+        else:
+            groups[key] = (topic, [index])
+    return list(groups.values())
+
+
+def _timed(runner, topic, options):
+    start = time.perf_counter()
+    try:
+        result = runner(topic, **options)
+    except Exception as e:
+        result = {'success': False, 'error': str(e)}
+    return result, time.perf_counter() - start
+
+
+def _in_process(processes, runner, topic, **options):
+    return processes.submit(runner, topic, **options).result()
+
+
+def iter_batch(topics, runner, max_workers=4, use_processes=False, admission=None, **options):
+    """Run runner over the unique topics and yield a record as each one finishes
+
+    At most max_workers analyses run at once. With use_processes the runner
+    (and its results) must be picklable, e.g. a module-level function.
+    With admission (a ratelimit.AdmissionController), each analysis takes
+    one of its slots, so batches share the cap on analyses running at once;
+    a topic that gets no slot in time fails. Extra keyword arguments are
+    passed through to the runner.
+    """
+    groups = dedupe_topics(topics)
+    if not groups:
+        return
+
+    workers = min(max_workers, len(groups))
+    with ExitStack() as stack:
+        run = runner
+        if use_processes:
+            # A thread waits on each process, holding its admission slot
+            processes = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+            run = partial(_in_process, processes, runner)
+        if admission is not None:
+            run = admission.wrap(run)
+
+        pool = stack.enter_context(ThreadPoolExecutor(max_workers=workers))
+        # Threads run in a copy of the caller's context, e.g. its trace ID
+        futures = {
+            pool.submit(contextvars.copy_context().run, _timed, run, topic, options): (topic, indices)
+            for topic, indices in groups
+        }
+
+        for future in as_completed(futures):
+            topic, indices = futures[future]
+            try:
+                result, duration = future.result()
+            except Exception as e:
+                # _timed turns runner errors (and a dead worker process) into results already
+                result, duration = {'success': False, 'error': str(e)}, 0.0
+
+            record = {
+                'topic': topic,
+                'indices': indices,
+                'status': 'completed' if result.get('success') else 'failed',
+                'duration_ms': round(duration * 1000, 1)
+            }
+            if result.get('success'):
+                record['result'] = result['result']
+            else:
+                record['error'] = result.get('error', 'Unknown error')
+            yield record
+
+
+def run_batch(topics, runner, max_workers=4, use_processes=False, admission=None, **options):
+    """Run a batch and return the records in input order"""
+    records = list(iter_batch(topics, runner, max_workers, use_processes, admission, **options))
+    return sorted(records, key=lambda record: record['indices'][0])
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the content analysis pipeline
+
+Run from the project root, e.g. python -m benchmarks.bench_crew_construction
+"""
@@ -0,0 +1,59 @@
+"""
+Topic classification throughput: the old linear keyword scan vs. TopicClassifier
+"""
+import argparse
+import random
+import time
+
+from classifier import TopicClassifier
+
+# The keyword lists generate_dynamic_analysis scanned before the classifier
+LEGACY_CATEGORIES = [
+    ('technology', ['AI', 'artificial intelligence', 'machine learning', 'technology', 'software', 'digital', 'automation', 'blockchain', 'IoT']),
+    ('business', ['business', 'marketing', 'strategy', 'management', 'finance', 'startup', 'entrepreneurship', 'sales']),
+    ('healthcare', ['health', 'medical', 'healthcare', 'medicine', 'wellness', 'fitness', 'therapy']),
+    ('education', ['education', 'learning', 'training', 'teaching', 'academic', 'university', 'school'])
+]
+
+WORDS = [
+    'artificial intelligence', 'healthcare', 'remote work', 'renewable energy', 'marketing',
+    'small businesses', 'climate change', 'agriculture', 'machine learning', 'online schools',
+    'cybersecurity', 'supply chain', 'maintenance', 'fitness', 'blockchain', 'urban planning'
+]
+
+
+def legacy_classify(topic):
+    topic_lower = topic.lower()
+    for category, keywords in LEGACY_CATEGORIES:
+        if any(keyword in topic_lower for keyword in keywords):
+            return category
+    return 'general'
+
+
+def make_topics(count, seed=42):
+    rng = random.Random(seed)
+    return [' '.join(rng.sample(WORDS, 2)).title() for _ in range(count)]
+
+
+def measure(label, classify_all, topics):
+    start = time.perf_counter()
+    classify_all(topics)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {len(topics) / elapsed:12,.0f} topics/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--topics', type=int, default=100000)
+    args = parser.parse_args()
+
+    topics = make_topics(args.topics)
+    classifier = TopicClassifier.from_file()
+
+    measure('linear scan', lambda items: [legacy_classify(t) for t in items], topics)
+    measure('TopicClassifier', classifier.classify_many, topics)
+
+
+if __name__ == "__main__":
+    main()
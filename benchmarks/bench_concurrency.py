@@ -0,0 +1,95 @@
+"""
+Concurrent-request capacity of a running server
+
+Fires many simultaneous POST /api/analyze requests (unique topics, cache
+bypassed) and reports throughput and latency. All requests come from one
+client, so start the server without the rate limit and with admission
+limits above the concurrency, or most of them are rejected with 429/503.
+Without the report store, a rerun doesn't reuse the sections of the last:
+
+    export RATE_LIMIT=0 MAX_RUNNING_ANALYSES=1000 MAX_WAITING_ANALYSES=1000
+    export REPORT_STORE_ENABLED=false HISTORY_ENABLED=false
+    gunicorn --bind 127.0.0.1:5000 --workers 4 wsgi:app
+    uvicorn asgi:app --host 127.0.0.1 --port 5000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def post_json(host, port, path, payload, timeout):
+    """Minimal HTTP/1.1 POST so the benchmark needs no client library"""
+    body = json.dumps(payload).encode('utf-8')
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(
+            f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+        return int(response.split(b' ', 2)[1])
+    finally:
+        writer.close()
+
+
+async def run_load(url, concurrency, total, timeout):
+    parts = urlsplit(url)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+    rejected = 0
+
+    async def one(index):
+        nonlocal errors, rejected
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                status = await post_json(parts.hostname, parts.port or 80, parts.path or '/api/analyze',
+                                         {'topic': f'Load test topic {index}', 'no_cache': True}, timeout)
+                if status == 200:
+                    latencies.append(time.perf_counter() - start)
+                elif status in (429, 503):
+                    rejected += 1
+                else:
+                    errors += 1
+            except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return time.perf_counter() - start, latencies, errors, rejected
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:5000/api/analyze')
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+
+    elapsed, latencies, errors, rejected = asyncio.run(
+        run_load(args.url, args.concurrency, args.requests, args.timeout)
+    )
+
+    print(f"requests     {len(latencies)} ok, {rejected} rejected, {errors} failed in {elapsed:.2f}s")
+    if rejected:
+        print("             rejected by the server's limits; start it with RATE_LIMIT=0 and "
+              "MAX_RUNNING_ANALYSES/MAX_WAITING_ANALYSES above --concurrency")
+    print(f"throughput   {len(latencies) / elapsed:.1f} req/s")
+    if latencies:
+        print(f"latency      p50 {statistics.median(latencies):.2f}s   "
+              f"p95 {percentile(latencies, 0.95):.2f}s   max {max(latencies):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Per-request crew construction cost: rebuilding everything vs. the shared CrewFactory
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+# Construction never calls the API, but the client refuses to build without a key
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder-key")
+
+from crewai import Crew, Process
+
+from crew_agent import CrewFactory, create_agents, create_llm, create_tasks
+
+TOPIC = "Artificial Intelligence in Healthcare"
+
+
+def build_from_scratch(topic):
+    """What create_content_crew did before: new client, agents and tasks every call"""
+    agents = create_agents(create_llm())
+    return Crew(
+        agents=list(agents),
+        tasks=create_tasks(topic, agents),
+        verbose=True,
+        process=Process.sequential
+    )
+
+
+def measure(label, build, iterations):
+    build(TOPIC)  # Warm imports and lazy module state
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        build(TOPIC)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label:<16} {elapsed / iterations * 1000:8.2f} ms/crew   peak alloc {peak / 1024:8.1f} KiB")
+    return elapsed / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    factory = CrewFactory()
+
+    before = measure('from scratch', build_from_scratch, args.iterations)
+    after = measure('crew factory', factory.create_crew, args.iterations)
+
+    print(f"speedup          {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
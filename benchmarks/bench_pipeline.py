@@ -0,0 +1,204 @@
+"""
+Offline load test of /api/analyze with the LLM replaced by an in-process stub
+
+Starts gunicorn on benchmarks.stub_app, fires scripted load at
+/api/analyze, and reports latency percentiles, throughput and the peak
+memory of each worker. Results are written as JSON; pass an earlier
+result file as --baseline to see what changed. Needs no network or API key.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from datetime import datetime
+
+from benchmarks.bench_concurrency import percentile, run_load
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+def start_server(args):
+    env = dict(
+        os.environ,
+        BENCH_PIPELINE=args.pipeline,
+        CREW_PIPELINE_MODE=args.crew_mode,
+        BENCH_LLM_LATENCY=str(args.llm_latency),
+        BENCH_LLM_JITTER=str(args.llm_jitter),
+        BENCH_OUTPUT_TOKENS=str(args.output_tokens),
+        MAX_RUNNING_ANALYSES=str(args.threads),
+        MAX_WAITING_ANALYSES=str(args.concurrency),
+        ADMISSION_TIMEOUT='600',
+        CACHE_DB_PATH=''
+    )
+    command = [
+        sys.executable, '-m', 'gunicorn', 'benchmarks.stub_app:app',
+        '--bind', f'127.0.0.1:{args.port}',
+        '--workers', str(args.workers),
+        '--threads', str(args.threads),
+        '--timeout', '600'
+    ]
+    # CrewAI's verbose agents are loud; keep their output out of the report
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until_healthy(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health', timeout=1):
+                return
+        except OSError:
+            time.sleep(0.25)
+    raise RuntimeError(f'Server did not become healthy within {timeout}s')
+
+
+def worker_rss(master_pid):
+    """Resident memory in MiB of each child of the gunicorn master, by PID"""
+    output = subprocess.run(['ps', '-A', '-o', 'pid=,ppid=,rss='], capture_output=True, text=True).stdout
+    usage = {}
+    for line in output.splitlines():
+        pid, ppid, rss = (int(field) for field in line.split())
+        if ppid == master_pid:
+            usage[pid] = rss / 1024
+    return usage
+
+
+class MemorySampler(threading.Thread):
+    """Tracks the peak RSS of every worker while the load runs"""
+
+    def __init__(self, master_pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.master_pid = master_pid
+        self.interval = interval
+        self.peaks = {}
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            for pid, rss in worker_rss(self.master_pid).items():
+                self.peaks[pid] = max(rss, self.peaks.get(pid, 0))
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(elapsed, latencies, errors, rejected, peaks):
+    latencies_ms = [latency * 1000 for latency in latencies]
+    rss = list(peaks.values())
+    return {
+        'requests': len(latencies) + errors + rejected,
+        'ok': len(latencies),
+        'rejected': rejected,
+        'failed': errors,
+        'duration_s': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'mean': round(statistics.fmean(latencies_ms), 1) if latencies_ms else 0.0,
+            'p50': round(percentile(latencies_ms, 0.50), 1),
+            'p95': round(percentile(latencies_ms, 0.95), 1),
+            'p99': round(percentile(latencies_ms, 0.99), 1),
+            'max': round(max(latencies_ms), 1) if latencies_ms else 0.0
+        },
+        'worker_rss_mib': {
+            'per_worker': [round(value, 1) for value in sorted(rss)],
+            'mean': round(statistics.fmean(rss), 1) if rss else 0.0,
+            'max': round(max(rss), 1) if rss else 0.0
+        }
+    }
+
+
+def print_report(results, baseline=None):
+    """Print the headline numbers, with the change against a baseline if given"""
+    rows = [
+        ('throughput', 'req/s', lambda r: r['rps']),
+        ('latency p50', 'ms', lambda r: r['latency_ms']['p50']),
+        ('latency p95', 'ms', lambda r: r['latency_ms']['p95']),
+        ('latency p99', 'ms', lambda r: r['latency_ms']['p99']),
+        ('worker rss', 'MiB', lambda r: r['worker_rss_mib']['mean'])
+    ]
+    print(f"requests      {results['ok']} ok, {results.get('rejected', 0)} rejected, {results['failed']} failed "
+          f"in {results['duration_s']:.2f}s")
+    for label, unit, value in rows:
+        line = f"{label:<13} {value(results):10.1f} {unit}"
+        if baseline and value(baseline):
+            change = (value(results) - value(baseline)) / value(baseline) * 100
+            line += f"   ({change:+.1f}% vs {value(baseline):.1f})"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pipeline', choices=['crew', 'simulated'], default='crew')
+    parser.add_argument('--crew-mode', choices=['sequential', 'fanout'], default='sequential')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=4)
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='seconds per stub LLM call')
+    parser.add_argument('--llm-jitter', type=float, default=0.05)
+    parser.add_argument('--output-tokens', type=int, default=300)
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--output', help='result file (default: benchmarks/results/pipeline-<pipeline>-<time>.json)')
+    parser.add_argument('--baseline', help='earlier result file to compare against')
+    args = parser.parse_args()
+
+    server = start_server(args)
+    url = f'http://127.0.0.1:{args.port}/api/analyze'
+    try:
+        wait_until_healthy(args.port)
+        asyncio.run(run_load(url, args.warmup, args.warmup, timeout=600))
+
+        sampler = MemorySampler(server.pid)
+        sampler.start()
+        elapsed, latencies, errors, rejected = asyncio.run(
+            run_load(url, args.concurrency, args.requests, timeout=600)
+        )
+        sampler.stop()
+    finally:
+        server.terminate()
+        server.wait()
+
+    results = {
+        'benchmark': 'pipeline',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'settings': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline', 'port')},
+        'results': summarize(elapsed, latencies, errors, rejected, sampler.peaks)
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+    print_report(results['results'], baseline)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"pipeline-{args.pipeline}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"results       {output}")
+
+
+if __name__ == "__main__":
+    main()
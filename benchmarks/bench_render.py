@@ -0,0 +1,53 @@
+"""
+Per-render CPU time and allocations for the analysis report
+"""
+import argparse
+import time
+import tracemalloc
+
+from report import build_report_context, render_report, report_json
+
+TOPICS = [
+    ('technology', 'Artificial Intelligence in Healthcare'),
+    ('business', 'Social Media Marketing Strategies'),
+    ('education', 'Online Schools'),
+    ('general', 'Climate Change Impact on Agriculture')
+]
+
+
+def render_html(category, topic):
+    return render_report(topic, build_report_context(category))
+
+
+def render_json(category, topic):
+    return report_json(topic, build_report_context(category))
+
+
+def measure(label, render, iterations):
+    for category, topic in TOPICS:
+        render(category, topic)  # Warm template and skeleton caches
+
+    start = time.process_time()
+    for i in range(iterations):
+        render(*TOPICS[i % len(TOPICS)])
+    cpu = (time.process_time() - start) / iterations
+
+    tracemalloc.start()
+    render(*TOPICS[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label:<8} {cpu * 1e6:8.1f} us CPU/render   peak alloc {peak / 1024:6.1f} KiB/render")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    measure('html', render_html, args.iterations)
+    measure('json', render_json, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Semantic cache: lookup throughput and the topic pairs it must (not) treat as the same
+
+The pairs are regressions: each DISTINCT pair once matched with similarity
+1.0, so one topic was answered with the other's report. The script exits
+non-zero if any pair is judged wrongly.
+"""
+import argparse
+import random
+import sys
+import time
+
+from semantic_cache import SemanticIndex
+
+SETTINGS = {'pipeline': 'bench'}
+
+# Topics that must share a report
+SAME = [
+    ('AI in healthcare', 'Artificial Intelligence in Healthcare'),
+    ('Healthcare AI', 'AI in healthcare'),
+    ('Electric vehicles', 'EVs'),
+]
+
+# Topics that must not
+DISTINCT = [
+    ('AI в медицине', 'AI в образовании'),
+    ('AI 医疗', 'AI 教育'),
+    ('C++', 'C#'),
+    ('F# vs C#', 'C vs F'),
+    ('.NET performance', 'NET performance'),
+    ('Pricing at $100', 'Pricing at 100'),
+]
+
+WORDS = [
+    'artificial intelligence', 'healthcare', 'remote work', 'renewable energy', 'marketing',
+    'small businesses', 'climate change', 'agriculture', 'machine learning', 'online schools',
+    'cybersecurity', 'supply chain', 'maintenance', 'fitness', 'blockchain', 'urban planning'
+]
+
+
+def check_pairs():
+    """Names of the pairs judged wrongly"""
+    wrong = []
+    for expected, pairs in ((True, SAME), (False, DISTINCT)):
+        for stored, asked in pairs:
+            index = SemanticIndex(capacity=4)
+            index.add(stored, SETTINGS)
+            match = index.lookup(asked, SETTINGS)
+            if (match is not None) != expected:
+                wrong.append(f"{stored!r} / {asked!r}: {'no match' if match is None else f'similarity {match[1]:.3f}'}")
+    return wrong
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--topics', type=int, default=10000)
+    parser.add_argument('--lookups', type=int, default=1000)
+    args = parser.parse_args()
+
+    wrong = check_pairs()
+    print(f"pairs        {len(SAME) + len(DISTINCT) - len(wrong)} of {len(SAME) + len(DISTINCT)} judged right")
+    for pair in wrong:
+        print(f"  wrong      {pair}")
+
+    rng = random.Random(42)
+    index = SemanticIndex(capacity=args.topics)
+    for number in range(args.topics):
+        index.add(f"{' '.join(rng.sample(WORDS, 2))} {number}", SETTINGS)
+    start = time.perf_counter()
+    for _ in range(args.lookups):
+        index.lookup(' '.join(rng.sample(WORDS, 2)), SETTINGS)
+    elapsed = time.perf_counter() - start
+    print(f"lookups      {elapsed / args.lookups * 1e6:.0f} us each over {args.topics} topics")
+
+    sys.exit(1 if wrong else 0)
+
+
+if __name__ == "__main__":
+    main()
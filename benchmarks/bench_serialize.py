@@ -0,0 +1,75 @@
+"""
+Per-request peak memory of sending a large analysis result from /api/analyze
+
+Runs requests in-process through the Flask test client, with the analysis
+replaced by a prebuilt result of the given size, and reads the body a
+chunk at a time as a client would. tracemalloc's peak per request is
+what serialization and compression added on top of the result itself,
+with the whole body serialized at once (buffered) and with chunked JSON
+(streamed, see app.stream_json).
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+# The app's stores must not touch the working directory
+os.environ.setdefault('RATE_LIMIT', '0')
+os.environ.setdefault('HISTORY_ENABLED', 'false')
+os.environ.setdefault('REPORT_STORE_ENABLED', 'false')
+os.environ.setdefault('CACHE_DB_PATH', '')
+os.environ.setdefault('CREW_CHECKPOINT_DB', os.path.join(tempfile.gettempdir(), 'bench-checkpoints.db'))
+
+import app as web
+from compression import available_encodings
+
+WORD = 'analysis '
+
+
+def make_result(size):
+    return {
+        'success': True,
+        'result': (WORD * (size // len(WORD) + 1))[:size],
+        'message': 'Content analysis completed successfully!'
+    }
+
+
+def measure(client, label, encoding, iterations):
+    """Mean seconds and peak traced bytes per request"""
+    headers = {'Accept-Encoding': encoding}
+    peaks = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        tracemalloc.start()
+        response = client.post('/api/analyze', json={'topic': 'benchmark'}, headers=headers, buffered=False)
+        received = sum(len(chunk) for chunk in response.response)
+        response.close()
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    elapsed = (time.perf_counter() - start) / iterations
+
+    print(f"{label:<9} {encoding:<9} {elapsed * 1000:8.1f} ms/request   peak {max(peaks) / 2 ** 20:7.2f} MiB/request"
+          f"   body {received / 2 ** 20:6.2f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='100000,1000000,5000000', help='result sizes in characters')
+    parser.add_argument('--iterations', type=int, default=5)
+    args = parser.parse_args()
+
+    client = web.app.test_client()
+    for size in (int(size) for size in args.sizes.split(',')):
+        # Built once, outside the traced requests
+        result = make_result(size)
+        web.admitted_analyze_topic = lambda topic, **options: result
+        print(f"result of {size / 2 ** 20:.2f} MiB")
+        for label, min_size in (('buffered', 0), ('streamed', 1)):
+            web.app.config['JSON_STREAM_MIN_SIZE'] = min_size
+            for encoding in ('identity', *available_encodings()):
+                measure(client, label, encoding, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Cold start and per-worker memory with and without the gunicorn.conf.py serving profile
+
+Starts gunicorn on benchmarks.stub_app (the CrewAI pipeline on the
+offline stub LLM) once plain and once with the profile (preload,
+copy-on-write friendly imports, per-worker warm-up). For each it reports:
+
+- the time from launch until the server answers
+- the latency of the first analyses, one or more per worker
+- the RSS and PSS of each process
+
+PSS splits each shared page between the processes sharing it, so the PSS
+total is what the server really costs in memory. Linux only.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.bench_concurrency import run_load
+from benchmarks.bench_pipeline import RESULTS_DIR, git_commit, wait_until_healthy
+
+PROFILE_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gunicorn.conf.py')
+
+
+def start_server(args, profile):
+    env = dict(
+        os.environ,
+        BENCH_PIPELINE='crew',
+        BENCH_LLM_LATENCY=str(args.llm_latency),
+        CACHE_DB_PATH='',
+        MAX_WAITING_ANALYSES=str(args.workers * args.threads)
+    )
+    command = [
+        sys.executable, '-m', 'gunicorn', 'benchmarks.stub_app:app',
+        # An empty config keeps gunicorn from picking up gunicorn.conf.py on its own
+        '--config', PROFILE_CONFIG if profile else os.devnull,
+        '--bind', f'127.0.0.1:{args.port}',
+        '--workers', str(args.workers),
+        '--threads', str(args.threads),
+        '--timeout', '600'
+    ]
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def process_memory(pid):
+    """(rss, pss) of a process in MiB"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            if name in ('Rss', 'Pss'):
+                fields[name] = int(value.split()[0]) / 1024
+    return fields['Rss'], fields['Pss']
+
+
+def worker_pids(master_pid):
+    output = subprocess.run(['ps', '-A', '-o', 'pid=,ppid='], capture_output=True, text=True).stdout
+    return [int(pid) for pid, ppid in (line.split() for line in output.splitlines()) if int(ppid) == master_pid]
+
+
+def measure(args, profile):
+    launched = time.perf_counter()
+    server = start_server(args, profile)
+    try:
+        wait_until_healthy(args.port, timeout=120)
+        ready = time.perf_counter() - launched
+
+        # Fresh topics, so every request runs the crew on a worker that has served nothing yet
+        url = f'http://127.0.0.1:{args.port}/api/analyze'
+        first = args.workers * args.first_per_worker
+        _, latencies, errors = asyncio.run(run_load(url, first, first, timeout=600))
+
+        memory = {pid: process_memory(pid) for pid in worker_pids(server.pid)}
+        master = process_memory(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies_ms = [latency * 1000 for latency in latencies]
+    return {
+        'ready_s': round(ready, 2),
+        'first_requests': {
+            'ok': len(latencies),
+            'failed': errors,
+            'p50_ms': round(statistics.median(latencies_ms), 1) if latencies_ms else 0.0,
+            'max_ms': round(max(latencies_ms), 1) if latencies_ms else 0.0
+        },
+        'worker_rss_mib': [round(rss, 1) for rss, _ in memory.values()],
+        'worker_pss_mib': [round(pss, 1) for _, pss in memory.values()],
+        'master_rss_mib': round(master[0], 1),
+        'total_pss_mib': round(master[1] + sum(pss for _, pss in memory.values()), 1)
+    }
+
+
+def print_report(results):
+    rows = [
+        ('ready', 's', lambda r: r['ready_s']),
+        ('first p50', 'ms', lambda r: r['first_requests']['p50_ms']),
+        ('first max', 'ms', lambda r: r['first_requests']['max_ms']),
+        ('worker rss', 'MiB', lambda r: statistics.fmean(r['worker_rss_mib'] or [0])),
+        ('worker pss', 'MiB', lambda r: statistics.fmean(r['worker_pss_mib'] or [0])),
+        ('total pss', 'MiB', lambda r: r['total_pss_mib'])
+    ]
+    print(f"{'':<13} {'plain':>10} {'profile':>10}")
+    for label, unit, value in rows:
+        print(f"{label:<13} {value(results['plain']):10.1f} {value(results['profile']):10.1f} {unit}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--first-per-worker', type=int, default=2, help='first analyses sent per worker')
+    parser.add_argument('--llm-latency', type=float, default=0.05, help='seconds per stub LLM call')
+    parser.add_argument('--port', type=int, default=5098)
+    parser.add_argument('--output', help='result file (default: benchmarks/results/startup-<time>.json)')
+    args = parser.parse_args()
+
+    results = {
+        'benchmark': 'startup',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'settings': {key: value for key, value in vars(args).items() if key not in ('output', 'port')},
+        'plain': measure(args, profile=False),
+        'profile': measure(args, profile=True)
+    }
+    print_report(results)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"startup-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"results       {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+The web app with its analysis backed by StubLLM, served by bench_pipeline
+
+Configured through environment variables:
+
+    BENCH_PIPELINE       crew (CrewAI agents on the stub) or simulated (app.py's built-in pipeline)
+    BENCH_LLM_LATENCY    seconds per LLM call (per whole analysis for simulated)
+    BENCH_LLM_JITTER     +/- seconds of random jitter per call
+    BENCH_OUTPUT_TOKENS  tokens per LLM answer
+
+Run with: gunicorn benchmarks.stub_app:app
+"""
+import os
+import tempfile
+
+# Nothing may leave the machine, and load tests must not be rate limited
+os.environ.setdefault('CREWAI_DISABLE_TELEMETRY', 'true')
+os.environ.setdefault('OTEL_SDK_DISABLED', 'true')
+os.environ.setdefault('RATE_LIMIT', '0')
+os.environ.setdefault('HISTORY_DB_PATH', os.path.join(tempfile.gettempdir(), 'bench-history.db'))
+os.environ.setdefault('CREW_CHECKPOINT_DB', os.path.join(tempfile.gettempdir(), 'bench-checkpoints.db'))
+# Every call should reach the stub, so its latency is what gets measured
+os.environ.setdefault('LLM_CACHE_DB', '')
+# Measure generation, not sections reused from an earlier run
+os.environ.setdefault('REPORT_STORE_ENABLED', 'false')
+
+import app as web
+from cache import cached_runner
+
+PIPELINE = os.environ.get('BENCH_PIPELINE') or 'crew'
+LATENCY = float(os.environ.get('BENCH_LLM_LATENCY') or 0.5)
+JITTER = float(os.environ.get('BENCH_LLM_JITTER') or 0)
+OUTPUT_TOKENS = int(os.environ.get('BENCH_OUTPUT_TOKENS') or 300)
+
+if PIPELINE == 'crew':
+    import crew_agent
+    from benchmarks.stub_llm import StubLLM
+
+    crew_agent.crew_factory.use_llm(StubLLM(latency=LATENCY, jitter=JITTER, output_tokens=OUTPUT_TOKENS))
+
+    def run_crew_analysis(topic, output_format='html', deadline=None, refresh=()):
+        return crew_agent.run_content_analysis(topic, deadline=deadline)
+
+    # Same route, cache and admission control; only the runner changes
+    web.admitted_analyze_topic = cached_runner(
+        web.result_cache,
+        web.recorded(web.admission.wrap(run_crew_analysis)),
+        flights=web.flights,
+        semantic=web.semantic_index,
+        pipeline=f'crew-{crew_agent.PIPELINE_VERSION}'
+    )
+else:
+    web.SIMULATED_PROCESSING_TIME = LATENCY
+
+app = web.app
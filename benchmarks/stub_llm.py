@@ -0,0 +1,81 @@
+"""
+In-process stand-in for the Gemini client, for benchmarks that must run offline
+"""
+import asyncio
+import random
+import time
+
+from crewai.events import crewai_event_bus, LLMCallStartedEvent, LLMCallCompletedEvent, LLMStreamChunkEvent
+from crewai.events.types.llm_events import LLMCallType
+from crewai.llms.base_llm import BaseLLM
+
+WORDS = ('analysis', 'market', 'growth', 'adoption', 'strategy', 'insight', 'platform', 'risk',
+         'customer', 'innovation', 'regulation', 'efficiency', 'data', 'outlook', 'trend', 'value')
+
+
+class StubMessage:
+    """The parts of a LangChain AIMessage that crew_agent reads"""
+
+    def __init__(self, content, usage_metadata):
+        self.content = content
+        self.usage_metadata = usage_metadata
+
+
+class StubLLM(BaseLLM):
+    """Sleeps for a configurable latency and answers with a fixed number of tokens
+
+    Works for both pipelines in crew_agent: Crew.kickoff() calls call(), and
+    arun_content_analysis awaits ainvoke(). Each word counts as one token.
+    With stream set (as iter_content_events does), the latency is spread
+    over the tokens, which are emitted as stream chunk events.
+    """
+
+    def __init__(self, latency=0.5, jitter=0.0, output_tokens=300, model='stub-gemini'):
+        super().__init__(model=model, temperature=0.0)
+        self.latency = latency
+        self.jitter = jitter
+        self.output_tokens = output_tokens
+        self.stream = False
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None):
+        context = {'from_task': from_task, 'from_agent': from_agent}
+        crewai_event_bus.emit(self, LLMCallStartedEvent(model=self.model, messages=messages, **context))
+
+        # CrewAI agents parse the ReAct format, so finish the way a real model would
+        response = f"Thought: I now can give a great answer\nFinal Answer: {self._text()}"
+        if self.stream:
+            chunks = [word + ' ' for word in response.split(' ')]
+            delay = self._delay() / len(chunks)
+            for chunk in chunks:
+                time.sleep(delay)
+                crewai_event_bus.emit(self, LLMStreamChunkEvent(chunk=chunk, **context))
+        else:
+            time.sleep(self._delay())
+
+        crewai_event_bus.emit(self, LLMCallCompletedEvent(
+            model=self.model, messages=messages, response=response,
+            call_type=LLMCallType.LLM_CALL, **context
+        ))
+        return response
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(self._delay())
+        prompt_tokens = sum(len(str(content).split()) for _, content in messages)
+        return StubMessage(self._text(), {
+            'input_tokens': prompt_tokens,
+            'output_tokens': self.output_tokens,
+            'total_tokens': prompt_tokens + self.output_tokens
+        })
+
+    async def astream(self, messages):
+        delay = self._delay() / max(1, self.output_tokens)
+        for word in self._text().split(' '):
+            await asyncio.sleep(delay)
+            yield StubMessage(word + ' ', {})
+
+    def _delay(self):
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def _text(self):
+        return ' '.join(WORDS[index % len(WORDS)] for index in range(self.output_tokens))
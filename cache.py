@@ -0,0 +1,313 @@
+"""
+Content-addressed result cache for topic analyses
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_topic(topic):
+    """Canonical form of a topic so trivially different spellings share a key"""
+    topic = re.sub(r'\s+', ' ', topic.strip().lower())
+    return topic.strip(' .!?')
+
+
+def cache_key(topic, **settings):
+    """Hash of the normalized topic plus pipeline/model settings"""
+    payload = json.dumps({'topic': normalize_topic(topic), **settings}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class DiskTier:
+    """SQLite-backed cache tier that survives restarts
+
+    Values are stored as zlib-compressed JSON; rows written as plain JSON
+    text by older versions are still read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS results '
+            '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+        self._conn.execute('DELETE FROM results WHERE expires_at < ?', (time.time(),))
+        self._conn.commit()
+        os.register_at_fork(after_in_child=self._reconnect)
+
+    def _reconnect(self):
+        # A SQLite connection must not cross fork(); a forked worker opens its own
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM results WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None, None
+        data = row[0] if isinstance(row[0], str) else zlib.decompress(row[0])
+        return json.loads(data), row[1]
+
+    def set(self, key, value, expires_at):
+        data = zlib.compress(json.dumps(value).encode('utf-8'), 6)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, data, expires_at)
+            )
+            self._conn.commit()
+
+    def size_bytes(self):
+        """Bytes of stored values"""
+        with self._lock:
+            return self._conn.execute('SELECT COALESCE(SUM(LENGTH(value)), 0) FROM results').fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM results')
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+
+class ResultCache:
+    """In-memory LRU cache with TTL and an optional on-disk tier
+
+    Each in-memory entry can also keep encoded forms of its value (the
+    serialized and compressed response body, see encoded()), so repeat
+    hits are served without serializing or compressing again.
+    """
+
+    def __init__(self, max_entries=256, ttl=3600, disk_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk = DiskTier(disk_path) if disk_path else None
+        self._entries = OrderedDict()  # key -> (value, expires_at, {encoding: bytes})
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expired': 0,
+            'encoded_hits': 0,
+            'encoded_misses': 0
+        }
+
+    def get(self, key):
+        """Return the cached value, or None on a miss"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at >= now:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    self._stats['memory_hits'] += 1
+                    return value
+
+                del self._entries[key]
+                self._stats['expired'] += 1
+
+        if self.disk is not None:
+            value, expires_at = self.disk.get(key)
+            if value is not None:
+                with self._lock:
+                    self._store(key, value, expires_at)
+                    self._stats['hits'] += 1
+                    self._stats['disk_hits'] += 1
+                return value
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl
+
+        with self._lock:
+            self._store(key, value, expires_at)
+
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value, expires_at)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not write cache entry to disk: {e}")
+
+    def encoded(self, key, value, encoding, build):
+        """Encoded bytes of value, built by build() once while value is the cached entry for key
+
+        Anything but the exact object cached under key (a fresh result, a
+        near-duplicate's result) is built every time and not kept.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            variants = entry[2] if entry is not None and entry[0] is value else None
+            if variants is not None and encoding in variants:
+                self._stats['encoded_hits'] += 1
+                return variants[encoding]
+
+        body = build()
+        if variants is not None:
+            with self._lock:
+                self._stats['encoded_misses'] += 1
+                variants.setdefault(encoding, body)
+        return body
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['encoded_bytes'] = {}
+            for _, _, variants in self._entries.values():
+                for encoding, body in variants.items():
+                    stats['encoded_bytes'][encoding] = stats['encoded_bytes'].get(encoding, 0) + len(body)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['max_entries'] = self.max_entries
+        stats['ttl'] = self.ttl
+        if self.disk is not None:
+            stats['disk_size'] = len(self.disk)
+            stats['disk_bytes'] = self.disk.size_bytes()
+        return stats
+
+    def _store(self, key, value, expires_at):
+        # Caller holds the lock
+        self._entries[key] = (value, expires_at, {})
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+
+def semantic_lookup(cache, semantic, topic, settings):
+    """Cached result of a near-duplicate topic, or None
+
+    The result is marked with the topic it was produced for.
+    """
+    match = semantic.lookup(topic, settings)
+    if match is None:
+        return None
+
+    similar_topic, similarity = match
+    result = cache.get(cache_key(similar_topic, **settings))
+    if result is None:
+        # The report behind this entry has expired or been evicted
+        semantic.forget(similar_topic, settings)
+        return None
+
+    return {**result, 'similar_topic': similar_topic, 'similarity': round(similarity, 3)}
+
+
+def run_options(deadline, refresh=()):
+    """Keyword arguments that hand deadline and refresh (if any) to a runner"""
+    options = {} if deadline is None else {'deadline': deadline}
+    if refresh:
+        options['refresh'] = refresh
+    return options
+
+
+def complete_result(result):
+    """False for a result a deadline cut short, partial or with nothing at all"""
+    return not (result.get('partial') or result.get('reason'))
+
+
+def cached_runner(cache, runner, flights=None, semantic=None, **settings):
+    """Wrap an analysis runner so successful results are served from cache
+
+    settings (pipeline version, model name, temperature, ...) and any
+    per-call options passed to the runner become part of the key, so
+    changing any of them never serves a stale report. With flights (a
+    singleflight.SingleFlight), concurrent misses for the same key share
+    one run of the runner. With semantic (a semantic_cache.SemanticIndex),
+    a miss can be answered by the cached result of a near-duplicate topic.
+
+    A deadline (deadline.Deadline), and refresh (report sections to
+    regenerate even if stored, for a run that bypasses the cache), are
+    passed to the runner but are not part of the key. Partial results, cut
+    short by a deadline, are not cached; a refresh never joins a shared run.
+    When runs are shared, the run follows the deadline of the request that
+    started it. A caller waits for it only within its own deadline, and
+    one with time left runs again rather than take a result cut short.
+    """
+    def run(topic, use_cache=True, deadline=None, refresh=(), **options):
+        key = cache_key(topic, **settings, **options)
+
+        if use_cache:
+            result = cache.get(key)
+            if result is not None:
+                return result
+
+            if semantic is not None:
+                result = semantic_lookup(cache, semantic, topic, {**settings, **options})
+                if result is not None:
+                    return result
+
+        def compute():
+            result = runner(topic, **options, **run_options(deadline, refresh))
+            if result.get('success') and not result.get('partial'):
+                cache.set(key, result)
+                if semantic is not None:
+                    semantic.add(topic, {**settings, **options})
+            return result
+
+        if flights is None or refresh:
+            # A forced refresh doesn't share a run that may reuse stored sections
+            return compute()
+        return flights.do(key, compute, lookup=lambda: cache.get(key), deadline=deadline, shareable=complete_result)
+
+    return run
+
+
+def async_cached_runner(cache, runner, flights=None, semantic=None, **settings):
+    """cached_runner for coroutine runners; shares keys with the sync version"""
+    async def run(topic, use_cache=True, deadline=None, refresh=(), **options):
+        key = cache_key(topic, **settings, **options)
+
+        if use_cache:
+            result = cache.get(key)
+            if result is not None:
+                return result
+
+            if semantic is not None:
+                result = semantic_lookup(cache, semantic, topic, {**settings, **options})
+                if result is not None:
+                    return result
+
+        async def compute():
+            result = await runner(topic, **options, **run_options(deadline, refresh))
+            if result.get('success') and not result.get('partial'):
+                cache.set(key, result)
+                if semantic is not None:
+                    semantic.add(topic, {**settings, **options})
+            return result
+
+        if flights is None or refresh:
+            return await compute()
+        return await flights.do(key, compute, deadline=deadline, shareable=complete_result)
+
+    return run
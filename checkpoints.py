@@ -0,0 +1,88 @@
+"""
+Durable checkpoints of crew stage outputs, so a failed run resumes instead of restarting
+"""
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+
+
+def backoff_delay(attempt, base=2.0, cap=30.0):
+    """Seconds to wait before retry number attempt (1 for the first retry)
+
+    Exponential backoff with full jitter: a random time up to base * 2^(attempt-1),
+    capped, so runs that failed together don't all retry together.
+    """
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class CheckpointStore:
+    """Output of each finished crew stage in SQLite, keyed by job and stage
+
+    A job is one analysis of one topic with fixed settings (see
+    crew_agent.job_key). Outputs are stored zlib-compressed and kept for
+    ttl seconds, so a run that fails in a late stage, or a user retrying the
+    same topic soon after, picks up the finished stages instead of paying
+    for them again. A job's checkpoints are cleared once it succeeds.
+    """
+
+    def __init__(self, path, ttl=86400):
+        self.path = path
+        self.ttl = ttl
+        self._reconnect()
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS checkpoints ('
+            ' job_id TEXT NOT NULL,'
+            ' stage TEXT NOT NULL,'
+            ' output BLOB NOT NULL,'
+            ' created_at REAL NOT NULL,'
+            ' PRIMARY KEY (job_id, stage))'
+        )
+        self.prune()
+        os.register_at_fork(after_in_child=self._reconnect)
+
+    def _reconnect(self):
+        # A SQLite connection must not cross fork(); a forked worker opens its own
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+
+    def save(self, job_id, stage, output):
+        """Record that stage of job_id finished with output"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO checkpoints (job_id, stage, output, created_at) VALUES (?, ?, ?, ?)',
+                (job_id, stage, zlib.compress(output.encode('utf-8'), 6), time.time())
+            )
+
+    def load(self, job_id):
+        """{stage: output} of every unexpired finished stage of job_id"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT stage, output FROM checkpoints WHERE job_id = ? AND created_at >= ?',
+                (job_id, time.time() - self.ttl)
+            ).fetchall()
+        return {stage: zlib.decompress(output).decode('utf-8') for stage, output in rows}
+
+    def clear(self, job_id):
+        """Forget job_id's checkpoints, e.g. once it has succeeded"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM checkpoints WHERE job_id = ?', (job_id,))
+
+    def prune(self):
+        """Delete expired checkpoints; returns how many"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'DELETE FROM checkpoints WHERE created_at < ?', (time.time() - self.ttl,)
+            )
+        return cursor.rowcount
+
+    def stats(self):
+        """Number of jobs and stages checkpointed, and bytes stored"""
+        with self._lock:
+            jobs, stages, size = self._conn.execute(
+                'SELECT COUNT(DISTINCT job_id), COUNT(*), COALESCE(SUM(LENGTH(output)), 0) FROM checkpoints'
+            ).fetchone()
+        return {'jobs': jobs, 'stages': stages, 'bytes': size}
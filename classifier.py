@@ -0,0 +1,85 @@
+"""
+Topic classifier backed by a single precompiled keyword pattern
+"""
+import json
+import os
+import re
+
+DEFAULT_CATEGORIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'categories.json')
+
+
+def trie_pattern(keywords):
+    """Regex source matching any of the keywords, factored into a prefix trie
+
+    Shared prefixes are only tested once ("health(?:care)?"), which is much
+    faster for the regex engine than a flat "a|b|c" alternation.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A keyword ends here, so the longer continuations are optional
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+class TopicClassifier:
+    """Scores topics against weighted category keywords in one regex pass
+
+    Keywords match case-insensitively on word boundaries (with an optional
+    plural "s"), so "AI" matches "AI ethics" but not "maintenance". When
+    categories tie, the one listed first in the configuration wins.
+    """
+
+    def __init__(self, categories, default='general'):
+        self.categories = list(categories)
+        self.default = default
+        self._rank = {category: -index for index, category in enumerate(self.categories)}
+
+        # keyword (lowercase) -> [(category, weight), ...]
+        self._keywords = {}
+        for category, keywords in categories.items():
+            for keyword, weight in keywords.items():
+                self._keywords.setdefault(keyword.lower(), []).append((category, float(weight)))
+
+        # Topics are lowercased up front, which is cheaper than re.IGNORECASE
+        self._pattern = re.compile(r'\b(' + trie_pattern(self._keywords) + r')s?\b')
+
+    @classmethod
+    def from_file(cls, path=None, default='general'):
+        """Load categories from a JSON file of {category: {keyword: weight}}"""
+        with open(path or DEFAULT_CATEGORIES_PATH, encoding='utf-8') as f:
+            return cls(json.load(f), default=default)
+
+    def scores(self, topic):
+        """Total keyword weight per category for a topic"""
+        scores = {}
+        for keyword in self._pattern.findall(topic.lower()):
+            for category, weight in self._keywords[keyword]:
+                scores[category] = scores.get(category, 0.0) + weight
+        return scores
+
+    def classify(self, topic):
+        return self._best(self.scores(topic))
+
+    def classify_many(self, topics):
+        """Classify a batch of topics"""
+        return [self._best(self.scores(topic)) for topic in topics]
+
+    def _best(self, scores):
+        if not scores:
+            return self.default
+        if len(scores) == 1:
+            return next(iter(scores))
+        # Highest score, then earliest in the configuration
+        rank = self._rank
+        return max(scores, key=lambda category: (scores[category], rank[category]))
@@ -0,0 +1,110 @@
+"""
+Response compression negotiated from Accept-Encoding (gzip, and brotli when installed)
+"""
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:  # Optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this gain too little to be worth compressing
+MIN_SIZE = 1024
+
+COMPRESSIBLE_TYPES = ('text/html', 'text/plain', 'text/css', 'application/json', 'application/javascript')
+
+# Quality for bodies compressed per response vs once and kept (cached reports)
+DYNAMIC_LEVELS = {'br': 4, 'gzip': 6}
+STORED_LEVELS = {'br': 9, 'gzip': 9}
+
+
+def available_encodings():
+    """Encodings this server can produce, most preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(accept_encoding):
+    """Best encoding the client accepts ('br', 'gzip' or 'identity')
+
+    Follows the q-values in the Accept-Encoding header; between equally
+    acceptable encodings, brotli wins over gzip.
+    """
+    weights = {}
+    for part in accept_encoding.lower().split(','):
+        name, _, params = part.partition(';')
+        weight = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if name.strip():
+            weights[name.strip()] = weight
+
+    best, best_weight = 'identity', 0.0
+    for encoding in available_encodings():
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(data, encoding, stored=False):
+    """data compressed with encoding; stored=True spends more CPU for a smaller body that is kept"""
+    level = (STORED_LEVELS if stored else DYNAMIC_LEVELS)[encoding]
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_stream(chunks, encoding):
+    """Compress an iterable of byte chunks as it is consumed, for streamed bodies
+
+    Yields compressed data whenever the compressor has some ready, so the
+    whole body is never held compressed or uncompressed.
+    """
+    level = DYNAMIC_LEVELS[encoding]
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        process, finish = compressor.process, compressor.finish
+    else:
+        # wbits=31 writes the gzip header and trailer; mtime is 0, as in compress()
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        process, finish = compressor.compress, compressor.flush
+
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def compress_response(response, accept_encoding, min_size=MIN_SIZE):
+    """Compress a buffered Flask response in place if the client accepts it
+
+    Streamed responses (SSE, NDJSON) are left alone so each event still
+    reaches the client as soon as it is written, as are responses that
+    already carry a Content-Encoding.
+    """
+    if response.direct_passthrough or response.is_streamed:
+        return response
+    if response.mimetype not in COMPRESSIBLE_TYPES or 'Content-Encoding' in response.headers:
+        return response
+    if response.status_code < 200 or response.status_code in (204, 304):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if response.content_length is not None and response.content_length < min_size:
+        return response
+
+    encoding = negotiate(accept_encoding)
+    if encoding == 'identity':
+        return response
+
+    response.set_data(compress(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
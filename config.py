@@ -18,8 +18,83 @@ class Config:
     # CORS settings
     CORS_HEADERS = 'Content-Type'
     
-    # Rate limiting (requests per minute)
-    RATE_LIMIT = os.environ.get('RATE_LIMIT') or '10'
+    # Rate limiting (analysis requests per minute per client, 0 disables)
+    RATE_LIMIT = int(os.environ.get('RATE_LIMIT') or 10)
+    RATE_LIMIT_BURST = int(os.environ.get('RATE_LIMIT_BURST') or 0)  # defaults to RATE_LIMIT
+    RATE_LIMIT_DB_PATH = os.environ.get('RATE_LIMIT_DB_PATH') or ''  # share buckets across workers
+    RATE_LIMIT_TRUST_PROXY = (os.environ.get('RATE_LIMIT_TRUST_PROXY') or 'false').lower() == 'true'
+    
+    # Admission control for analyses run while the client waits
+    MAX_RUNNING_ANALYSES = int(os.environ.get('MAX_RUNNING_ANALYSES') or 8)
+    MAX_WAITING_ANALYSES = int(os.environ.get('MAX_WAITING_ANALYSES') or 16)
+    ADMISSION_TIMEOUT = float(os.environ.get('ADMISSION_TIMEOUT') or 10)
+    
+    # Time budget in seconds for an analysis run while the client waits (0 for
+    # none); a client can ask for less, or up to REQUEST_TIMEOUT_MAX, with the
+    # X-Request-Timeout header or ?timeout= on streams
+    REQUEST_TIMEOUT = float(os.environ.get('REQUEST_TIMEOUT') or 0)
+    REQUEST_TIMEOUT_MAX = float(os.environ.get('REQUEST_TIMEOUT_MAX') or 600)
+    
+    # Background job queue
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS') or 4)
+    JOB_MAX_PENDING = int(os.environ.get('JOB_MAX_PENDING') or 100)
+    JOB_RESULT_TTL = int(os.environ.get('JOB_RESULT_TTL') or 3600)
+    
+    # Batch analysis
+    BATCH_MAX_TOPICS = int(os.environ.get('BATCH_MAX_TOPICS') or 500)
+    BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY') or 4)
+    BATCH_MAX_CONCURRENCY = int(os.environ.get('BATCH_MAX_CONCURRENCY') or 16)
+    BATCH_USE_PROCESSES = (os.environ.get('BATCH_USE_PROCESSES') or 'false').lower() == 'true'
+    
+    # Topic categories for the keyword classifier (JSON, defaults to categories.json)
+    TOPIC_CATEGORIES_PATH = os.environ.get('TOPIC_CATEGORIES_PATH') or ''
+    
+    # Result cache (leave CACHE_DB_PATH empty for memory only)
+    CACHE_ENABLED = (os.environ.get('CACHE_ENABLED') or 'true').lower() == 'true'
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES') or 256)
+    CACHE_TTL = int(os.environ.get('CACHE_TTL') or 3600)
+    CACHE_DB_PATH = os.environ.get('CACHE_DB_PATH') or ''
+    
+    # Reuse the cached report of a near-duplicate topic ("AI in healthcare" ~
+    # "Healthcare AI"); set SEMANTIC_CACHE_PATH to keep the index across restarts
+    SEMANTIC_CACHE_ENABLED = (os.environ.get('SEMANTIC_CACHE_ENABLED') or 'true').lower() == 'true'
+    SEMANTIC_CACHE_THRESHOLD = float(os.environ.get('SEMANTIC_CACHE_THRESHOLD') or 0.88)
+    SEMANTIC_CACHE_MAX_ENTRIES = int(os.environ.get('SEMANTIC_CACHE_MAX_ENTRIES') or 10000)
+    SEMANTIC_CACHE_PATH = os.environ.get('SEMANTIC_CACHE_PATH') or ''
+    
+    # Identical concurrent analyses share one run; set COALESCE_DB_PATH (and
+    # CACHE_DB_PATH) to also coalesce across worker processes
+    COALESCE_ENABLED = (os.environ.get('COALESCE_ENABLED') or 'true').lower() == 'true'
+    COALESCE_DB_PATH = os.environ.get('COALESCE_DB_PATH') or ''
+    COALESCE_LEASE_TTL = int(os.environ.get('COALESCE_LEASE_TTL') or 300)
+    
+    # Report sections with content hashes, so a repeat or refreshed analysis
+    # regenerates only the sections that are stale
+    REPORT_STORE_ENABLED = (os.environ.get('REPORT_STORE_ENABLED') or 'true').lower() == 'true'
+    REPORT_STORE_DB_PATH = os.environ.get('REPORT_STORE_DB_PATH') or 'reports.db'
+    REPORT_STORE_MAX_REPORTS = int(os.environ.get('REPORT_STORE_MAX_REPORTS') or 1000)
+    REPORT_STORE_TTL = int(os.environ.get('REPORT_STORE_TTL') or 7 * 24 * 3600)
+    
+    # gzip/brotli responses for clients that accept them
+    COMPRESSION_ENABLED = (os.environ.get('COMPRESSION_ENABLED') or 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE') or 1024)
+    
+    # Results longer than this many characters are streamed as chunked JSON
+    # instead of serialized whole (0 never streams)
+    JSON_STREAM_MIN_SIZE = int(os.environ.get('JSON_STREAM_MIN_SIZE') or 256 * 1024)
+    
+    # When to import the CrewAI stack (crew_agent): 'lazy' on first use, or
+    # 'background' right after startup, with /api/ready answering 503 until done
+    CREW_LOAD = os.environ.get('CREW_LOAD') or 'lazy'
+    
+    # Which stream the page uses: 'report' (section by section) or 'crew'
+    # (the agents' LLM tokens as they are generated)
+    STREAM_PIPELINE = os.environ.get('STREAM_PIPELINE') or 'report'
+    
+    # Server-side history of finished analyses, searchable from the sidebar
+    HISTORY_ENABLED = (os.environ.get('HISTORY_ENABLED') or 'true').lower() == 'true'
+    HISTORY_DB_PATH = os.environ.get('HISTORY_DB_PATH') or 'history.db'
+    HISTORY_PAGE_SIZE = int(os.environ.get('HISTORY_PAGE_SIZE') or 20)
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -31,9 +106,6 @@ class ProductionConfig(Config):
     DEBUG = False
     FLASK_ENV = 'production'
     SECRET_KEY = os.environ.get('SECRET_KEY')
-    
-    if not SECRET_KEY:
-        raise ValueError("No SECRET_KEY set for production environment")
 
 # Configuration dictionary
 config = {
@@ -41,3 +113,13 @@ config = {
     'production': ProductionConfig,
     'default': DevelopmentConfig
 }
+
+def get_config(name=None):
+    """Return the configuration class for the given (or current) environment"""
+    name = name or os.environ.get('FLASK_ENV') or 'default'
+    config_class = config.get(name, config['default'])
+    
+    if config_class is ProductionConfig and not config_class.SECRET_KEY:
+        raise ValueError("No SECRET_KEY set for production environment")
+    
+    return config_class
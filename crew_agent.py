@@ -1,25 +1,398 @@
+import asyncio
+import copy
+import logging
 import os
-from crewai import Agent, Task, Crew, Process
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from crewai import Agent, Task, Crew, LLM, Process
+from crewai.agents.agent_builder.utilities.base_token_process import TokenProcess
+from crewai.agents.parser import AgentFinish, OutputParserError, parse as parse_agent_output
+from crewai.llms.base_llm import BaseLLM
+from crewai.tasks.task_output import TaskOutput
+from crewai.utilities.llm_utils import create_llm as to_crewai_llm
+from crewai.utilities.token_counter_callback import TokenCalcHandler
+from crewai.events import (
+    crewai_event_bus, LLMCallStartedEvent, LLMCallCompletedEvent, LLMCallFailedEvent, LLMStreamChunkEvent
+)
 from langchain_google_genai import ChatGoogleGenerativeAI
 
-# Simple text analysis agent without external LLM dependencies
-def create_content_crew(topic):
-    """Create a crew for content analysis and creation"""
+from cache import cache_key
+from checkpoints import CheckpointStore, backoff_delay
+from deadline import DEADLINE, Cancelled
+from llm_cache import LLMCache, prompt_key
+from metrics import (
+    CHECKPOINT_STAGES, CREW_RETRIES, LLM_CALL_ERRORS, LLM_CALL_SECONDS, LLM_TOKENS, MODEL_ESCALATIONS, STAGE_SECONDS
+)
+from routing import RouteStats, answer_problem, default_route, load_routes
+
+logger = logging.getLogger(__name__)
+
+# Crew stages, in the order their Tasks run
+CREW_STAGES = ['research', 'writing', 'review']
+
+# Research angles from the research Task's checklist; the fan-out
+# pipeline researches each one as its own concurrent Task
+RESEARCH_SUBTOPICS = {
+    'concepts': 'Key concepts and definitions',
+    'trends': 'Current trends and developments',
+    'statistics': 'Important facts and statistics',
+    'challenges': 'Main benefits and challenges',
+    'outlook': 'Future outlook'
+}
+
+# 'sequential' runs research, writing and review back to back;
+# 'fanout' runs the research subtopics concurrently before writing
+PIPELINE_MODES = ('sequential', 'fanout')
+PIPELINE_MODE = os.getenv('CREW_PIPELINE_MODE') or 'sequential'
+
+# Finished stages are checkpointed here, so a failed run resumes from the
+# last completed stage (set CREW_CHECKPOINT_DB empty to keep them in memory only)
+CHECKPOINT_DB_PATH = os.getenv('CREW_CHECKPOINT_DB', 'checkpoints.db')
+CHECKPOINT_TTL = int(os.getenv('CREW_CHECKPOINT_TTL') or 86400)
+
+# Attempts per analysis in all, first run included, and the retry backoff in seconds
+MAX_ATTEMPTS = int(os.getenv('CREW_MAX_ATTEMPTS') or 3)
+RETRY_BASE_DELAY = float(os.getenv('CREW_RETRY_BASE_DELAY') or 2)
+RETRY_MAX_DELAY = float(os.getenv('CREW_RETRY_MAX_DELAY') or 30)
+
+# LLM responses are cached here for calls at temperature 0, or for every call
+# with LLM_CACHE_ANY_TEMPERATURE=true (set LLM_CACHE_DB empty to disable)
+LLM_CACHE_DB_PATH = os.getenv('LLM_CACHE_DB', 'llm_cache.db')
+LLM_CACHE_MAX_MB = int(os.getenv('LLM_CACHE_MAX_MB') or 256)
+LLM_CACHE_ANY_TEMPERATURE = (os.getenv('LLM_CACHE_ANY_TEMPERATURE') or 'false').lower() == 'true'
+
+# Model, output token budget and timeout per agent role (JSON, defaults to routes.json)
+ROUTES_PATH = os.getenv('CREW_ROUTES_PATH') or ''
+
+# Longest analysis result returned, in characters; a longer one is cut and
+# marked truncated (0 for no limit)
+MAX_OUTPUT_CHARS = int(os.getenv('CREW_MAX_OUTPUT_CHARS') or 200000)
+
+def _stage_hook(stage_callback, stage):
+    """Wrap stage_callback as a Task callback that reports which stage finished"""
+    if stage_callback is None:
+        return None
+    return lambda output: stage_callback(stage, output)
+
+def _timed_stages(stage_callback=None, deadline=None):
+    """Wrap stage_callback so each Task's duration is recorded as a stage metric
+    
+    Tasks run one after another, so a Task took the time since the previous
+    one finished (or since the crew started, for the first). Fan-out research
+    Tasks all start with the crew, so they are timed from the start. Once
+    deadline is cancelled, async Tasks finish with a placeholder answer (see
+    RoutedLLM), which is dropped.
+    """
+    start = time.perf_counter()
+    last = [start]
+    
+    def callback(stage, output):
+        if deadline is not None and deadline.cancelled and _is_stopped_answer(str(output)):
+            return
+        now = time.perf_counter()
+        since = start if stage.startswith('research.') else last[0]
+        STAGE_SECONDS.observe(now - since, stage=stage)
+        last[0] = max(last[0], now)
+        if stage_callback:
+            stage_callback(stage, output)
+    
+    return callback
+
+# Bump when agents or tasks change so cached results are not reused
+PIPELINE_VERSION = '1'
+
+# Model settings shared by every agent; also part of the result cache key
+MODEL_SETTINGS = {
+    'model': 'gemini-1.5-flash',
+    'temperature': float(os.getenv('CREW_TEMPERATURE') or 0.7)
+}
+
+def create_llm(model_settings=None):
+    """Create the Gemini client used by every agent"""
     
     # Get API key from environment
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise ValueError("GOOGLE_API_KEY environment variable is required")
     
-    # Initialize the LLM
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-1.5-flash",
+    return ChatGoogleGenerativeAI(
         google_api_key=api_key,
-        temperature=0.7
+        **(model_settings or MODEL_SETTINGS)
     )
+
+def _record_tokens(model, role, prompt_tokens, completion_tokens):
+    LLM_TOKENS.inc(prompt_tokens or 0, model=model, role=role, kind='prompt')
+    LLM_TOKENS.inc(completion_tokens or 0, model=model, role=role, kind='completion')
+
+# Measured latency, tokens and escalations per role and model, to tune routes.json against
+route_stats = RouteStats()
+
+def _record_call(role, model, seconds, prompt_tokens=0, completion_tokens=0, problem=None):
+    """Record one LLM call of a route; problem is why its answer went to the next model, if it did"""
+    route_stats.record(role, model, seconds, prompt_tokens, completion_tokens, problem)
+    _record_tokens(model, role, prompt_tokens, completion_tokens)
+    if problem:
+        MODEL_ESCALATIONS.inc(role=role, model=model, reason=problem)
+        logger.info(f"{role}: escalating past {model} ({problem})")
+
+# CrewAI emits LLM call events on the calling thread, so a thread-local
+# start time pairs each call with its completion
+_llm_calls = threading.local()
+
+def _on_llm_call_started(source, event):
+    _llm_calls.started = time.perf_counter()
+
+def _on_llm_call_finished(source, event):
+    started = getattr(_llm_calls, 'started', None)
+    if started is None:
+        return
+    _llm_calls.started = None
     
-    # Content Research Agent
-    researcher = Agent(
+    labels = {
+        'model': getattr(event, 'model', None) or MODEL_SETTINGS['model'],
+        'role': event.agent_role or ''
+    }
+    LLM_CALL_SECONDS.observe(time.perf_counter() - started, **labels)
+    if isinstance(event, LLMCallFailedEvent):
+        LLM_CALL_ERRORS.inc(**labels)
+
+crewai_event_bus.register_handler(LLMCallStartedEvent, _on_llm_call_started)
+crewai_event_bus.register_handler(LLMCallCompletedEvent, _on_llm_call_finished)
+crewai_event_bus.register_handler(LLMCallFailedEvent, _on_llm_call_finished)
+
+# Streaming runs register a sink per Task ID; chunks for other Tasks are dropped
+_token_sinks = {}
+
+def _on_llm_stream_chunk(source, event):
+    sink = _token_sinks.get(str(event.task_id))
+    if sink and event.chunk and not event.tool_call:
+        sink(event.chunk)
+
+crewai_event_bus.register_handler(LLMStreamChunkEvent, _on_llm_stream_chunk)
+
+# Runs with a deadline register it per Task ID, so every LLM call made for
+# one of their Tasks can check it
+_task_deadlines = {}
+
+@contextmanager
+def _deadline_scope(tasks, deadline):
+    """Register deadline (if any) for tasks while the block runs"""
+    task_ids = [str(task.id) for task in tasks] if deadline is not None else []
+    for task_id in task_ids:
+        _task_deadlines[task_id] = deadline
+    try:
+        yield
+    finally:
+        for task_id in task_ids:
+            _task_deadlines.pop(task_id, None)
+
+# Start of the final answer of an async Task stopped by its deadline (see RoutedLLM)
+STOPPED_ANSWER = '(stopped: '
+
+def _is_stopped_answer(text):
+    return text.startswith(STOPPED_ANSWER)
+
+def _task_deadline(task):
+    return _task_deadlines.get(str(task.id)) if task is not None else None
+
+def _check_deadline(deadline):
+    """Raise Cancelled if deadline (None for no deadline) has run out or been cancelled"""
+    if deadline is not None:
+        deadline.check()
+
+def _agent_answer_problem(response, route):
+    """answer_problem for an agent's ReAct-format response; one the agent can't parse is 'malformed'"""
+    if not isinstance(response, str):
+        return None
+    try:
+        answer = parse_agent_output(response)
+    except OutputParserError:
+        return 'malformed'
+    if isinstance(answer, AgentFinish):
+        return answer_problem(answer.output, route)
+    return None
+
+def _agent_llm(client, route, stream=False):
+    """client as the CrewAI LLM an agent calls, held to its route's output budget and timeout
+    
+    A streaming LLM is the agent's own copy, so no other agent's calls start streaming.
+    """
+    llm = to_crewai_llm(client)
+    if stream:
+        llm = copy.copy(llm)
+        llm.stream = True
+    if isinstance(llm, LLM):
+        llm.max_tokens = route['max_tokens']
+        llm.timeout = route['timeout']
+    return llm
+
+class RoutedLLM(BaseLLM):
+    """An agent's route: its role's models, each call cascading from the first
+    
+    A call goes to the first model. If that fails, or its answer is
+    malformed, cut off, too short or a refusal (see routing.answer_problem),
+    the same messages go to the next model; the last model's answer is
+    used as it is. Streaming calls stay on the first model, since tokens
+    already sent can't be taken back.
+    
+    Calls for a Task with a deadline (see _deadline_scope) are given no more
+    than its time left, and are not made, nor escalated, once it has run
+    out or been cancelled.
+    """
+    
+    def __init__(self, role, route, llms):
+        self.role = role
+        self.route = route
+        self.llms = llms  # [(model name, CrewAI LLM)], in cascade order
+    
+    model = property(lambda self: self.llms[0][1].model)
+    temperature = property(lambda self: self.llms[0][1].temperature)
+    
+    # Set by CrewAI's agent executor, for every model of the route; stream is
+    # fixed when the agent is built (see CrewFactory.get_agents)
+    stop = property(lambda self: self.llms[0][1].stop, lambda self, value: self._set_all('stop', value))
+    stream = property(lambda self: self.llms[0][1].stream, lambda self, value: self._set_all('stream', value))
+    
+    def _set_all(self, name, value):
+        for _, llm in self.llms:
+            setattr(llm, name, value)
+    
+    def cascade(self):
+        """[(model name, CrewAI LLM)] a call tries, in order"""
+        return self.llms[:1] if getattr(self.llms[0][1], 'stream', False) else self.llms
+    
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None):
+        return self.answer(messages, tools, callbacks, available_functions, from_task, from_agent)[1]
+    
+    def answer(self, messages, tools=None, callbacks=None, available_functions=None,
+               from_task=None, from_agent=None):
+        """call(), returning (name of the model that answered, response)"""
+        deadline = _task_deadline(from_task)
+        llms = self.cascade()
+        for index, (model, llm) in enumerate(llms):
+            if deadline is not None and deadline.cancelled:
+                return model, self._stop(deadline, from_task)
+            
+            final = index == len(llms) - 1
+            if isinstance(llm, LLM):
+                llm.timeout = deadline.timeout(self.route['timeout']) if deadline else self.route['timeout']
+            usage = TokenProcess()
+            started = time.perf_counter()
+            try:
+                response = llm.call(
+                    messages, tools, [*(callbacks or []), TokenCalcHandler(usage)],
+                    available_functions, from_task, from_agent
+                )
+            except Exception:
+                _record_call(self.role, model, time.perf_counter() - started, problem=None if final else 'error')
+                if deadline is not None and deadline.cancelled:
+                    # Most likely timed out on the deadline's account
+                    return model, self._stop(deadline, from_task)
+                if final:
+                    raise
+                continue
+            
+            stopped = deadline is not None and deadline.cancelled
+            problem = None if final or tools or stopped else _agent_answer_problem(response, self.route)
+            _record_call(
+                self.role, model, time.perf_counter() - started,
+                usage.prompt_tokens, usage.completion_tokens, problem
+            )
+            if problem is None:
+                return model, response
+    
+    @staticmethod
+    def _stop(deadline, task):
+        if task.async_execution:
+            # An async Task that raises is never marked done and the crew
+            # waits on it forever, so it finishes with a placeholder instead
+            return f"Thought: {deadline.reason}\nFinal Answer: {STOPPED_ANSWER}{deadline.reason})"
+        raise Cancelled(deadline.reason)
+    
+    def supports_stop_words(self):
+        return self.llms[0][1].supports_stop_words()
+    
+    def get_context_window_size(self):
+        return min(llm.get_context_window_size() for _, llm in self.llms)
+    
+    def __getattr__(self, name):
+        if name == 'llms':
+            raise AttributeError(name)
+        return getattr(self.llms[0][1], name)
+
+class CachedLLM(BaseLLM):
+    """An agent's route (a RoutedLLM) with its calls answered from llm_cache where the cache allows
+    
+    Every CrewAI call from the agent goes through call(); a hit returns the
+    stored response without calling the model (as a single chunk, when
+    streaming). A response is stored under the model that gave it, and a
+    call takes the stored answer of the first model in the route's cascade
+    that has one, as the route itself would. Calls with tools are never
+    cached.
+    """
+    
+    def __init__(self, llm, cache, role):
+        self.llm = llm
+        self.cache = cache
+        self.role = role
+    
+    model = property(lambda self: self.llm.model)
+    temperature = property(lambda self: self.llm.temperature)
+    
+    # Set by CrewAI's agent executor; they belong to the wrapped LLM
+    stop = property(lambda self: self.llm.stop, lambda self, value: setattr(self.llm, 'stop', value))
+    stream = property(lambda self: self.llm.stream, lambda self, value: setattr(self.llm, 'stream', value))
+    
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None):
+        keys = {}
+        if not tools:
+            keys = {
+                model: prompt_key(model, llm.temperature, messages)
+                for model, llm in self.llm.cascade() if self.cache.serves(llm.temperature)
+            }
+        if keys:
+            response = self.cache.get_first(list(keys.values()), role=self.role)
+            if response is not None:
+                if getattr(self.llm, 'stream', False):
+                    crewai_event_bus.emit(self, LLMStreamChunkEvent(
+                        chunk=response, from_task=from_task, from_agent=from_agent
+                    ))
+                return response
+        
+        model, response = self.llm.answer(messages, tools, callbacks, available_functions, from_task, from_agent)
+        key = keys.get(model)
+        if key is not None and isinstance(response, str) and response and \
+                f'Final Answer: {STOPPED_ANSWER}' not in response:
+            self.cache.put(key, response, role=self.role)
+        return response
+    
+    def supports_stop_words(self):
+        return self.llm.supports_stop_words()
+    
+    def get_context_window_size(self):
+        return self.llm.get_context_window_size()
+    
+    def __getattr__(self, name):
+        # Everything else CrewAI reads (function calling support, token usage, ...)
+        if name == 'llm':
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+def _with_llm_cache(agents):
+    """Route each agent's LLM calls through llm_cache, when it is enabled"""
+    if llm_cache is not None:
+        for agent in agents:
+            agent.llm = CachedLLM(agent.llm, llm_cache, agent.role)
+    return agents
+
+def create_researcher(llm):
+    """Create the Content Research Agent"""
+    return Agent(
         role='Content Researcher',
         goal='Research and analyze the given topic thoroughly',
         backstory="""You are an expert content researcher with years of experience in 
@@ -29,6 +402,12 @@ def create_content_crew(topic):
         allow_delegation=False,
         llm=llm
     )
+
+def create_agents(llm):
+    """Create the researcher, writer and reviewer agents"""
+    
+    # Content Research Agent
+    researcher = create_researcher(llm)
     
     # Content Writer Agent
     writer = Agent(
@@ -53,6 +432,12 @@ def create_content_crew(topic):
         llm=llm
     )
     
+    return researcher, writer, reviewer
+
+def create_tasks(topic, agents, stage_callback=None):
+    """Create the topic-bound research, writing and review Tasks"""
+    researcher, writer, reviewer = agents
+    
     # Research Task
     research_task = Task(
         description=f"""Research the topic: {topic}
@@ -71,7 +456,8 @@ def create_content_crew(topic):
         - Supporting data and facts
         - Trends analysis
         - Recommendations""",
-        agent=researcher
+        agent=researcher,
+        callback=_stage_hook(stage_callback, 'research')
     )
     
     # Writing Task
@@ -92,7 +478,8 @@ def create_content_crew(topic):
         - Organized body with subheadings
         - Clear conclusion with key takeaways
         - Professional formatting""",
-        agent=writer
+        agent=writer,
+        callback=_stage_hook(stage_callback, 'writing')
     )
     
     # Review Task
@@ -113,31 +500,366 @@ def create_content_crew(topic):
         - Corrected grammar and style
         - Optimized engagement
         - Professional presentation""",
-        agent=reviewer
+        agent=reviewer,
+        callback=_stage_hook(stage_callback, 'review')
     )
     
-    # Create crew
-    crew = Crew(
-        agents=[researcher, writer, reviewer],
-        tasks=[research_task, writing_task, review_task],
-        verbose=True,
-        process=Process.sequential
+    return [research_task, writing_task, review_task]
+
+def create_research_tasks(topic, researchers, stage_callback=None):
+    """Create one async research Task per subtopic, each with its own researcher"""
+    tasks = []
+    
+    for (name, focus), researcher in zip(RESEARCH_SUBTOPICS.items(), researchers):
+        tasks.append(Task(
+            description=f"""Research the topic: {topic}
+            
+            Cover only this part of the research: {focus}
+            
+            Focus on accuracy and comprehensiveness.""",
+            expected_output=f"""A focused research brief on {focus.lower()} with:
+            - Key findings
+            - Supporting data and facts""",
+            agent=researcher,
+            async_execution=True,
+            callback=_stage_hook(stage_callback, f'research.{name}')
+        ))
+    
+    return tasks
+
+def create_fanout_tasks(topic, agents, researchers, stage_callback=None):
+    """Create concurrent subtopic research Tasks followed by the usual writing and review
+    
+    The writer is given every research brief as context, in place of the
+    single research report; the writing and review Tasks are unchanged.
+    """
+    research_tasks = create_research_tasks(topic, researchers, stage_callback)
+    _, writing_task, review_task = create_tasks(topic, agents, stage_callback)
+    writing_task.context = research_tasks
+    
+    return research_tasks + [writing_task, review_task]
+
+def resume_tasks(tasks, stages, completed):
+    """The Tasks still to run, given {stage: output} of the stages already finished
+    
+    Finished Tasks get their checkpointed output back and are left out of
+    the crew. A crew only passes on outputs it produced itself, so a
+    remaining Task that would have seen them is given every earlier Task as
+    explicit context, as Process.sequential would have done.
+    """
+    remaining = []
+    for index, (task, stage) in enumerate(zip(tasks, stages)):
+        if stage in completed:
+            task.output = TaskOutput(
+                description=task.description,
+                expected_output=task.expected_output,
+                raw=completed[stage],
+                agent=task.agent.role
+            )
+            CHECKPOINT_STAGES.inc(outcome='reused')
+            continue
+        
+        if not task.async_execution and not isinstance(task.context, list) and \
+                any(earlier.output is not None for earlier in tasks[:index]):
+            task.context = tasks[:index]
+        remaining.append(task)
+    
+    return remaining
+
+class CrewFactory:
+    """Builds crews without re-creating the LLM client and agents per request
+    
+    Each Gemini client (and with it the underlying HTTP/gRPC connection
+    pool) is created once per process: one per model, token budget and
+    timeout used by the routes in routes.json. Agents are created once per thread, since
+    Crew.kickoff() mutates the agents it runs and can't share them between
+    concurrent runs. Only the topic-bound Tasks are built per request,
+    except for streaming runs, which build agents of their own.
+    """
+    
+    def __init__(self, model_settings=None, routes=None):
+        self.model_settings = model_settings or MODEL_SETTINGS
+        self.routes = routes if routes is not None else load_routes(self.model_settings['model'], ROUTES_PATH or None)
+        self._llm = None  # Set by use_llm(), in place of every route
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    def get_llm(self, model=None, max_tokens=None, timeout=None):
+        """The shared client for model (the default model if None) with this output budget and timeout"""
+        if self._llm is not None:
+            return self._llm
+        
+        key = (model or self.model_settings['model'], max_tokens, timeout)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    settings = {**self.model_settings, 'model': key[0]}
+                    if max_tokens:
+                        settings['max_output_tokens'] = max_tokens
+                    if timeout:
+                        settings['timeout'] = timeout
+                    client = self._clients[key] = create_llm(settings)
+        return client
+    
+    def get_route(self, role):
+        return self.routes.get(role) or default_route(self.model_settings['model'])
+    
+    def get_route_llms(self, role):
+        """[(model name, client)] of role's route, in cascade order"""
+        route = self.get_route(role)
+        if self._llm is not None:
+            return [(route['models'][0], self._llm)]
+        return [(model, self.get_llm(model, route['max_tokens'], route['timeout'])) for model in route['models']]
+    
+    def _route(self, agents, stream=False):
+        """Put each agent on its role's route, behind the LLM cache"""
+        for agent in agents:
+            route = self.get_route(agent.role)
+            agent.llm = RoutedLLM(agent.role, route, [
+                (model, _agent_llm(client, route, stream)) for model, client in self.get_route_llms(agent.role)
+            ])
+        return _with_llm_cache(agents)
+    
+    @staticmethod
+    def _new_run(agents):
+        """Clear what an earlier run left on reused agents
+        
+        CrewAI counts an agent's failed executions against max_retry_limit
+        and never resets the count, so without this a few failed runs would
+        leave the thread's agents with no retries at all.
+        """
+        for agent in agents:
+            agent._times_executed = 0
+            agent.tools_results = []
+        return agents
+    
+    def get_agents(self, stream=False):
+        """This thread's agents, ready for a new run
+        
+        Streaming agents are built for the run, since their LLMs stream every call.
+        """
+        if stream:
+            return self._route(create_agents(self.get_llm()), stream=True)
+        agents = getattr(self._local, 'agents', None)
+        if agents is None:
+            agents = self._local.agents = self._route(create_agents(self.get_llm()))
+        return self._new_run(agents)
+    
+    def get_researchers(self, stream=False):
+        """One researcher per subtopic, since concurrent Tasks can't share an agent"""
+        if stream:
+            return self._route([create_researcher(self.get_llm()) for _ in RESEARCH_SUBTOPICS], stream=True)
+        researchers = getattr(self._local, 'researchers', None)
+        if researchers is None:
+            researchers = self._local.researchers = self._route(
+                [create_researcher(self.get_llm()) for _ in RESEARCH_SUBTOPICS]
+            )
+        return self._new_run(researchers)
+    
+    def create_crew(self, topic, stage_callback=None, mode=None, completed=None, stream=False):
+        mode = mode or PIPELINE_MODE
+        agents = self.get_agents(stream)
+        
+        if mode == 'fanout':
+            researchers = self.get_researchers(stream)
+            crew_agents = researchers + list(agents[1:])
+            tasks = create_fanout_tasks(topic, agents, researchers, stage_callback)
+        elif mode == 'sequential':
+            crew_agents = list(agents)
+            tasks = create_tasks(topic, agents, stage_callback)
+        else:
+            raise ValueError(f"Unknown pipeline mode: {mode} (expected one of {', '.join(PIPELINE_MODES)})")
+        
+        if completed:
+            tasks = resume_tasks(tasks, _stage_names(mode), completed)
+        
+        return Crew(
+            agents=crew_agents,
+            tasks=tasks,
+            verbose=True,
+            process=Process.sequential
+        )
+    
+    def use_llm(self, llm):
+        """Run every crew on a prebuilt client, e.g. an offline stub for benchmarks"""
+        with self._lock:
+            self._llm = llm
+            self._local = threading.local()
+    
+    def reset(self):
+        """Drop the cached clients, e.g. after GOOGLE_API_KEY changes"""
+        with self._lock:
+            self._llm = None
+            self._clients = {}
+            self._local = threading.local()
+
+# Shared by every request in this worker process
+crew_factory = CrewFactory()
+checkpoints = CheckpointStore(CHECKPOINT_DB_PATH, ttl=CHECKPOINT_TTL) if CHECKPOINT_DB_PATH else None
+llm_cache = LLMCache(
+    LLM_CACHE_DB_PATH, max_bytes=LLM_CACHE_MAX_MB * 2 ** 20, any_temperature=LLM_CACHE_ANY_TEMPERATURE
+) if LLM_CACHE_DB_PATH else None
+
+def warm_up():
+    """Build the Gemini clients and this thread's agents now, so the first request doesn't pay for them
+    
+    Returns the names of what was warmed. The clients need GOOGLE_API_KEY,
+    so without it nothing is built and the first request fails as before.
+    """
+    if crew_factory._llm is None and not os.getenv("GOOGLE_API_KEY"):
+        logger.info("GOOGLE_API_KEY is not set; skipping the Gemini clients and agents")
+        return []
+    crew_factory.get_llm()
+    crew_factory.get_agents()
+    return ['llm clients', 'agents']
+
+def create_content_crew(topic, stage_callback=None, mode=None, completed=None, stream=False):
+    """Create a crew for content analysis and creation
+    
+    If given, stage_callback(stage, output) is called as each Task finishes.
+    mode is 'sequential' or 'fanout', defaulting to CREW_PIPELINE_MODE.
+    completed maps stages that already finished to their output; the crew
+    then runs only the rest. With stream, the agents' LLM calls stream.
+    """
+    return crew_factory.create_crew(topic, stage_callback, mode, completed, stream)
+
+def job_key(topic, mode=None):
+    """Checkpoint key of an analysis: the same topic, pipeline and model resume the same job"""
+    return cache_key(topic, pipeline=PIPELINE_VERSION, mode=mode or PIPELINE_MODE, model=MODEL_SETTINGS)
+
+def _load_checkpoints(job_id):
+    return checkpoints.load(job_id) if checkpoints else {}
+
+def _save_checkpoint(job_id, completed, stage, output):
+    completed[stage] = output
+    CHECKPOINT_STAGES.inc(outcome='saved')
+    if checkpoints:
+        try:
+            checkpoints.save(job_id, stage, output)
+        except sqlite3.Error as e:
+            # Retries within this run still resume from memory
+            logger.warning(f"Could not checkpoint stage {stage}: {e}")
+
+def _retry_delay(attempt, stages, completed, error):
+    """Log and count a failed attempt; return how long to wait before the next one"""
+    stage = next((stage for stage in stages if stage not in completed), stages[-1])
+    CREW_RETRIES.inc(stage=stage)
+    delay = backoff_delay(attempt, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+    logger.warning(
+        f"Crew attempt {attempt}/{MAX_ATTEMPTS} failed in stage {stage}: {error}; "
+        f"resuming in {delay:.1f}s with {len(completed)} of {len(stages)} stages done"
     )
+    return delay
+
+def _bounded_output(text):
+    """(text cut to MAX_OUTPUT_CHARS, truncation fields for its result, empty if it fit)"""
+    if not MAX_OUTPUT_CHARS or len(text) <= MAX_OUTPUT_CHARS:
+        return text, {}
+    logger.warning(f"Crew output of {len(text)} characters truncated to {MAX_OUTPUT_CHARS}")
+    return text[:MAX_OUTPUT_CHARS], {
+        "truncated": True,
+        "output_chars": len(text),
+        "max_output_chars": MAX_OUTPUT_CHARS
+    }
+
+def _partial_result(stages, completed, error):
+    """Result of an analysis stopped by its deadline: the furthest stage it finished
     
-    return crew
+    That is the written article if the review didn't finish, or else the
+    research (every finished brief, in fan-out mode). With no stage
+    finished there is nothing to return and the analysis failed.
+    """
+    done = [stage for stage in stages if stage in completed]
+    if not done:
+        return {
+            "success": False,
+            "reason": error.reason,
+            "error": str(error),
+            "message": "The analysis was stopped before any stage finished."
+        }
+    
+    if done[-1].startswith('research.'):
+        result = "\n\n".join(completed[stage] for stage in done)
+    else:
+        result = completed[done[-1]]
+    result, truncation = _bounded_output(result)
+    
+    return {
+        "success": True,
+        "partial": True,
+        "result": result,
+        **truncation,
+        "stages": done,
+        "reason": error.reason,
+        "message": f"{error}; returning the {done[-1].split('.')[0]} stage output."
+    }
 
-def run_content_analysis(topic):
-    """Run the content analysis crew"""
+def run_content_analysis(topic, mode=None, job_id=None, deadline=None):
+    """Run the content analysis crew
+    
+    Each Task's output is checkpointed under job_id (job_key(topic, mode)
+    by default) as it finishes. A failed attempt is retried with
+    exponential backoff, up to MAX_ATTEMPTS attempts in all, and each retry
+    resumes after the last completed stage. A later call for the same job
+    resumes the same way, until its checkpoints expire.
+    
+    With a deadline (deadline.Deadline), no LLM call outlasts it and no
+    Task starts once it has run out or been cancelled; the result is then
+    partial (see _partial_result), and the checkpoints are kept for the
+    next call to resume from.
+    """
     try:
-        # Create and run the crew
-        crew = create_content_crew(topic)
-        result = crew.kickoff()
+        mode = mode or PIPELINE_MODE
+        job_id = job_id or job_key(topic, mode)
+        stages = _stage_names(mode)
+        completed = _load_checkpoints(job_id)
+        
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            if stages[-1] in completed:
+                # Finished before, but the checkpoints weren't cleared
+                result = completed[stages[-1]]
+                break
+            
+            _check_deadline(deadline)
+            crew = create_content_crew(topic, stage_callback=_timed_stages(
+                lambda stage, output: _save_checkpoint(job_id, completed, stage, str(output)), deadline
+            ), mode=mode, completed=completed)
+            try:
+                with _deadline_scope(crew.tasks, deadline):
+                    output = crew.kickoff()
+            except Cancelled:
+                raise
+            except Exception as e:
+                _check_deadline(deadline)
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                delay = _retry_delay(attempt, stages, completed, e)
+                if deadline is None:
+                    time.sleep(delay)
+                elif deadline.wait(delay):
+                    raise Cancelled(deadline.reason)
+                continue
+            
+            # CrewOutput's str() is the final Task's raw output itself, not a copy
+            result = str(output)
+            break
+        
+        if checkpoints:
+            checkpoints.clear(job_id)
         
+        result, truncation = _bounded_output(result)
         return {
             "success": True,
-            "result": str(result),
+            "result": result,
+            **truncation,
             "message": "Content analysis completed successfully!"
         }
+    except Cancelled as e:
+        logger.warning(f"Crew analysis stopped ({e.reason}) with {len(completed)} of {len(stages)} stages done")
+        return _partial_result(stages, completed, e)
     except Exception as e:
         return {
             "success": False,
@@ -145,6 +867,336 @@ def run_content_analysis(topic):
             "message": "An error occurred during content analysis."
         }
 
+def _stage_names(mode):
+    """Stage name of each Task in a crew built for mode, in Task order"""
+    if mode == 'fanout':
+        return [f'research.{name}' for name in RESEARCH_SUBTOPICS] + CREW_STAGES[1:]
+    return list(CREW_STAGES)
+
+class TokenBuffer:
+    """Hand-off from the crew thread to a reader that may be slower than the model
+    
+    put() never blocks the LLM stream. While the reader is behind, chunks
+    for the same stage are merged, so a slow client gets fewer, larger
+    chunks instead of an ever longer queue of tiny ones.
+    """
+    
+    def __init__(self):
+        self._events = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._error = None
+    
+    def put(self, kind, stage, text):
+        with self._condition:
+            last = self._events[-1] if self._events else None
+            if kind == 'token' and last and last[0] == 'token' and last[1] == stage:
+                last[2].append(text)
+            else:
+                self._events.append((kind, stage, [text]))
+            self._condition.notify()
+    
+    def close(self, error=None):
+        with self._condition:
+            self._closed = True
+            self._error = error
+            self._condition.notify()
+    
+    def drain(self):
+        """Wait for events and return all of them; [] once closed and empty"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._events or self._closed)
+            events = [(kind, stage, ''.join(parts)) for kind, stage, parts in self._events]
+            self._events.clear()
+            if not events and self._error is not None:
+                raise self._error
+            return events
+
+def iter_content_events(topic, mode=None, deadline=None):
+    """Run the crew with streaming LLM calls and yield (kind, stage, text) events
+    
+    kind is 'token' for a chunk of model output as it is generated, and
+    'stage' (with the Task's full output) when a Task finishes. With a
+    deadline, the crew stops as in run_content_analysis and this raises
+    deadline.Cancelled; a reader that goes away should cancel the deadline,
+    so the crew stops instead of running on for nobody.
+    """
+    mode = mode or PIPELINE_MODE
+    buffer = TokenBuffer()
+    
+    def kickoff():
+        # The crew can outlive the request (e.g. after a disconnect, until its
+        # current LLM call returns), so it gets agents of its own, built here
+        sinks = {}
+        try:
+            crew = create_content_crew(topic, stage_callback=_timed_stages(
+                lambda stage, output: buffer.put('stage', stage, str(output)), deadline
+            ), mode=mode, stream=True)
+            sinks = {
+                str(task.id): (lambda chunk, stage=stage: buffer.put('token', stage, chunk))
+                for task, stage in zip(crew.tasks, _stage_names(mode))
+            }
+            _token_sinks.update(sinks)
+            with _deadline_scope(crew.tasks, deadline):
+                crew.kickoff()
+        except Exception as e:
+            buffer.close(e)
+        else:
+            buffer.close()
+        finally:
+            for task_id in sinks:
+                _token_sinks.pop(task_id, None)
+    
+    threading.Thread(target=kickoff, daemon=True).start()
+    
+    while True:
+        events = buffer.drain()
+        if not events:
+            return
+        yield from events
+
+def _task_messages(task, context):
+    """Chat messages that run a Task directly against the LLM, as its agent would"""
+    agent = task.agent
+    prompt = f"""{task.description}
+
+This is the expected criteria for your final answer: {task.expected_output}"""
+    
+    if context:
+        prompt += "\n\nThis is the context you're working with:\n" + "\n\n".join(context)
+    
+    return [
+        ("system", f"You are {agent.role}. {agent.backstory}\nYour personal goal is: {agent.goal}"),
+        ("human", prompt)
+    ]
+
+def _llm_cache_key(model, llm, messages):
+    """llm_cache key of route model model (client llm) answering messages, or None if such calls aren't cached
+    
+    The same key as a CachedLLM call with these messages answered by model.
+    """
+    temperature = getattr(llm, 'temperature', None)
+    if llm_cache is None or not llm_cache.serves(temperature):
+        return None
+    return prompt_key(model, temperature, messages)
+
+async def _ainvoke_route(role, messages, deadline=None):
+    """Answer messages on role's route with the async clients, cascading as RoutedLLM does
+    
+    Returns (name of the model that answered, its answer).
+    """
+    route = crew_factory.get_route(role)
+    llms = crew_factory.get_route_llms(role)
+    for index, (model, llm) in enumerate(llms):
+        _check_deadline(deadline)
+        final = index == len(llms) - 1
+        started = time.perf_counter()
+        try:
+            message = await asyncio.wait_for(llm.ainvoke(messages), deadline.timeout() if deadline else None)
+        except Exception:
+            LLM_CALL_ERRORS.inc(model=model, role=role)
+            _record_call(role, model, time.perf_counter() - started, problem=None if final else 'error')
+            _check_deadline(deadline)
+            if final:
+                raise
+            continue
+        finally:
+            LLM_CALL_SECONDS.observe(time.perf_counter() - started, model=model, role=role)
+        
+        usage = getattr(message, 'usage_metadata', None) or {}
+        finish_reason = (getattr(message, 'response_metadata', None) or {}).get('finish_reason')
+        stopped = deadline is not None and deadline.cancelled
+        problem = None if final or stopped else answer_problem(message.content, route, finish_reason)
+        _record_call(
+            role, model, time.perf_counter() - started,
+            usage.get('input_tokens'), usage.get('output_tokens'), problem
+        )
+        if problem is None:
+            return model, message.content
+
+async def _ainvoke_task(stage, task, context, stage_callback=None, deadline=None):
+    """Run one Task against its role's route and return its output"""
+    role = task.agent.role
+    messages = _task_messages(task, context)
+    keys = {model: _llm_cache_key(model, llm, messages) for model, llm in crew_factory.get_route_llms(role)}
+    keys = {model: key for model, key in keys.items() if key}
+    start = time.perf_counter()
+    content = await asyncio.to_thread(llm_cache.get_first, list(keys.values()), role) if keys else None
+    
+    if content is None:
+        model, content = await _ainvoke_route(role, messages, deadline)
+        # Stored under the model that answered, which may be an escalation
+        if keys.get(model) and content:
+            await asyncio.to_thread(llm_cache.put, keys[model], content, role)
+    
+    STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+    if stage_callback:
+        stage_callback(stage, content)
+    
+    return content
+
+async def _arun_stages(topic, mode, job_id, completed, stage_callback=None, deadline=None):
+    """One attempt at the analysis, skipping (and checkpointing) stages as in run_content_analysis"""
+    research_task, writing_task, review_task = create_tasks(topic, crew_factory.get_agents())
+    
+    async def run_stage(stage, task, context):
+        if stage in completed:
+            CHECKPOINT_STAGES.inc(outcome='reused')
+            return completed[stage]
+        _check_deadline(deadline)
+        output = await _ainvoke_task(stage, task, context, stage_callback, deadline)
+        await asyncio.to_thread(_save_checkpoint, job_id, completed, stage, output)
+        return output
+    
+    if mode == 'fanout':
+        # All subtopics at once; the writer sees every brief. Let every
+        # subtopic settle before failing, so the ones that did finish are
+        # checkpointed rather than still running during the retry.
+        research_tasks = create_research_tasks(topic, crew_factory.get_researchers())
+        outputs = list(await asyncio.gather(*(
+            run_stage(f'research.{name}', task, [])
+            for name, task in zip(RESEARCH_SUBTOPICS, research_tasks)
+        ), return_exceptions=True))
+        for output in outputs:
+            if isinstance(output, BaseException):
+                raise output
+    else:
+        outputs = [await run_stage('research', research_task, [])]
+    
+    # Like Process.sequential, each Task sees every earlier output
+    outputs.append(await run_stage('writing', writing_task, outputs))
+    outputs.append(await run_stage('review', review_task, outputs))
+    return outputs[-1]
+
+async def arun_content_analysis(topic, stage_callback=None, mode=None, job_id=None, deadline=None):
+    """Async variant of run_content_analysis
+    
+    Crew.kickoff_async() just runs kickoff() in a worker thread, so this
+    walks the same sequential Tasks itself and awaits the LLM's native async
+    client. A waiting analysis then holds a coroutine, not an OS thread.
+    Stages are checkpointed, retried and held to deadline the same way.
+    """
+    try:
+        mode = mode or PIPELINE_MODE
+        if mode not in PIPELINE_MODES:
+            raise ValueError(f"Unknown pipeline mode: {mode} (expected one of {', '.join(PIPELINE_MODES)})")
+        
+        job_id = job_id or job_key(topic, mode)
+        stages = _stage_names(mode)
+        completed = await asyncio.to_thread(_load_checkpoints, job_id)
+        
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                result = await _arun_stages(topic, mode, job_id, completed, stage_callback, deadline)
+                break
+            except Cancelled:
+                raise
+            except Exception as e:
+                _check_deadline(deadline)
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                delay = _retry_delay(attempt, stages, completed, e)
+                await asyncio.sleep(deadline.timeout(delay) if deadline else delay)
+                _check_deadline(deadline)
+        
+        if checkpoints:
+            await asyncio.to_thread(checkpoints.clear, job_id)
+        
+        result, truncation = _bounded_output(result)
+        return {
+            "success": True,
+            "result": result,
+            **truncation,
+            "message": "Content analysis completed successfully!"
+        }
+    except Cancelled as e:
+        logger.warning(f"Crew analysis stopped ({e.reason}) with {len(completed)} of {len(stages)} stages done")
+        return _partial_result(stages, completed, e)
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "message": "An error occurred during content analysis."
+        }
+
+async def astream_content_analysis(topic, mode=None, deadline=None):
+    """Async generator of the same (kind, stage, text) events as iter_content_events
+    
+    Streams straight from ChatGoogleGenerativeAI.astream(). The event queue
+    is bounded, so a slow reader slows the model stream instead of
+    buffering without limit. Once deadline runs out the model stream is
+    cancelled and this raises deadline.Cancelled.
+    """
+    mode = mode or PIPELINE_MODE
+    if mode not in PIPELINE_MODES:
+        raise ValueError(f"Unknown pipeline mode: {mode} (expected one of {', '.join(PIPELINE_MODES)})")
+    
+    research_task, writing_task, review_task = create_tasks(topic, crew_factory.get_agents())
+    events = asyncio.Queue(maxsize=256)
+    
+    async def stream_task(stage, task, context):
+        _check_deadline(deadline)
+        # Streamed tokens can't be taken back, so this stays on the route's first model
+        model, llm = crew_factory.get_route_llms(task.agent.role)[0]
+        messages = _task_messages(task, context)
+        key = _llm_cache_key(model, llm, messages)
+        start = time.perf_counter()
+        output = await asyncio.to_thread(llm_cache.get, key, task.agent.role) if key else None
+        
+        if output is not None:
+            await events.put(('token', stage, output))
+        else:
+            parts = []
+            async for chunk in llm.astream(messages):
+                if chunk.content:
+                    parts.append(chunk.content)
+                    await events.put(('token', stage, chunk.content))
+            output = ''.join(parts)
+            _record_call(task.agent.role, model, time.perf_counter() - start)
+            if key and output:
+                await asyncio.to_thread(llm_cache.put, key, output, task.agent.role)
+        
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+        await events.put(('stage', stage, output))
+        return output
+    
+    async def pipeline():
+        try:
+            if mode == 'fanout':
+                research_tasks = create_research_tasks(topic, crew_factory.get_researchers())
+                outputs = list(await asyncio.gather(*(
+                    stream_task(f'research.{name}', task, [])
+                    for name, task in zip(RESEARCH_SUBTOPICS, research_tasks)
+                )))
+            else:
+                outputs = [await stream_task('research', research_task, [])]
+            
+            outputs.append(await stream_task('writing', writing_task, outputs))
+            await stream_task('review', review_task, outputs)
+        except asyncio.CancelledError:
+            # The reader has gone away, so nobody is waiting for the end marker
+            raise
+        except Exception:
+            await events.put(None)
+            raise
+        await events.put(None)
+    
+    runner = asyncio.ensure_future(pipeline())
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(events.get(), deadline.timeout() if deadline else None)
+            except asyncio.TimeoutError:
+                raise Cancelled(DEADLINE) from None
+            if event is None:
+                break
+            yield event
+        
+        # Re-raise anything the pipeline failed with
+        await runner
+    finally:
+        runner.cancel()
+
 # Test function
 if __name__ == "__main__":
     # Test with a sample topic
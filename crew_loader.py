@@ -0,0 +1,90 @@
+"""
+Deferred loading of the CrewAI stack
+
+Importing crew_agent pulls in crewai and langchain_google_genai, which
+takes seconds. The web app only touches it through crew_stack, which
+imports it on first use (or in a background thread), so the health check
+and static pages answer immediately.
+"""
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Load states
+NOT_LOADED = 'not_loaded'
+LOADING = 'loading'
+LOADED = 'loaded'
+FAILED = 'failed'
+
+
+class LazyModule:
+    """Stand-in for a module that is imported the first time an attribute is used
+
+    crew_stack.iter_content_events(...) behaves like
+    crew_agent.iter_content_events(...), but the import happens on that
+    call. Concurrent first uses share one import.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._state = NOT_LOADED
+        self._error = None
+        self._seconds = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Import the module now (waiting for a load already in progress) and return it"""
+        if self._module is not None:
+            return self._module
+
+        with self._lock:
+            if self._module is None:
+                self._state = LOADING
+                started = time.perf_counter()
+                try:
+                    module = importlib.import_module(self._name)
+                except Exception as e:
+                    self._state, self._error = FAILED, e
+                    logger.error(f"Could not load {self._name}: {e}")
+                    raise
+                self._seconds = time.perf_counter() - started
+                self._module, self._state, self._error = module, LOADED, None
+                logger.info(f"Loaded {self._name} in {self._seconds:.2f}s")
+        return self._module
+
+    def load_in_background(self):
+        """Start loading on a daemon thread, so the first request doesn't wait for it"""
+        def run():
+            try:
+                self.load()
+            except Exception:
+                pass  # Recorded in status(); the next use retries
+
+        self._state = LOADING
+        threading.Thread(target=run, name=f'load-{self._name}', daemon=True).start()
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def status(self):
+        status = {'module': self._name, 'state': self._state}
+        if self._seconds is not None:
+            status['load_seconds'] = round(self._seconds, 3)
+        if self._error is not None:
+            status['error'] = str(self._error)
+        return status
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            # Protocol probes (copy, pickle, ...) must not trigger an import
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+
+# crew_agent and everything it imports, loaded on first use
+crew_stack = LazyModule('crew_agent')
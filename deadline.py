@@ -0,0 +1,90 @@
+"""
+Request deadlines and cancellation, passed from the web handlers down to the crew
+"""
+import math
+import threading
+import time
+
+# Why work was stopped
+DEADLINE = 'deadline'
+DISCONNECTED = 'disconnected'
+
+
+def budget_seconds(value, default=0, maximum=None):
+    """Seconds of time budget a client asked for (a header or query value), 0 for none
+
+    An empty value gives default. The budget is capped at maximum, if set.
+    Raises ValueError unless value is empty or a positive number.
+    """
+    try:
+        seconds = float(value) if value else float(default)
+    except ValueError:
+        seconds = math.nan
+    if seconds < 0 or not math.isfinite(seconds) or (value and seconds == 0):
+        raise ValueError(f"Time budget must be a positive number of seconds, not {value!r}")
+    return min(seconds, maximum) if maximum else seconds
+
+
+class Cancelled(Exception):
+    """Raised where work stops because its Deadline ran out or was cancelled"""
+
+    def __init__(self, reason):
+        super().__init__('Time budget exceeded' if reason == DEADLINE else f'Analysis stopped ({reason})')
+        self.reason = reason
+
+
+class Deadline:
+    """A request's time budget, which can also be cancelled early (e.g. on client disconnect)
+
+    Work checks it between steps with check(), which raises Cancelled once
+    it has run out, and bounds anything that blocks by timeout(). seconds=None
+    gives no time limit, only cancellation.
+    """
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+        self._cancelled = threading.Event()
+        self._reason = None
+
+    def cancel(self, reason=DISCONNECTED):
+        if not self._cancelled.is_set():
+            self._reason = reason
+            self._cancelled.set()
+
+    @property
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    @property
+    def cancelled(self):
+        """True once cancelled or out of time"""
+        return self._cancelled.is_set() or self.expired
+
+    @property
+    def reason(self):
+        if self._cancelled.is_set():
+            return self._reason
+        return DEADLINE if self.expired else None
+
+    def remaining(self):
+        """Seconds left, or None without a time limit"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def timeout(self, default=None):
+        """default (None for no limit), shortened to the time left"""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return remaining if default is None else min(default, remaining)
+
+    def check(self):
+        if self.cancelled:
+            raise Cancelled(self.reason)
+
+    def wait(self, seconds):
+        """Sleep up to seconds, waking early if cancelled; return True if cancelled or out of time"""
+        self._cancelled.wait(self.timeout(seconds))
+        return self.cancelled
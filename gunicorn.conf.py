@@ -0,0 +1,87 @@
+"""
+Production gunicorn settings, read automatically when gunicorn starts in this directory
+
+    gunicorn wsgi:app
+
+The app is loaded once in the master and then forked (preload), so the
+CrewAI and LangChain imports, the topic classifier and the report
+templates are shared copy-on-write by every worker instead of being
+loaded once per worker. Each worker then builds its own Gemini client and
+agents before it takes traffic, and is replaced after a number of requests
+or when its memory grows past a limit.
+
+Every setting can be overridden on the command line or through the
+environment variables below.
+"""
+import gc
+import os
+import resource
+import time
+
+bind = os.environ.get('GUNICORN_BIND') or '0.0.0.0:5000'
+workers = int(os.environ.get('WEB_CONCURRENCY') or 4)
+
+# Analyses mostly wait on the model, so each worker serves several at once
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS') or 8)
+
+# An analysis can take minutes
+timeout = int(os.environ.get('GUNICORN_TIMEOUT') or 300)
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT') or 30)
+keepalive = 5
+
+preload_app = (os.environ.get('GUNICORN_PRELOAD') or 'true').lower() == 'true'
+
+# Recycle workers to cap slow leaks; the jitter keeps them from restarting together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS') or 1000)
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER') or 100)
+
+# Also recycle a worker once its resident memory passes this many MiB (0 to disable)
+MAX_WORKER_RSS_MB = int(os.environ.get('GUNICORN_MAX_WORKER_RSS_MB') or 1024)
+
+
+def current_rss_mb():
+    """Resident memory of this process in MiB"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        # No procfs (macOS): fall back to the peak, reported in bytes there
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 20
+
+
+def when_ready(server):
+    if preload_app:
+        # The app loads CrewAI lazily; load it here, once, for every worker.
+        # This also waits for a CREW_LOAD=background import, which must not
+        # still be running when the master forks.
+        from crew_loader import crew_stack
+        crew_stack.load()
+        server.log.info(f"Preloaded CrewAI: {crew_stack.status()}")
+
+
+def pre_fork(server, worker):
+    # Objects the GC tracks get their reference headers written on every
+    # collection, which would copy each shared page into every worker.
+    # Freezing moves everything loaded so far out of the GC's reach.
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    # Clients are built per worker: the Gemini client's gRPC channel can't cross fork()
+    started = time.perf_counter()
+    try:
+        from app import warm_up
+        from crew_loader import crew_stack
+        warmed = warm_up() + crew_stack.warm_up()
+    except Exception as e:
+        worker.log.warning(f"Warm-up failed, the first request will build the crew instead: {e}")
+        return
+    worker.log.info(f"Worker warmed up ({', '.join(warmed)}) in {time.perf_counter() - started:.2f}s")
+
+
+def post_request(worker, req, environ, resp):
+    if MAX_WORKER_RSS_MB and current_rss_mb() > MAX_WORKER_RSS_MB:
+        worker.log.info(f"Worker using {current_rss_mb():.0f} MiB (limit {MAX_WORKER_RSS_MB}), recycling")
+        # Finish in-flight requests, then exit; the master starts a fresh worker
+        worker.alive = False
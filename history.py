@@ -0,0 +1,177 @@
+"""
+Server-side analysis history with full-text search
+"""
+import html
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Longest report preview returned in list and search pages
+PREVIEW_CHARS = 160
+
+
+def report_text(report_html):
+    """Plain text of a report, for indexing and previews"""
+    text = re.sub(r'<(script|style)\b.*?</\1>', ' ', report_html, flags=re.S | re.I)
+    text = html.unescape(re.sub(r'<[^>]+>', ' ', text))
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def match_query(query):
+    """FTS5 query matching every word of a free-text search as a prefix
+
+    Each word is quoted, so user input can never be parsed as FTS5 syntax.
+    """
+    words = re.findall(r'\w+', query.lower())
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+class HistoryStore:
+    """Finished analyses in SQLite, with an FTS5 index over topics and report text
+
+    record() only queues the analysis; a background thread writes queued
+    analyses in batches, so saving history never slows a response. Reports
+    are stored zlib-compressed; only their plain text is kept for search. Pages
+    are fetched newest first with a keyset cursor (the last id seen), so a
+    page costs the same however far back it is.
+    """
+
+    def __init__(self, path, max_pending=1000):
+        self.path = path
+        self.max_pending = max_pending
+        self._reconnect()
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(
+            'CREATE TABLE IF NOT EXISTS analyses ('
+            ' id INTEGER PRIMARY KEY,'
+            ' topic TEXT NOT NULL,'
+            ' result BLOB NOT NULL,'
+            ' body TEXT NOT NULL,'
+            ' created_at REAL NOT NULL);'
+            # External content: the index stores no second copy of the text
+            'CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts USING fts5('
+            ' topic, body, content=analyses, content_rowid=id, tokenize="porter unicode61");'
+        )
+        # Threads and SQLite connections don't survive fork(), so a forked
+        # worker (e.g. under gunicorn --preload) sets up its own
+        os.register_at_fork(after_in_child=self._reconnect)
+
+    def _reconnect(self):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+        self._conn.row_factory = sqlite3.Row
+        self._pending = queue.Queue(maxsize=self.max_pending)
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    def record(self, topic, result):
+        """Queue a finished analysis (report HTML) to be saved"""
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name='history-writer', daemon=True)
+                    self._writer.start()
+        try:
+            self._pending.put_nowait((topic, result, time.time()))
+        except queue.Full:
+            # History is best effort; never block an analysis on it
+            logger.warning(f"History queue full, not saving analysis for topic: {topic}")
+
+    def flush(self):
+        """Wait until every queued analysis is written"""
+        self._pending.join()
+
+    def _write_loop(self):
+        while True:
+            batch = [self._pending.get()]
+            while len(batch) < 100:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._insert(batch)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not save {len(batch)} analyses to history: {e}")
+            finally:
+                for _ in batch:
+                    self._pending.task_done()
+
+    def _insert(self, batch):
+        with self._lock, self._conn:
+            for topic, result, created_at in batch:
+                body = report_text(result)
+                cursor = self._conn.execute(
+                    'INSERT INTO analyses (topic, result, body, created_at) VALUES (?, ?, ?, ?)',
+                    (topic, zlib.compress(result.encode('utf-8'), 6), body, created_at)
+                )
+                self._conn.execute(
+                    'INSERT INTO analyses_fts (rowid, topic, body) VALUES (?, ?, ?)',
+                    (cursor.lastrowid, topic, body)
+                )
+
+    def list(self, cursor=None, limit=20):
+        """One page of analyses, newest first; returns (items, next_cursor)"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, topic, created_at, substr(body, 1, ?) AS preview FROM analyses '
+                'WHERE id < ? ORDER BY id DESC LIMIT ?',
+                (PREVIEW_CHARS, cursor if cursor is not None else 2 ** 63 - 1, limit + 1)
+            ).fetchall()
+        return self._page(rows, limit)
+
+    def search(self, query, cursor=None, limit=20):
+        """One page of analyses matching every word of query, newest first"""
+        expression = match_query(query)
+        if not expression:
+            return [], None
+
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT analyses_fts.rowid AS id, analyses.topic AS topic, analyses.created_at AS created_at, '
+                "snippet(analyses_fts, 1, '', '', '...', 16) AS preview "
+                'FROM analyses_fts JOIN analyses ON analyses.id = analyses_fts.rowid '
+                'WHERE analyses_fts MATCH ? AND analyses_fts.rowid < ? '
+                'ORDER BY analyses_fts.rowid DESC LIMIT ?',
+                (expression, cursor if cursor is not None else 2 ** 63 - 1, limit + 1)
+            ).fetchall()
+        return self._page(rows, limit)
+
+    def get(self, analysis_id):
+        """A full analysis, report included, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT id, topic, result, created_at FROM analyses WHERE id = ?', (analysis_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        item = dict(row)
+        if isinstance(item['result'], bytes):
+            item['result'] = zlib.decompress(item['result']).decode('utf-8')
+        return item
+
+    def stats(self):
+        """Number of analyses and bytes of stored reports and search text"""
+        with self._lock:
+            count, result_bytes, text_bytes = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(LENGTH(result)), 0), COALESCE(SUM(LENGTH(CAST(body AS BLOB))), 0) '
+                'FROM analyses'
+            ).fetchone()
+        return {'size': count, 'report_bytes': result_bytes, 'text_bytes': text_bytes}
+
+    @staticmethod
+    def _page(rows, limit):
+        items = [dict(row) for row in rows[:limit]]
+        next_cursor = items[-1]['id'] if len(rows) > limit else None
+        return items, next_cursor
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM analyses').fetchone()[0]
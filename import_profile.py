@@ -0,0 +1,88 @@
+"""
+Summarize where import time goes, from a fresh interpreter run with -X importtime
+
+    python -m import_profile                   # the CrewAI stack (crew_agent)
+    python -m import_profile app --top 10      # any module
+    python -m import_profile crew_agent --json
+
+Prints the wall time of the import, the top-level packages that cost the
+most (self time summed over all their submodules) and the slowest single
+modules.
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+import time
+
+# "import time:       123 |        456 |     package.module"
+LINE_PATTERN = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def profile_import(module):
+    """Import module in a new interpreter; return (wall seconds, [(name, self_us, cumulative_us, depth)])"""
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - started
+    if process.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{process.stderr[-2000:]}")
+
+    records = []
+    for line in process.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            records.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return elapsed, records
+
+
+def summarize(elapsed, records, top=15):
+    by_package = {}
+    for name, self_us, _, _ in records:
+        package = name.split('.')[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+
+    packages = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+    modules = sorted(records, key=lambda record: record[1], reverse=True)[:top]
+    return {
+        'wall_seconds': round(elapsed, 3),
+        'import_seconds': round(sum(self_us for _, self_us, _, _ in records) / 1e6, 3),
+        'modules_imported': len(records),
+        'packages': [{'package': name, 'seconds': round(us / 1e6, 3)} for name, us in packages],
+        'slowest_modules': [{'module': name, 'self_seconds': round(self_us / 1e6, 3)}
+                            for name, self_us, _, _ in modules]
+    }
+
+
+def print_summary(module, summary):
+    print(f"import {module}: {summary['import_seconds']:.2f}s in {summary['modules_imported']} modules "
+          f"({summary['wall_seconds']:.2f}s wall, including interpreter start)")
+    total = summary['import_seconds'] or 1
+    print("\nby top-level package (self time of all submodules)")
+    for row in summary['packages']:
+        print(f"  {row['seconds']:8.3f}s  {row['seconds'] / total:6.1%}  {row['package']}")
+    print("\nslowest modules (self time)")
+    for row in summary['slowest_modules']:
+        print(f"  {row['self_seconds']:8.3f}s  {row['module']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('module', nargs='?', default='crew_agent')
+    parser.add_argument('--top', type=int, default=15, help='rows per table')
+    parser.add_argument('--json', action='store_true', help='print the summary as JSON')
+    args = parser.parse_args()
+
+    summary = summarize(*profile_import(args.module), top=args.top)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(args.module, summary)
+
+
+if __name__ == "__main__":
+    main()
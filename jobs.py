@@ -0,0 +1,138 @@
+"""
+Background job queue for long-running content analyses
+"""
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Job states
+PENDING = 'pending'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+FINISHED_STATES = (COMPLETED, FAILED)
+
+
+class QueueFullError(Exception):
+    """Raised when the queue has no room for another job"""
+
+
+class MemoryJobStore:
+    """In-process job store backed by a dict
+
+    Any object providing the same create/get/update/purge methods can be
+    passed to JobQueue instead, e.g. a Redis or database backed store.
+    """
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job):
+        with self._lock:
+            self._jobs[job['id']] = dict(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def purge(self, finished_before):
+        """Drop finished jobs older than the given timestamp"""
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job['status'] in FINISHED_STATES and job['finished_at'] < finished_before
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+
+class JobQueue:
+    """Runs analyses on a bounded worker pool and tracks them by job ID"""
+
+    def __init__(self, runner, store=None, max_workers=4, max_pending=100, result_ttl=3600):
+        self.runner = runner
+        self.store = store or MemoryJobStore()
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis')
+        # Caps queued + running jobs so a burst can't grow the backlog without bound
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, topic, **kwargs):
+        """Queue an analysis and return its job ID"""
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError("Too many analyses in progress, please retry shortly")
+
+        job_id = uuid.uuid4().hex
+        self.store.create({
+            'id': job_id,
+            'topic': topic,
+            'status': PENDING,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'result': None,
+            'error': None
+        })
+
+        try:
+            # Run in the submitter's context so its trace ID follows the job
+            context = contextvars.copy_context()
+            self._executor.submit(context.run, self._run, job_id, topic, kwargs)
+        except Exception as e:
+            # Never queued, so it would otherwise stay pending until it is purged
+            self.store.update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+            self._slots.release()
+            raise
+
+        return job_id
+
+    def get(self, job_id):
+        """Return the stored job, or None if it is unknown or expired"""
+        return self.store.get(job_id)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job_id, topic, kwargs):
+        try:
+            self.store.update(job_id, status=RUNNING, started_at=time.time())
+            result = self.runner(topic, **kwargs)
+
+            if result.get('success'):
+                self.store.update(job_id, status=COMPLETED, result=result, finished_at=time.time())
+            else:
+                self.store.update(job_id, status=FAILED, result=result,
+                                  error=result.get('error', 'Unknown error'), finished_at=time.time())
+        except Exception as e:
+            logger.exception(f"Job {job_id} crashed")
+            self.store.update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+        finally:
+            self._slots.release()
+            self.store.purge(time.time() - self.result_ttl)
+
+
+def job_status(job):
+    """Public view of a job, without the (potentially large) result payload"""
+    return {
+        'job_id': job['id'],
+        'topic': job['topic'],
+        'status': job['status'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+        'error': job['error']
+    }
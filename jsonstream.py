@@ -0,0 +1,51 @@
+"""
+Chunked JSON encoding, so a large analysis result is sent without building the whole body
+"""
+import json
+
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_json(value, chunk_size=CHUNK_SIZE):
+    """Yield the JSON text of value in pieces
+
+    The pieces join up to json.dumps(value, sort_keys=True), which is what
+    Flask's JSON provider writes. A long string is escaped chunk_size
+    characters at a time, so no escaped copy of the whole string is built.
+    """
+    if isinstance(value, str):
+        if len(value) <= chunk_size:
+            yield json.dumps(value)
+            return
+        yield '"'
+        for start in range(0, len(value), chunk_size):
+            yield json.dumps(value[start:start + chunk_size])[1:-1]
+        yield '"'
+    elif isinstance(value, dict):
+        yield '{'
+        for index, key in enumerate(sorted(value)):
+            yield f"{', ' if index else ''}{json.dumps(str(key))}: "
+            yield from iter_json(value[key], chunk_size)
+        yield '}'
+    elif isinstance(value, (list, tuple)):
+        yield '['
+        for index, item in enumerate(value):
+            if index:
+                yield ', '
+            yield from iter_json(item, chunk_size)
+        yield ']'
+    else:
+        yield json.dumps(value)
+
+
+def iter_json_bytes(value, chunk_size=CHUNK_SIZE):
+    """iter_json(value) as UTF-8, with small pieces joined into chunks of about chunk_size"""
+    pieces, size = [], 0
+    for piece in iter_json(value, chunk_size):
+        pieces.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield ''.join(pieces).encode('utf-8')
+            pieces, size = [], 0
+    if pieces:
+        yield ''.join(pieces).encode('utf-8')
@@ -0,0 +1,140 @@
+"""
+Cache of LLM responses keyed by a hash of the model, temperature and full prompt
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from metrics import LLM_CACHE_REQUESTS
+
+
+def prompt_key(model, temperature, messages):
+    """Hash of everything that decides a model's answer"""
+    payload = json.dumps([model, temperature, messages], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """LLM responses in SQLite, evicted least recently used first past max_bytes
+
+    A repeated prompt only gets the same answer back from a deterministic
+    model, so by default responses are served (and stored) only for calls
+    at temperature 0. any_temperature=True also reuses answers sampled at a
+    higher temperature, trading their variety for cost.
+
+    Hits and misses are counted per agent role. The size is a running total
+    kept in the database by triggers, since all worker processes share the
+    file.
+    """
+
+    def __init__(self, path, max_bytes=256 * 2 ** 20, any_temperature=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.any_temperature = any_temperature
+        self._reconnect()
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(
+            'BEGIN IMMEDIATE;'
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' key TEXT PRIMARY KEY,'
+            ' role TEXT NOT NULL,'
+            ' response BLOB NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' last_used REAL NOT NULL);'
+            'CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);'
+            'CREATE TABLE IF NOT EXISTS totals (name TEXT PRIMARY KEY, value INTEGER NOT NULL);'
+            # Seeded once from the responses already stored, before the triggers exist
+            "INSERT OR IGNORE INTO totals SELECT 'bytes', COALESCE(SUM(size), 0) FROM responses;"
+            'CREATE TRIGGER IF NOT EXISTS responses_added AFTER INSERT ON responses BEGIN'
+            " UPDATE totals SET value = value + new.size WHERE name = 'bytes'; END;"
+            'CREATE TRIGGER IF NOT EXISTS responses_replaced AFTER UPDATE OF size ON responses BEGIN'
+            " UPDATE totals SET value = value + new.size - old.size WHERE name = 'bytes'; END;"
+            'CREATE TRIGGER IF NOT EXISTS responses_removed AFTER DELETE ON responses BEGIN'
+            " UPDATE totals SET value = value - old.size WHERE name = 'bytes'; END;"
+            'COMMIT;'
+        )
+        self._counts = {}
+        os.register_at_fork(after_in_child=self._reconnect)
+
+    def _reconnect(self):
+        # A SQLite connection must not cross fork(); a forked worker opens its own
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+
+    def serves(self, temperature):
+        """Whether calls at this temperature go through the cache"""
+        return self.any_temperature or not temperature
+
+    def get(self, key, role=''):
+        """The cached response for key, or None"""
+        return self.get_first([key], role)
+
+    def get_first(self, keys, role=''):
+        """The cached response of the first of keys that has one, or None
+
+        For a call that any of several models may answer (see
+        crew_agent.RoutedLLM); it counts as one lookup.
+        """
+        with self._lock:
+            placeholders = ', '.join('?' * len(keys))
+            rows = dict(self._conn.execute(
+                f'SELECT key, response FROM responses WHERE key IN ({placeholders})', keys
+            ).fetchall()) if keys else {}
+            key = next((key for key in keys if key in rows), None)
+            if key is not None:
+                with self._conn:
+                    self._conn.execute('UPDATE responses SET last_used = ? WHERE key = ?', (time.time(), key))
+            outcome = 'miss' if key is None else 'hit'
+            counts = self._counts.setdefault(role, {'hit': 0, 'miss': 0})
+            counts[outcome] += 1
+        LLM_CACHE_REQUESTS.inc(role=role, outcome=outcome)
+        return None if key is None else zlib.decompress(rows[key]).decode('utf-8')
+
+    def put(self, key, response, role=''):
+        data = zlib.compress(response.encode('utf-8'), 6)
+        with self._lock, self._conn:
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete wouldn't fire the size trigger
+            self._conn.execute(
+                'INSERT INTO responses (key, role, response, size, last_used) VALUES (?, ?, ?, ?, ?)'
+                ' ON CONFLICT (key) DO UPDATE SET role = excluded.role, response = excluded.response,'
+                ' size = excluded.size, last_used = excluded.last_used',
+                (key, role, data, len(data), time.time())
+            )
+            size = self._size()
+            if size > self.max_bytes:
+                self._evict(size)
+
+    def _size(self):
+        return self._conn.execute("SELECT value FROM totals WHERE name = 'bytes'").fetchone()[0]
+
+    def _evict(self, size):
+        # Down to 90% of the limit, so eviction doesn't run on every put
+        excess = size - int(self.max_bytes * 0.9)
+        keys = []
+        for key, entry_size in self._conn.execute('SELECT key, size FROM responses ORDER BY last_used'):
+            if excess <= 0:
+                break
+            keys.append((key,))
+            excess -= entry_size
+        self._conn.executemany('DELETE FROM responses WHERE key = ?', keys)
+
+    def stats(self):
+        """Entries and bytes stored, and hits, misses and hit rate per agent role"""
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            size = self._size()
+            roles = {}
+            for role, counts in self._counts.items():
+                lookups = counts['hit'] + counts['miss']
+                roles[role] = {**counts, 'hit_rate': round(counts['hit'] / lookups, 4) if lookups else 0.0}
+            return {
+                'entries': entries,
+                'bytes': size,
+                'max_bytes': self.max_bytes,
+                'any_temperature': self.any_temperature,
+                'roles': roles
+            }
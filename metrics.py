@@ -0,0 +1,190 @@
+"""
+Latency histograms, counters and trace IDs, exported in Prometheus text format
+"""
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Upper bounds in seconds; wide enough for both template renders and LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Trace ID of the request being handled, '-' outside a request
+trace_id = contextvars.ContextVar('trace_id', default='-')
+
+
+def new_trace_id():
+    return uuid.uuid4().hex[:16]
+
+
+class TraceIdFilter(logging.Filter):
+    """Adds the current trace ID to every log record as %(trace_id)s"""
+
+    def filter(self, record):
+        record.trace_id = trace_id.get()
+        return True
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Counter:
+    """Monotonically increasing count, optionally split by labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+
+class Histogram:
+    """Distribution of observed values in cumulative buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', bound)])} {cumulative}"
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', '+Inf')])} {values[-1]}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {values[-2]}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {values[-1]}"
+
+
+class Registry:
+    """Set of metrics rendered together on /metrics"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+
+# Metrics for this process; each gunicorn worker exports its own
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    'http_request_duration_seconds', 'Time to produce a response, per endpoint', ['endpoint', 'method', 'status']
+)
+STAGE_SECONDS = registry.histogram(
+    'analysis_stage_duration_seconds', 'Time spent in each analysis stage', ['stage']
+)
+LLM_CALL_SECONDS = registry.histogram(
+    'llm_call_duration_seconds', 'Latency of individual LLM calls', ['model', 'role']
+)
+LLM_CALL_ERRORS = registry.counter(
+    'llm_call_errors_total', 'LLM calls that raised an error', ['model', 'role']
+)
+LLM_TOKENS = registry.counter(
+    'llm_tokens_total', 'Tokens sent to and received from the LLM', ['model', 'role', 'kind']
+)
+COALESCED_REQUESTS = registry.counter(
+    'analysis_coalesced_total', 'Analyses served by joining an identical in-flight run', ['scope']
+)
+RESPONSE_BYTES = registry.counter(
+    'http_response_bytes_total', 'Response body bytes sent, by content encoding', ['encoding']
+)
+RESPONSE_UNCOMPRESSED_BYTES = registry.counter(
+    'http_response_uncompressed_bytes_total', 'Response body bytes before compression, by content encoding',
+    ['encoding']
+)
+FIRST_TOKEN_SECONDS = registry.histogram(
+    'stream_first_token_seconds', 'Time from request to the first streamed LLM token', ['endpoint']
+)
+CREW_RETRIES = registry.counter(
+    'crew_retries_total', 'Crew runs retried after a failed attempt', ['stage']
+)
+CHECKPOINT_STAGES = registry.counter(
+    'crew_checkpoint_stages_total', 'Crew stages checkpointed, or skipped because a checkpoint was reused',
+    ['outcome']
+)
+MODEL_ESCALATIONS = registry.counter(
+    'llm_model_escalations_total', 'LLM answers passed on to the next model of an agent route, and why',
+    ['role', 'model', 'reason']
+)
+LLM_CACHE_REQUESTS = registry.counter(
+    'llm_cache_requests_total', 'LLM response cache lookups, by agent role and hit or miss', ['role', 'outcome']
+)
+
+REPORT_SECTION_BUILDS = registry.counter(
+    'report_section_builds_total', 'Report sections regenerated, or reused from the report store',
+    ['section', 'outcome']
+)
+
+
+def time_stage(stage):
+    """Context manager recording the with-block as one analysis stage"""
+    return STAGE_SECONDS.time(stage=stage)
@@ -0,0 +1,289 @@
+"""
+Rate limiting and admission control for analysis requests
+"""
+import asyncio
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Drop idle buckets every this many checks; an idle bucket is full anyway
+PRUNE_INTERVAL = 1000
+
+
+class OverloadedError(Exception):
+    """Raised when no analysis slot frees up in time"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def refill(tokens, updated, now, rate, capacity):
+    """Token count of a bucket after refilling it up to now"""
+    return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+
+class MemoryBucketStore:
+    """Token buckets held in this process only"""
+
+    def __init__(self):
+        self._buckets = {}  # key -> (tokens, updated)
+        self._lock = threading.Lock()
+        self._checks = 0
+
+    def take(self, key, cost, rate, capacity):
+        """Take cost tokens from a bucket and return the tokens still missing"""
+        now = time.time()
+
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = refill(tokens, updated, now, rate, capacity)
+            missing = max(0.0, cost - tokens)
+            if not missing:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+
+            self._checks += 1
+            if self._checks % PRUNE_INTERVAL == 0:
+                idle_since = now - capacity / rate
+                self._buckets = {
+                    key: bucket for key, bucket in self._buckets.items() if bucket[1] >= idle_since
+                }
+
+        return missing
+
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite file, shared by every worker on the host"""
+
+    def __init__(self, path):
+        self.path = path
+        self._checks = 0
+        self._reconnect()
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS buckets '
+            '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+        )
+        # A SQLite connection must not cross fork(); a forked worker opens its own
+        os.register_at_fork(after_in_child=self._reconnect)
+
+    def _reconnect(self):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5, isolation_level=None)
+        self._conn.execute('PRAGMA synchronous=OFF')
+
+    def take(self, key, cost, rate, capacity):
+        """Take cost tokens from a bucket and return the tokens still missing"""
+        with self._lock:
+            # IMMEDIATE takes the write lock up front so workers can't interleave
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                now = time.time()
+                row = self._conn.execute(
+                    'SELECT tokens, updated FROM buckets WHERE key = ?', (key,)
+                ).fetchone()
+                tokens = refill(*row, now, rate, capacity) if row else capacity
+                missing = max(0.0, cost - tokens)
+                if not missing:
+                    tokens -= cost
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                    (key, tokens, now)
+                )
+
+                self._checks += 1
+                if self._checks % PRUNE_INTERVAL == 0:
+                    self._conn.execute('DELETE FROM buckets WHERE updated < ?', (now - capacity / rate,))
+
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+        return missing
+
+
+class RateLimiter:
+    """Per-client token buckets refilled at a steady requests-per-minute rate"""
+
+    def __init__(self, per_minute, burst=None, store=None):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.capacity = burst or per_minute
+        self.store = store or MemoryBucketStore()
+
+    @property
+    def enabled(self):
+        return self.per_minute > 0
+
+    def check(self, client, cost=1):
+        """Return 0 if the request may proceed, else seconds until it would"""
+        if not self.enabled:
+            return 0
+
+        try:
+            missing = self.store.take(client, cost, self.rate, self.capacity)
+        except sqlite3.Error as e:
+            # Never turn a broken limiter database into an outage
+            logger.warning(f"Rate limit check failed, allowing request: {e}")
+            return 0
+
+        return math.ceil(missing / self.rate) if missing else 0
+
+
+class AdmissionController:
+    """Cap on analyses running at once, with a bounded queue of waiters
+
+    Requests beyond max_running wait up to wait_timeout seconds for a slot;
+    once max_waiting requests are already waiting, new ones are rejected
+    immediately so an overload turns into fast 503s instead of timeouts.
+    """
+
+    def __init__(self, max_running=8, max_waiting=16, wait_timeout=10):
+        self.max_running = max_running
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.running = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._avg_duration = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Take a slot and return its start time, or raise OverloadedError"""
+        with self._condition:
+            if self.running >= self.max_running:
+                if self.waiting >= self.max_waiting:
+                    self.rejected += 1
+                    raise OverloadedError('Server is busy, too many analyses queued', self.retry_after())
+
+                self.waiting += 1
+                try:
+                    if not self._condition.wait_for(lambda: self.running < self.max_running, self.wait_timeout):
+                        self.rejected += 1
+                        raise OverloadedError('Server is busy, timed out waiting for a free slot', self.retry_after())
+                finally:
+                    self.waiting -= 1
+
+            self.running += 1
+        return time.monotonic()
+
+    def try_acquire(self):
+        """Take a free slot without waiting: its start time, or None"""
+        with self._condition:
+            if self.running >= self.max_running:
+                return None
+            self.running += 1
+        return time.monotonic()
+
+    def register_waiter(self):
+        """Count a caller about to wait for a slot, or raise OverloadedError if the queue is full
+
+        For callers that wait without blocking a thread (see
+        AsyncAdmissionController); each must later call unregister_waiter.
+        """
+        with self._condition:
+            if self.waiting >= self.max_waiting:
+                self.rejected += 1
+                raise OverloadedError('Server is busy, too many analyses queued', self.retry_after())
+            self.waiting += 1
+
+    def unregister_waiter(self, timed_out=False):
+        """Stop counting a waiter; one that gave up counts as rejected"""
+        with self._condition:
+            self.waiting -= 1
+            if timed_out:
+                self.rejected += 1
+
+    def release(self, started):
+        with self._condition:
+            self.running -= 1
+            self._record(time.monotonic() - started)
+            self._condition.notify()
+
+    def retry_after(self):
+        """Seconds until the queue ahead of a new request has likely drained"""
+        estimate = self._avg_duration * (self.waiting + 1) / self.max_running
+        return max(1, math.ceil(estimate))
+
+    def stats(self):
+        return {
+            'running': self.running,
+            'waiting': self.waiting,
+            'rejected': self.rejected,
+            'max_running': self.max_running,
+            'max_waiting': self.max_waiting,
+            'avg_duration': round(self._avg_duration, 3)
+        }
+
+    def wrap(self, runner):
+        """Run runner inside an admission slot"""
+        def run(topic, **options):
+            started = self.acquire()
+            try:
+                return runner(topic, **options)
+            finally:
+                self.release(started)
+
+        return run
+
+    def _record(self, duration):
+        # Exponential moving average of slot hold time, for Retry-After
+        self._avg_duration = duration if not self._avg_duration else 0.8 * self._avg_duration + 0.2 * duration
+
+
+class AsyncAdmissionController:
+    """Admission for coroutine runners, taking slots from an AdmissionController
+
+    Analyses run under asyncio and under the sync controller (e.g. Flask
+    routes behind the same ASGI server) count against one limit. A free
+    slot is polled for every poll_interval seconds, since the sync side
+    releases slots from other threads.
+    """
+
+    def __init__(self, slots, poll_interval=0.05):
+        self.slots = slots
+        self.poll_interval = poll_interval
+
+    async def acquire(self):
+        slots = self.slots
+        started = slots.try_acquire()
+        if started is not None:
+            return started
+        slots.register_waiter()
+
+        give_up = time.monotonic() + slots.wait_timeout
+        timed_out = False
+        try:
+            while True:
+                await asyncio.sleep(self.poll_interval)
+                started = slots.try_acquire()
+                if started is not None:
+                    return started
+                if time.monotonic() >= give_up:
+                    timed_out = True
+                    raise OverloadedError('Server is busy, timed out waiting for a free slot', slots.retry_after())
+        finally:
+            slots.unregister_waiter(timed_out)
+
+    def release(self, started):
+        self.slots.release(started)
+
+    def stats(self):
+        return self.slots.stats()
+
+    def wrap(self, runner):
+        async def run(topic, **options):
+            started = await self.acquire()
+            try:
+                return await runner(topic, **options)
+            finally:
+                self.release(started)
+
+        return run
@@ -0,0 +1,559 @@
+"""
+Analysis report data and template rendering
+"""
+import html
+import os
+import random
+import re
+import time
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+# Per-category report content. "{topic}" is filled in per request; everything
+# else is shared between requests and never rebuilt.
+ANALYSIS_SKELETONS = {
+    'technology': {
+        'executive_summary': "The {topic} landscape represents a rapidly evolving technological frontier with significant implications for digital transformation, innovation, and competitive advantage. Our analysis reveals a complex ecosystem driven by emerging technologies, changing consumer expectations, and regulatory considerations.",
+        'insights': [
+            "Rapid adoption of {topic} technologies is accelerating digital transformation across industries",
+            "Integration challenges remain a primary barrier to widespread implementation",
+            "Security and privacy concerns are driving regulatory frameworks and compliance requirements",
+            "AI and machine learning are becoming integral components of {topic} solutions",
+            "Cloud-native architectures are becoming the standard for scalable {topic} implementations"
+        ],
+        'market_analysis': "The global {topic} market is experiencing unprecedented growth, driven by increased digitalization, remote work trends, and the need for operational efficiency. Market research indicates a compound annual growth rate of 15-25% over the next five years, with enterprise adoption leading the charge.",
+        'trends': [
+            {'title': 'Edge Computing Integration', 'description': 'Moving processing closer to data sources for reduced latency and improved performance'},
+            {'title': 'AI-First Architecture', 'description': 'Designing systems with artificial intelligence as a core component from the ground up'},
+            {'title': 'Zero-Trust Security Models', 'description': 'Implementing security frameworks that verify every access request regardless of location'},
+            {'title': 'Sustainable Technology Practices', 'description': 'Focusing on energy-efficient solutions and environmentally conscious implementations'}
+        ],
+        'technology_analysis': "Current {topic} implementations are leveraging cutting-edge technologies including cloud computing, artificial intelligence, and advanced analytics. The convergence of these technologies is creating new possibilities for automation, optimization, and user experience enhancement.",
+        'technologies': [
+            {'name': 'Cloud Computing', 'description': 'Scalable infrastructure enabling flexible deployment and management'},
+            {'name': 'Artificial Intelligence', 'description': 'Machine learning algorithms for intelligent automation and decision-making'},
+            {'name': 'API-First Architecture', 'description': 'Modular design enabling seamless integration and interoperability'},
+            {'name': 'Real-time Analytics', 'description': 'Instant data processing for immediate insights and responses'}
+        ],
+        'opportunities': [
+            "Expanding {topic} capabilities to underserved markets and demographics",
+            "Developing specialized solutions for industry-specific use cases",
+            "Creating integrated platforms that combine multiple {topic} functionalities",
+            "Building partnerships with complementary technology providers",
+            "Leveraging data analytics for predictive insights and optimization"
+        ],
+        'challenges': [
+            "Managing complex integration requirements across diverse systems",
+            "Ensuring data security and compliance with evolving regulations",
+            "Addressing skills gaps in {topic} implementation and management",
+            "Balancing innovation with stability and reliability requirements",
+            "Managing costs while maintaining competitive pricing"
+        ],
+        'immediate_actions': [
+            {'title': 'Technology Assessment', 'description': 'Conduct comprehensive evaluation of current {topic} infrastructure and capabilities'},
+            {'title': 'Security Audit', 'description': 'Review and strengthen security measures to meet industry standards'},
+            {'title': 'Team Training', 'description': 'Invest in upskilling team members on latest {topic} technologies and best practices'},
+            {'title': 'Pilot Implementation', 'description': 'Launch small-scale {topic} projects to test feasibility and gather feedback'}
+        ],
+        'medium_term_actions': [
+            {'title': 'Platform Integration', 'description': 'Develop comprehensive {topic} platform with seamless user experience'},
+            {'title': 'Data Strategy', 'description': 'Implement advanced analytics and data management capabilities'},
+            {'title': 'Partnership Development', 'description': 'Establish strategic partnerships with key technology providers'},
+            {'title': 'Market Expansion', 'description': 'Scale {topic} solutions to new markets and customer segments'}
+        ],
+        'long_term_actions': [
+            {'title': 'Innovation Leadership', 'description': 'Position as thought leader in {topic} innovation and best practices'},
+            {'title': 'Global Expansion', 'description': 'Establish {topic} presence in international markets'},
+            {'title': 'Ecosystem Development', 'description': 'Build comprehensive {topic} ecosystem with partners and developers'},
+            {'title': 'Future Technology Integration', 'description': 'Prepare for next-generation technologies and emerging trends'}
+        ],
+        'impact_assessment': "Successful {topic} implementation is expected to deliver significant improvements in operational efficiency, customer satisfaction, and competitive positioning. Organizations can expect 20-40% improvements in key performance metrics within 12-18 months of full deployment.",
+        'success_metrics': [
+            'User adoption rate and engagement levels',
+            'System performance and reliability metrics',
+            'Cost reduction and efficiency improvements',
+            'Customer satisfaction and retention rates',
+            'Market share and competitive positioning'
+        ],
+        'future_outlook': "The {topic} landscape is poised for continued evolution, with emerging technologies like quantum computing, advanced AI, and next-generation networking expected to reshape the industry. Organizations that invest in flexible, scalable solutions today will be best positioned to capitalize on future opportunities.",
+        'predictions': [
+            {'timeframe': '6-12 months', 'prediction': 'Increased adoption of {topic} solutions driven by proven ROI and competitive advantages'},
+            {'timeframe': '1-2 years', 'prediction': 'Integration of advanced AI capabilities becoming standard in {topic} platforms'},
+            {'timeframe': '3-5 years', 'prediction': 'Transformation of {topic} from specialized tool to essential business infrastructure'}
+        ],
+        'resources': [
+            '"{topic} Best Practices Guide" - Industry Standards Documentation',
+            '"{topic} Implementation Framework" - Technical Architecture Guide',
+            '"{topic} Security Guidelines" - Cybersecurity Best Practices',
+            '"{topic} ROI Calculator" - Business Value Assessment Tool',
+            '"{topic} Community Forum" - Expert Network and Support'
+        ]
+    },
+    'business': {
+        'executive_summary': "The {topic} sector represents a dynamic business environment with significant growth potential and evolving market dynamics. Our comprehensive analysis reveals key opportunities for strategic positioning, operational optimization, and sustainable competitive advantage.",
+        'insights': [
+            "Market demand for {topic} solutions is growing at 20-30% annually",
+            "Digital transformation is reshaping traditional {topic} business models",
+            "Customer expectations are driving innovation in {topic} service delivery",
+            "Regulatory changes are creating new compliance requirements and opportunities",
+            "Technology integration is becoming essential for {topic} competitiveness"
+        ],
+        'market_analysis': "The {topic} market is characterized by increasing competition, evolving customer needs, and technological disruption. Market analysis indicates strong growth potential with emerging opportunities in digital services, automation, and customer experience enhancement.",
+        'trends': [
+            {'title': 'Digital-First Approach', 'description': 'Prioritizing digital channels and technology-driven customer experiences'},
+            {'title': 'Sustainability Focus', 'description': 'Integrating environmental and social responsibility into business operations'},
+            {'title': 'Data-Driven Decision Making', 'description': 'Leveraging analytics and insights for strategic planning and optimization'},
+            {'title': 'Customer-Centric Innovation', 'description': 'Developing solutions based on deep understanding of customer needs and behaviors'}
+        ],
+        'technology_analysis': "Technology adoption in {topic} is accelerating, with businesses investing in automation, analytics, and digital platforms to improve efficiency and customer experience. The integration of AI, cloud computing, and mobile technologies is transforming traditional business processes.",
+        'technologies': [
+            {'name': 'Customer Relationship Management', 'description': 'Advanced CRM systems for customer engagement and relationship management'},
+            {'name': 'Business Intelligence', 'description': 'Analytics platforms for data-driven insights and decision making'},
+            {'name': 'Process Automation', 'description': 'Workflow automation tools for operational efficiency'},
+            {'name': 'Digital Marketing', 'description': 'Multi-channel marketing platforms for customer acquisition and retention'}
+        ],
+        'opportunities': [
+            "Expanding {topic} services to new geographic markets",
+            "Developing innovative {topic} solutions for underserved customer segments",
+            "Creating strategic partnerships to enhance service offerings",
+            "Leveraging technology to improve operational efficiency and customer experience",
+            "Building sustainable competitive advantages through innovation and quality"
+        ],
+        'challenges': [
+            "Managing increasing competition and market saturation",
+            "Adapting to rapidly changing customer expectations and preferences",
+            "Navigating regulatory compliance and legal requirements",
+            "Investing in technology while maintaining profitability",
+            "Attracting and retaining skilled talent in competitive market"
+        ],
+        'immediate_actions': [
+            {'title': 'Market Research', 'description': 'Conduct comprehensive analysis of {topic} market opportunities and competitive landscape'},
+            {'title': 'Customer Analysis', 'description': 'Deep dive into customer needs, preferences, and pain points'},
+            {'title': 'Technology Assessment', 'description': 'Evaluate current technology infrastructure and identify improvement opportunities'},
+            {'title': 'Strategic Planning', 'description': 'Develop comprehensive {topic} strategy with clear objectives and milestones'}
+        ],
+        'medium_term_actions': [
+            {'title': 'Service Innovation', 'description': 'Develop new {topic} offerings that differentiate from competitors'},
+            {'title': 'Technology Implementation', 'description': 'Deploy advanced systems for improved efficiency and customer experience'},
+            {'title': 'Partnership Development', 'description': 'Establish strategic alliances to expand capabilities and reach'},
+            {'title': 'Market Expansion', 'description': 'Scale {topic} operations to new markets and customer segments'}
+        ],
+        'long_term_actions': [
+            {'title': 'Market Leadership', 'description': 'Establish {topic} as industry leader through innovation and excellence'},
+            {'title': 'Global Expansion', 'description': 'Develop international {topic} presence and capabilities'},
+            {'title': 'Ecosystem Development', 'description': 'Build comprehensive {topic} ecosystem with partners and stakeholders'},
+            {'title': 'Future Innovation', 'description': 'Invest in next-generation {topic} technologies and business models'}
+        ],
+        'impact_assessment': "Strategic {topic} initiatives are expected to deliver significant business value through improved customer satisfaction, operational efficiency, and market positioning. Organizations can anticipate 25-50% improvements in key business metrics within 18-24 months.",
+        'success_metrics': [
+            'Revenue growth and market share expansion',
+            'Customer satisfaction and retention rates',
+            'Operational efficiency and cost reduction',
+            'Employee productivity and engagement',
+            'Brand recognition and market positioning'
+        ],
+        'future_outlook': "The {topic} industry is evolving toward more integrated, technology-driven solutions that prioritize customer experience and operational efficiency. Organizations that embrace innovation and adapt to changing market dynamics will thrive in the competitive landscape.",
+        'predictions': [
+            {'timeframe': '6-12 months', 'prediction': 'Increased focus on digital transformation in {topic} operations'},
+            {'timeframe': '1-2 years', 'prediction': 'Consolidation and strategic partnerships reshaping {topic} landscape'},
+            {'timeframe': '3-5 years', 'prediction': 'Technology integration becoming standard requirement for {topic} success'}
+        ],
+        'resources': [
+            '"{topic} Market Analysis Report" - Industry Research and Insights',
+            '"{topic} Best Practices Guide" - Operational Excellence Framework',
+            '"{topic} Technology Trends" - Innovation and Digital Transformation',
+            '"{topic} Customer Research" - Market Intelligence and Segmentation',
+            '"{topic} Strategic Planning Toolkit" - Business Development Resources'
+        ]
+    },
+    'healthcare': {
+        'executive_summary': "The {topic} field represents a critical component of healthcare delivery with significant potential for improving patient outcomes, operational efficiency, and healthcare accessibility. Our analysis reveals key opportunities for innovation, quality improvement, and sustainable healthcare solutions.",
+        'insights': [
+            "Technology integration in {topic} is improving patient care and outcomes",
+            "Regulatory compliance and quality standards are driving innovation in {topic}",
+            "Patient-centered care models are reshaping {topic} service delivery",
+            "Data analytics and AI are enhancing {topic} decision-making and treatment protocols",
+            "Telehealth and remote monitoring are expanding {topic} accessibility"
+        ],
+        'market_analysis': "The {topic} market is experiencing significant growth driven by aging populations, increasing healthcare needs, and technological advancement. Market research indicates strong demand for innovative {topic} solutions that improve patient outcomes and operational efficiency.",
+        'trends': [
+            {'title': 'Precision Medicine', 'description': 'Personalized treatment approaches based on individual patient characteristics and genetics'},
+            {'title': 'Digital Health Integration', 'description': 'Seamless integration of digital tools and platforms in healthcare delivery'},
+            {'title': 'Value-Based Care', 'description': 'Focus on patient outcomes and cost-effectiveness in healthcare delivery'},
+            {'title': 'Preventive Care Models', 'description': 'Emphasis on prevention and early intervention to improve health outcomes'}
+        ],
+        'technology_analysis': "Healthcare technology adoption in {topic} is accelerating, with institutions investing in electronic health records, telemedicine platforms, and AI-powered diagnostic tools. The integration of advanced technologies is transforming patient care delivery and clinical decision-making.",
+        'technologies': [
+            {'name': 'Electronic Health Records', 'description': 'Comprehensive digital patient records for improved care coordination'},
+            {'name': 'Telemedicine Platforms', 'description': 'Remote healthcare delivery and patient monitoring systems'},
+            {'name': 'AI Diagnostic Tools', 'description': 'Machine learning algorithms for enhanced diagnostic accuracy'},
+            {'name': 'Wearable Health Devices', 'description': 'Continuous patient monitoring and health tracking technologies'}
+        ],
+        'opportunities': [
+            "Expanding {topic} services to underserved populations and rural areas",
+            "Developing innovative {topic} solutions for chronic disease management",
+            "Creating integrated care models that improve patient outcomes",
+            "Leveraging technology to enhance {topic} accessibility and affordability",
+            "Building partnerships to strengthen {topic} ecosystem and capabilities"
+        ],
+        'challenges': [
+            "Managing regulatory compliance and quality assurance requirements",
+            "Ensuring patient data security and privacy protection",
+            "Addressing healthcare disparities and access barriers",
+            "Balancing technology adoption with human-centered care",
+            "Managing costs while maintaining quality and accessibility"
+        ],
+        'immediate_actions': [
+            {'title': 'Quality Assessment', 'description': 'Conduct comprehensive evaluation of {topic} service quality and patient outcomes'},
+            {'title': 'Technology Integration', 'description': 'Implement digital health tools to enhance {topic} delivery'},
+            {'title': 'Staff Training', 'description': 'Invest in healthcare professional development and technology training'},
+            {'title': 'Patient Engagement', 'description': 'Develop strategies to improve patient participation and satisfaction'}
+        ],
+        'medium_term_actions': [
+            {'title': 'Service Innovation', 'description': 'Develop new {topic} models that improve patient outcomes and efficiency'},
+            {'title': 'Technology Platform', 'description': 'Build integrated {topic} platform with comprehensive patient management'},
+            {'title': 'Partnership Development', 'description': 'Establish collaborations with healthcare providers and technology partners'},
+            {'title': 'Quality Improvement', 'description': 'Implement continuous quality improvement programs for {topic} excellence'}
+        ],
+        'long_term_actions': [
+            {'title': 'Healthcare Leadership', 'description': 'Establish {topic} as model for healthcare innovation and excellence'},
+            {'title': 'Research Integration', 'description': 'Integrate research and evidence-based practices into {topic} delivery'},
+            {'title': 'Community Health', 'description': 'Expand {topic} impact on community health and wellness'},
+            {'title': 'Global Health', 'description': 'Contribute to global health initiatives and {topic} best practices'}
+        ],
+        'impact_assessment': "Strategic {topic} improvements are expected to deliver significant healthcare value through improved patient outcomes, operational efficiency, and healthcare accessibility. Healthcare organizations can anticipate 15-30% improvements in key healthcare metrics within 12-18 months.",
+        'success_metrics': [
+            'Patient satisfaction and health outcomes',
+            'Healthcare delivery efficiency and cost-effectiveness',
+            'Provider productivity and job satisfaction',
+            'Healthcare accessibility and equity',
+            'Quality of care and patient safety'
+        ],
+        'future_outlook': "The {topic} field is evolving toward more integrated, technology-enabled healthcare delivery that prioritizes patient outcomes and healthcare equity. Organizations that embrace innovation and evidence-based practices will lead the transformation of healthcare delivery.",
+        'predictions': [
+            {'timeframe': '6-12 months', 'prediction': 'Increased adoption of digital health tools in {topic} delivery'},
+            {'timeframe': '1-2 years', 'prediction': 'Integration of AI and machine learning in {topic} clinical decision-making'},
+            {'timeframe': '3-5 years', 'prediction': 'Transformation of {topic} through personalized and precision medicine approaches'}
+        ],
+        'resources': [
+            '"{topic} Clinical Guidelines" - Evidence-Based Practice Standards',
+            '"{topic} Quality Improvement Toolkit" - Healthcare Excellence Framework',
+            '"{topic} Technology Integration Guide" - Digital Health Implementation',
+            '"{topic} Patient Engagement Strategies" - Healthcare Communication Best Practices',
+            '"{topic} Research Database" - Clinical Evidence and Outcomes Data'
+        ]
+    },
+    'education': {
+        'executive_summary': "The {topic} sector represents a transformative educational landscape with significant opportunities for innovation, accessibility, and learning outcomes improvement. Our analysis reveals key trends driving educational evolution and strategies for enhancing learning experiences.",
+        'insights': [
+            "Technology integration in {topic} is revolutionizing learning and teaching methods",
+            "Personalized learning approaches are improving student engagement and outcomes",
+            "Digital literacy and technology skills are becoming essential in {topic}",
+            "Blended learning models are combining traditional and digital education approaches",
+            "Data analytics are enabling evidence-based educational decision-making"
+        ],
+        'market_analysis': "The {topic} market is experiencing rapid growth driven by digital transformation, changing learning preferences, and the need for accessible education. Educational institutions are investing in technology and innovative teaching methods to meet evolving student needs.",
+        'trends': [
+            {'title': 'Personalized Learning', 'description': 'Adaptive learning systems that customize education to individual student needs'},
+            {'title': 'Microlearning', 'description': 'Bite-sized learning modules for flexible and accessible education'},
+            {'title': 'Gamification', 'description': 'Game-based learning elements to increase student engagement and motivation'},
+            {'title': 'Competency-Based Education', 'description': 'Learning models focused on skill mastery rather than time-based progression'}
+        ],
+        'technology_analysis': "Educational technology adoption in {topic} is accelerating, with institutions implementing learning management systems, virtual reality tools, and AI-powered tutoring platforms. The integration of advanced technologies is transforming how students learn and teachers instruct.",
+        'technologies': [
+            {'name': 'Learning Management Systems', 'description': 'Comprehensive platforms for course delivery and student management'},
+            {'name': 'Virtual Reality', 'description': 'Immersive learning experiences for enhanced engagement and understanding'},
+            {'name': 'AI Tutoring', 'description': 'Intelligent tutoring systems for personalized learning support'},
+            {'name': 'Collaborative Tools', 'description': 'Digital platforms for student collaboration and peer learning'}
+        ],
+        'opportunities': [
+            "Expanding {topic} access to underserved populations and remote areas",
+            "Developing innovative {topic} programs for emerging skills and industries",
+            "Creating flexible learning pathways that accommodate diverse student needs",
+            "Leveraging technology to enhance {topic} quality and accessibility",
+            "Building partnerships to strengthen {topic} ecosystem and resources"
+        ],
+        'challenges': [
+            "Ensuring equitable access to technology and digital resources",
+            "Training educators to effectively use new {topic} technologies",
+            "Maintaining quality standards while scaling {topic} programs",
+            "Addressing digital divide and technology literacy gaps",
+            "Balancing technology integration with human-centered learning"
+        ],
+        'immediate_actions': [
+            {'title': 'Technology Assessment', 'description': 'Evaluate current {topic} technology infrastructure and identify improvement opportunities'},
+            {'title': 'Educator Training', 'description': 'Invest in professional development for {topic} faculty and staff'},
+            {'title': 'Student Support', 'description': 'Develop comprehensive support systems for {topic} learners'},
+            {'title': 'Curriculum Review', 'description': 'Assess and update {topic} curriculum to meet current industry needs'}
+        ],
+        'medium_term_actions': [
+            {'title': 'Program Innovation', 'description': 'Develop new {topic} programs that integrate technology and best practices'},
+            {'title': 'Platform Development', 'description': 'Build integrated {topic} learning platform with comprehensive features'},
+            {'title': 'Partnership Building', 'description': 'Establish collaborations with industry and educational partners'},
+            {'title': 'Quality Assurance', 'description': 'Implement continuous improvement processes for {topic} excellence'}
+        ],
+        'long_term_actions': [
+            {'title': 'Educational Leadership', 'description': 'Establish {topic} as leader in educational innovation and excellence'},
+            {'title': 'Research Integration', 'description': 'Integrate educational research and evidence-based practices into {topic} delivery'},
+            {'title': 'Global Impact', 'description': 'Expand {topic} influence on global education and learning outcomes'},
+            {'title': 'Future Learning', 'description': 'Prepare for next-generation learning technologies and educational models'}
+        ],
+        'impact_assessment': "Strategic {topic} improvements are expected to deliver significant educational value through enhanced learning outcomes, increased accessibility, and improved student engagement. Educational institutions can anticipate 20-40% improvements in key educational metrics within 12-18 months.",
+        'success_metrics': [
+            'Student learning outcomes and achievement',
+            'Educational accessibility and equity',
+            'Educator satisfaction and professional development',
+            'Technology integration and digital literacy',
+            'Program quality and accreditation standards'
+        ],
+        'future_outlook': "The {topic} field is evolving toward more personalized, technology-enabled learning experiences that prioritize student success and educational equity. Institutions that embrace innovation and evidence-based practices will lead the transformation of education.",
+        'predictions': [
+            {'timeframe': '6-12 months', 'prediction': 'Increased adoption of blended learning models in {topic} programs'},
+            {'timeframe': '1-2 years', 'prediction': 'Integration of AI and adaptive learning in {topic} curriculum delivery'},
+            {'timeframe': '3-5 years', 'prediction': 'Transformation of {topic} through personalized and competency-based learning approaches'}
+        ],
+        'resources': [
+            '"{topic} Curriculum Framework" - Educational Standards and Guidelines',
+            '"{topic} Technology Integration Guide" - Digital Learning Implementation',
+            '"{topic} Assessment Toolkit" - Learning Evaluation and Measurement',
+            '"{topic} Professional Development" - Educator Training and Support',
+            '"{topic} Research Database" - Educational Evidence and Best Practices'
+        ]
+    },
+    'general': {
+        'executive_summary': "The {topic} represents a multifaceted subject with significant implications across various domains. Our comprehensive analysis reveals key opportunities for growth, innovation, and strategic development in this evolving landscape.",
+        'insights': [
+            "Growing interest and adoption of {topic} across multiple sectors",
+            "Technology integration is transforming traditional {topic} approaches",
+            "Market demand for {topic} solutions is increasing steadily",
+            "Innovation and creativity are driving {topic} evolution",
+            "Collaboration and partnerships are essential for {topic} success"
+        ],
+        'market_analysis': "The {topic} market is characterized by diverse opportunities and evolving dynamics. Market analysis indicates strong potential for growth and development across various sectors and applications.",
+        'trends': [
+            {'title': 'Digital Transformation', 'description': 'Integration of digital technologies to enhance {topic} capabilities and reach'},
+            {'title': 'Sustainability Focus', 'description': 'Emphasis on environmentally conscious and sustainable {topic} practices'},
+            {'title': 'Innovation Culture', 'description': 'Fostering creativity and innovation in {topic} development and implementation'},
+            {'title': 'Collaborative Approach', 'description': 'Building partnerships and networks to strengthen {topic} ecosystem'}
+        ],
+        'technology_analysis': "Technology adoption in {topic} is accelerating, with organizations leveraging digital tools, data analytics, and innovative platforms to enhance capabilities and outcomes. The integration of advanced technologies is creating new possibilities for growth and development.",
+        'technologies': [
+            {'name': 'Data Analytics', 'description': 'Advanced analytics tools for insights and decision-making'},
+            {'name': 'Digital Platforms', 'description': 'Online systems for enhanced accessibility and engagement'},
+            {'name': 'Automation Tools', 'description': 'Process automation for improved efficiency and productivity'},
+            {'name': 'Collaboration Software', 'description': 'Digital tools for enhanced communication and teamwork'}
+        ],
+        'opportunities': [
+            "Expanding {topic} reach to new markets and audiences",
+            "Developing innovative {topic} solutions for emerging needs",
+            "Creating strategic partnerships to enhance {topic} capabilities",
+            "Leveraging technology to improve {topic} efficiency and effectiveness",
+            "Building sustainable {topic} practices for long-term success"
+        ],
+        'challenges': [
+            "Managing complexity and diverse stakeholder needs",
+            "Ensuring quality and consistency in {topic} delivery",
+            "Adapting to changing market conditions and requirements",
+            "Balancing innovation with stability and reliability",
+            "Building and maintaining strong {topic} networks and relationships"
+        ],
+        'immediate_actions': [
+            {'title': 'Strategic Assessment', 'description': 'Conduct comprehensive evaluation of {topic} current state and opportunities'},
+            {'title': 'Stakeholder Engagement', 'description': 'Build relationships with key {topic} stakeholders and partners'},
+            {'title': 'Capacity Building', 'description': 'Invest in skills development and capability enhancement'},
+            {'title': 'Pilot Projects', 'description': 'Launch small-scale {topic} initiatives to test and refine approaches'}
+        ],
+        'medium_term_actions': [
+            {'title': 'Program Development', 'description': 'Develop comprehensive {topic} programs and initiatives'},
+            {'title': 'Technology Integration', 'description': 'Implement digital tools and platforms to enhance {topic} capabilities'},
+            {'title': 'Partnership Development', 'description': 'Establish strategic alliances to strengthen {topic} ecosystem'},
+            {'title': 'Quality Improvement', 'description': 'Implement continuous improvement processes for {topic} excellence'}
+        ],
+        'long_term_actions': [
+            {'title': 'Leadership Position', 'description': 'Establish {topic} as recognized leader in the field'},
+            {'title': 'Innovation Hub', 'description': 'Create center of excellence for {topic} innovation and development'},
+            {'title': 'Global Impact', 'description': 'Expand {topic} influence and impact on broader scale'},
+            {'title': 'Future Vision', 'description': 'Develop long-term vision for {topic} evolution and growth'}
+        ],
+        'impact_assessment': "Strategic {topic} initiatives are expected to deliver significant value through improved outcomes, enhanced capabilities, and strengthened relationships. Organizations can anticipate 15-30% improvements in key performance metrics within 12-18 months.",
+        'success_metrics': [
+            'Outcome achievement and goal completion',
+            'Stakeholder satisfaction and engagement',
+            'Process efficiency and effectiveness',
+            'Innovation and creativity indicators',
+            'Partnership and collaboration strength'
+        ],
+        'future_outlook': "The {topic} landscape is evolving toward more integrated, technology-enabled approaches that prioritize innovation, collaboration, and sustainable growth. Organizations that embrace change and invest in capability development will thrive in the evolving environment.",
+        'predictions': [
+            {'timeframe': '6-12 months', 'prediction': 'Increased focus on digital transformation in {topic} practices'},
+            {'timeframe': '1-2 years', 'prediction': 'Emergence of new {topic} models and approaches'},
+            {'timeframe': '3-5 years', 'prediction': 'Transformation of {topic} through technology integration and innovation'}
+        ],
+        'resources': [
+            '"{topic} Best Practices Guide" - Industry Standards and Guidelines',
+            '"{topic} Innovation Toolkit" - Creative Development Resources',
+            '"{topic} Technology Integration" - Digital Transformation Guide',
+            '"{topic} Partnership Framework" - Collaboration and Network Building',
+            '"{topic} Future Trends" - Strategic Planning and Development'
+        ]
+    }
+}
+
+# Report sections in display order; each is a macro in templates/report.html
+REPORT_SECTIONS = [
+    'header',
+    'executive_summary',
+    'insights',
+    'market_trends',
+    'technologies',
+    'opportunities',
+    'recommendations',
+    'impact',
+    'outlook',
+    'resources',
+    'footer'
+]
+
+# Sections each section is written from. A regenerated section whose
+# content changed also invalidates every section listed as building on it.
+SECTION_DEPENDENCIES = {
+    'opportunities': ['market_trends', 'technologies'],
+    'recommendations': ['insights', 'opportunities'],
+    'impact': ['recommendations'],
+    'outlook': ['market_trends', 'technologies'],
+    'executive_summary': ['insights', 'market_trends', 'opportunities', 'outlook'],
+    # "Generated on" stays true to the newest content of the report
+    'footer': [section for section in REPORT_SECTIONS if section != 'footer']
+}
+
+# Seconds after which time-sensitive sections are regenerated on the next request
+SECTION_MAX_AGE = {
+    'market_trends': 7 * 86400,
+    'technologies': 30 * 86400,
+    'outlook': 7 * 86400
+}
+
+
+def compile_skeleton(value):
+    """Precompute a skeleton into (fill, is_static)
+
+    fill(topic) returns the value with "{topic}" substituted. Parts without a
+    placeholder are returned as-is, so only topic-dependent strings (and the
+    containers holding them) are built per request.
+    """
+    if isinstance(value, str):
+        if '{topic}' not in value:
+            return (lambda topic: value), True
+        parts = value.split('{topic}')
+        return (lambda topic: topic.join(parts)), False
+
+    if isinstance(value, dict):
+        fillers = {key: compile_skeleton(item) for key, item in value.items()}
+        if all(is_static for _, is_static in fillers.values()):
+            return (lambda topic: value), True
+        items = [(key, fill) for key, (fill, _) in fillers.items()]
+        return (lambda topic: {key: fill(topic) for key, fill in items}), False
+
+    if isinstance(value, list):
+        fillers = [compile_skeleton(item) for item in value]
+        if all(is_static for _, is_static in fillers):
+            return (lambda topic: value), True
+        fills = [fill for fill, _ in fillers]
+        return (lambda topic: [fill(topic) for fill in fills]), False
+
+    return (lambda topic: value), True
+
+
+_FILLERS = {
+    category: compile_skeleton(skeleton)[0]
+    for category, skeleton in ANALYSIS_SKELETONS.items()
+}
+
+# Compiled once at import
+_env = Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    autoescape=select_autoescape(['html']),
+    trim_blocks=True,
+    lstrip_blocks=True
+)
+_sections = _env.get_template('report.html').module
+
+# Marks the spots in pre-rendered HTML that are filled in per report
+_SLOT = re.compile('\x00(\\w+)\x00')
+
+
+def _slot(name):
+    return f'\x00{name}\x00'
+
+
+def _prerender(category):
+    """Render every section of a category once, with slots for per-report values
+
+    Returns ({section: parts}, parts for the whole report), where
+    odd-indexed parts name the slot to fill.
+    """
+    data = {
+        **_FILLERS[category](_slot('topic')),
+        'analysis_id': _slot('analysis_id'),
+        'generated_at': _slot('generated_at')
+    }
+    sections = {
+        section: str(getattr(_sections, section)(_slot('topic'), data))
+        for section in REPORT_SECTIONS
+    }
+    report = f'<div class="analysis-report">{"".join(sections[section] for section in REPORT_SECTIONS)}</div>'
+    return {section: _SLOT.split(text) for section, text in sections.items()}, _SLOT.split(report)
+
+
+_PRERENDERED_SECTIONS = {}
+_PRERENDERED_REPORTS = {}
+for _category in ANALYSIS_SKELETONS:
+    _PRERENDERED_SECTIONS[_category], _PRERENDERED_REPORTS[_category] = _prerender(_category)
+
+
+def _slot_values(topic, context):
+    return {
+        'topic': html.escape(topic),
+        'analysis_id': str(context['analysis_id']),
+        'generated_at': html.escape(context['generated_at'])
+    }
+
+
+def _fill(parts, values):
+    return ''.join([values[part] if index % 2 else part for index, part in enumerate(parts)])
+
+
+def build_report_context(category):
+    """Per-report values: the analysis category, an ID and a timestamp"""
+    return {
+        'category': category if category in ANALYSIS_SKELETONS else 'general',
+        'analysis_id': random.randint(100000, 999999),
+        'generated_at': time.strftime('%B %d, %Y at %I:%M %p')
+    }
+
+
+def analysis_content(category, topic):
+    """Topic-specific report content; unknown categories get the general analysis"""
+    return _FILLERS.get(category, _FILLERS['general'])(topic)
+
+
+def render_section(section, topic, context):
+    """Render one report section to HTML"""
+    return _fill(_PRERENDERED_SECTIONS[context['category']][section], _slot_values(topic, context))
+
+
+def render_report(topic, context):
+    """Render the full HTML report"""
+    return _fill(_PRERENDERED_REPORTS[context['category']], _slot_values(topic, context))
+
+
+def join_sections(sections):
+    """The full HTML report from {section: html}, as render_report lays it out"""
+    return f'<div class="analysis-report">{"".join(sections[section] for section in REPORT_SECTIONS)}</div>'
+
+
+def report_json(topic, context):
+    """Structured form of the report for API clients that don't want HTML"""
+    return {'topic': topic, **context, **analysis_content(context['category'], topic)}
@@ -0,0 +1,176 @@
+"""
+Report sections stored with content hashes, so a refresh regenerates only stale sections
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from graphlib import TopologicalSorter
+
+
+def content_hash(*parts):
+    """Hash of the given values (strings or JSON-serializable)"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def regeneration_order(sections, dependencies):
+    """sections ordered so each comes after the sections it depends on
+
+    Raises graphlib.CycleError if the dependencies form a cycle.
+    """
+    graph = TopologicalSorter({section: dependencies.get(section, ()) for section in sections})
+    return list(graph.static_order())
+
+
+def refresh_sections(sections, dependencies, stored, inputs, render, invalidate=(), max_age=None, now=None):
+    """{section: entry} for every section, reusing stored entries that are still fresh
+
+    A section is regenerated with render(section) when it has no stored
+    entry, when it is in invalidate, when it is older than its max_age (a
+    {section: seconds} dict), or when its input hash changed. The input hash
+    covers inputs(section) and the content hash of every section it depends
+    on, so regenerating a section also regenerates the sections built on it,
+    but only if its content actually came out different.
+
+    Each entry has html, content_hash, input_hash, generated_at and
+    regenerated (False for a reused entry).
+    """
+    now = time.time() if now is None else now
+    max_age = max_age or {}
+    entries = {}
+
+    for section in regeneration_order(sections, dependencies):
+        input_hash = content_hash(
+            inputs(section), [entries[dependency]['content_hash'] for dependency in dependencies.get(section, ())]
+        )
+        old = stored.get(section)
+        fresh = (
+            old is not None
+            and section not in invalidate
+            and old['input_hash'] == input_hash
+            and (section not in max_age or now - old['generated_at'] < max_age[section])
+        )
+        if fresh:
+            entries[section] = {**old, 'regenerated': False}
+            continue
+
+        html = render(section)
+        entries[section] = {
+            'html': html,
+            'content_hash': content_hash(html),
+            'input_hash': input_hash,
+            'generated_at': now,
+            'regenerated': True
+        }
+
+    return entries
+
+
+class ReportStore:
+    """Report sections in SQLite, one row per report and section
+
+    Next to the (zlib-compressed) HTML, each section keeps the hash of its
+    content, the hash of what it was generated from and when, which is what
+    refresh_sections decides staleness on. Per-report values that must
+    survive a partial refresh, such as the analysis ID, are kept as meta.
+
+    A report not saved for ttl seconds is dropped, and so are the least
+    recently saved ones beyond max_reports, each time a report is saved.
+    """
+
+    def __init__(self, path, max_reports=1000, ttl=7 * 24 * 3600):
+        self.path = path
+        self.max_reports = max_reports
+        self.ttl = ttl
+        self._reconnect()
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(
+            'CREATE TABLE IF NOT EXISTS reports ('
+            ' report_key TEXT PRIMARY KEY,'
+            ' meta TEXT NOT NULL,'
+            ' updated_at REAL NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS report_sections ('
+            ' report_key TEXT NOT NULL,'
+            ' section TEXT NOT NULL,'
+            ' html BLOB NOT NULL,'
+            ' content_hash TEXT NOT NULL,'
+            ' input_hash TEXT NOT NULL,'
+            ' generated_at REAL NOT NULL,'
+            ' PRIMARY KEY (report_key, section));'
+            'CREATE INDEX IF NOT EXISTS reports_updated_at ON reports (updated_at);'
+        )
+        os.register_at_fork(after_in_child=self._reconnect)
+
+    def _reconnect(self):
+        # A SQLite connection must not cross fork(); a forked worker opens its own
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+
+    def load(self, report_key):
+        """(meta, {section: entry}) of a stored report; (None, {}) if there is none"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT meta FROM reports WHERE report_key = ? AND updated_at >= ?', (report_key, time.time() - self.ttl)
+            ).fetchone()
+            rows = self._conn.execute(
+                'SELECT section, html, content_hash, input_hash, generated_at FROM report_sections'
+                ' WHERE report_key = ?', (report_key,)
+            ).fetchall()
+        if row is None:
+            return None, {}
+
+        return json.loads(row[0]), {
+            section: {
+                'html': zlib.decompress(html).decode('utf-8'),
+                'content_hash': section_hash,
+                'input_hash': input_hash,
+                'generated_at': generated_at
+            }
+            for section, html, section_hash, input_hash, generated_at in rows
+        }
+
+    def save(self, report_key, meta, entries):
+        """Store meta and the regenerated entries of a report; reused ones are already stored
+
+        Expired reports, and the oldest beyond max_reports, are dropped at the same time.
+        """
+        rows = [
+            (report_key, section, zlib.compress(entry['html'].encode('utf-8'), 6),
+             entry['content_hash'], entry['input_hash'], entry['generated_at'])
+            for section, entry in entries.items() if entry['regenerated']
+        ]
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO reports (report_key, meta, updated_at) VALUES (?, ?, ?)',
+                (report_key, json.dumps(meta), time.time())
+            )
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO report_sections'
+                ' (report_key, section, html, content_hash, input_hash, generated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            self._prune()
+
+    def _prune(self):
+        self._conn.execute(
+            'DELETE FROM reports WHERE updated_at < ? OR report_key NOT IN'
+            ' (SELECT report_key FROM reports ORDER BY updated_at DESC LIMIT ?)',
+            (time.time() - self.ttl, self.max_reports)
+        )
+        self._conn.execute(
+            'DELETE FROM report_sections WHERE report_key NOT IN (SELECT report_key FROM reports)'
+        )
+
+    def stats(self):
+        """Number of reports and sections stored, and bytes of section HTML"""
+        with self._lock:
+            reports = self._conn.execute('SELECT COUNT(*) FROM reports').fetchone()[0]
+            sections, size = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(LENGTH(html)), 0) FROM report_sections'
+            ).fetchone()
+        return {'reports': reports, 'sections': sections, 'bytes': size,
+                'max_reports': self.max_reports, 'ttl': self.ttl}
@@ -0,0 +1,100 @@
+"""
+Model routing per crew agent role: which models answer, with what output budget and timeout
+"""
+import json
+import os
+import re
+import threading
+
+DEFAULT_ROUTES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'routes.json')
+
+# Answers that open like this are refusals or guesses, worth a stronger model
+LOW_CONFIDENCE_PATTERN = re.compile(
+    r"^\W*(i'?m sorry|i am sorry|i cannot|i can'?t|i am unable|i'?m unable|i don'?t know|i'?m not sure)\b", re.I
+)
+
+# Finish reasons of an answer that was cut off or blocked (Gemini's, and OpenAI-style)
+TRUNCATED_FINISH_REASONS = {'MAX_TOKENS', 'SAFETY', 'RECITATION', 'length', 'content_filter'}
+
+
+def load_routes(default_model, path=None):
+    """{role: route} from a routes file (routes.json by default)
+
+    A route has models (tried in order, see answer_problem), max_tokens
+    (output budget per call), timeout (seconds per call) and min_chars (a
+    shorter answer escalates). Unset fields fall back to default_model and
+    no limits.
+    """
+    with open(path or DEFAULT_ROUTES_PATH, encoding='utf-8') as f:
+        config = json.load(f)
+
+    routes = {}
+    for role, settings in config.items():
+        route = {'models': [default_model], 'max_tokens': None, 'timeout': None, 'min_chars': 0, **settings}
+        if isinstance(route['models'], str):
+            route['models'] = [route['models']]
+        routes[role] = route
+    return routes
+
+
+def default_route(default_model):
+    """Route of a role the routes file doesn't mention"""
+    return {'models': [default_model], 'max_tokens': None, 'timeout': None, 'min_chars': 0}
+
+
+def answer_problem(text, route, finish_reason=None):
+    """Why an answer should go to the route's next model, or None if it is usable
+
+    One of 'empty', 'truncated' (cut off by the token budget or a safety
+    filter), 'too_short' (under the route's min_chars) or 'low_confidence'
+    (a refusal or a guess).
+    """
+    text = (text or '').strip()
+    if not text:
+        return 'empty'
+    if finish_reason in TRUNCATED_FINISH_REASONS:
+        return 'truncated'
+    if len(text) < route.get('min_chars', 0):
+        return 'too_short'
+    if LOW_CONFIDENCE_PATTERN.match(text):
+        return 'low_confidence'
+    return None
+
+
+class RouteStats:
+    """Calls, latency, tokens and escalations per role and model, to tune routes against"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, role, model, seconds, prompt_tokens=0, completion_tokens=0, problem=None):
+        """One call of model for role; problem is why its answer was escalated, if it was"""
+        with self._lock:
+            stats = self._stats.setdefault(role, {}).setdefault(model, {
+                'calls': 0, 'escalations': {}, 'seconds': 0.0, 'prompt_tokens': 0, 'completion_tokens': 0
+            })
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+            stats['prompt_tokens'] += prompt_tokens or 0
+            stats['completion_tokens'] += completion_tokens or 0
+            if problem:
+                stats['escalations'][problem] = stats['escalations'].get(problem, 0) + 1
+
+    def stats(self):
+        """{role: {model: totals, plus mean latency and tokens per call and escalation rate}}"""
+        with self._lock:
+            result = {}
+            for role, models in self._stats.items():
+                result[role] = {}
+                for model, stats in models.items():
+                    calls = stats['calls']
+                    result[role][model] = {
+                        **stats,
+                        'escalations': dict(stats['escalations']),
+                        'seconds': round(stats['seconds'], 3),
+                        'mean_seconds': round(stats['seconds'] / calls, 3),
+                        'mean_completion_tokens': round(stats['completion_tokens'] / calls, 1),
+                        'escalation_rate': round(sum(stats['escalations'].values()) / calls, 4)
+                    }
+            return result
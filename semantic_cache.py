@@ -0,0 +1,253 @@
+"""
+Near-duplicate topic lookup for the result cache
+
+Topics are embedded with a hashed word + character n-gram vectorizer (no
+model download, microseconds per topic) and kept in a NumPy index that can
+be backed by memory-mapped files. A new topic whose nearest stored topic is
+similar enough reuses that topic's cached report.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Words that say nothing about what a topic is about
+STOPWORDS = frozenset(
+    'a an and are as at by for from how in into is of on or the to vs what with'.split()
+)
+
+# Common abbreviations, expanded so "AI" and "Artificial Intelligence" embed alike
+ABBREVIATIONS = {
+    'ai': 'artificial intelligence',
+    'ml': 'machine learning',
+    'ar': 'augmented reality',
+    'vr': 'virtual reality',
+    'iot': 'internet of things',
+    'ev': 'electric vehicle',
+    'evs': 'electric vehicles',
+    'llm': 'large language model',
+    'llms': 'large language models',
+    'saas': 'software as a service',
+    'esg': 'environmental social governance',
+    'hr': 'human resources',
+    'b2b': 'business to business',
+    'smb': 'small business',
+    'smbs': 'small businesses'
+}
+
+
+# Words in any script, keeping the symbols that tell languages and platforms
+# apart ("c++", "c#", ".net")
+TOKEN_PATTERN = re.compile(r'(?<!\w)\.\w+|\w+[+#]*')
+
+# Characters between words that say nothing about the topic
+SEPARATORS = re.compile(r"[\s\-_,.:;!?'\"()\[\]/&]+")
+
+
+def embeddable(topic):
+    """Whether topic_terms keeps every meaningful character of topic
+
+    A topic with other symbols ("$100", "A* search") would embed like one
+    without them, so it is left to the exact cache.
+    """
+    rest = TOKEN_PATTERN.sub(' ', topic.lower())
+    return not SEPARATORS.sub('', rest)
+
+
+def topic_terms(topic):
+    """Lowercased content words of a topic, with abbreviations expanded and plurals folded"""
+    terms = []
+    for word in TOKEN_PATTERN.findall(topic.lower()):
+        for term in ABBREVIATIONS.get(word, word).split():
+            if term in STOPWORDS:
+                continue
+            if len(term) > 4 and term.endswith(('sses', 'xes', 'ches', 'shes')):
+                term = term[:-2]
+            elif len(term) > 4 and term.endswith('ies'):
+                term = term[:-3] + 'y'
+            elif len(term) > 3 and term.endswith('s') and not term.endswith(('ss', 'us', 'is')):
+                term = term[:-1]
+            terms.append(term)
+    return terms
+
+
+class HashingVectorizer:
+    """Unit-length vectors from hashed words and character trigrams
+
+    Word features carry most of the weight; trigrams make spelling variants
+    and inflections ("healthcare" / "health care") land close together.
+    Hashing is crc32-based, so vectors are stable across processes.
+    """
+
+    def __init__(self, dim=256, word_weight=1.0, trigram_weight=0.35):
+        self.dim = dim
+        self.word_weight = word_weight
+        self.trigram_weight = trigram_weight
+
+    def _add(self, vector, feature, weight):
+        digest = zlib.crc32(feature.encode('utf-8'))
+        vector[digest % self.dim] += weight if digest & 0x80000000 else -weight
+
+    def embed(self, topic):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for term in topic_terms(topic):
+            self._add(vector, 'w:' + term, self.word_weight)
+            padded = f' {term} '
+            for index in range(len(padded) - 2):
+                self._add(vector, 'c:' + padded[index:index + 3], self.trigram_weight)
+
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+def settings_digest(settings):
+    """Short fingerprint of the settings a result was produced with"""
+    payload = json.dumps(settings, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+# One metadata record per index slot
+SLOT_DTYPE = np.dtype([
+    ('used', np.bool_),
+    ('last_used', np.float64),
+    ('settings', 'S16'),
+    ('topic', 'S240')
+])
+
+
+def slot_topic(topic):
+    """topic as stored in a slot, or None if its UTF-8 doesn't fit whole"""
+    encoded = topic.encode('utf-8')
+    if len(encoded) > SLOT_DTYPE['topic'].itemsize:
+        return None
+    return encoded
+
+
+class SemanticIndex:
+    """Bounded nearest-neighbour index of analysed topics, evicting least recently used
+
+    With path, vectors and slot metadata live in memory-mapped files
+    (path + '.vectors' and path + '.slots') and survive restarts. A topic
+    too long for its slot is not indexed, since a cut one would never find
+    its own cached result, and neither is one that isn't embeddable().
+    """
+
+    def __init__(self, capacity=10000, threshold=0.88, path=None, vectorizer=None):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.path = path
+        self.vectorizer = vectorizer or HashingVectorizer()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'skipped': 0, 'evictions': 0}
+
+        dim = self.vectorizer.dim
+        if path:
+            self.vectors = self._open_memmap(path + '.vectors', np.float32, (capacity, dim))
+            self.slots = self._open_memmap(path + '.slots', SLOT_DTYPE, (capacity,))
+        else:
+            self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+            self.slots = np.zeros(capacity, dtype=SLOT_DTYPE)
+
+    @staticmethod
+    def _open_memmap(filename, dtype, shape):
+        expected = np.dtype(dtype).itemsize * int(np.prod(shape))
+        if os.path.exists(filename) and os.path.getsize(filename) != expected:
+            # Capacity or dimension changed; the old index can't be reused
+            logger.warning(f"Discarding semantic index {filename} built with different settings")
+            os.remove(filename)
+        mode = 'r+' if os.path.exists(filename) else 'w+'
+        return np.memmap(filename, dtype=dtype, mode=mode, shape=shape)
+
+    def lookup(self, topic, settings):
+        """Return (stored_topic, similarity) of the best match above the threshold, or None"""
+        if not embeddable(topic):
+            with self._lock:
+                self._stats['skipped'] += 1
+            return None
+        query = self.vectorizer.embed(topic)
+        digest = settings_digest(settings).encode()
+
+        with self._lock:
+            candidates = np.flatnonzero(self.slots['used'] & (self.slots['settings'] == digest))
+            if not len(candidates) or not query.any():
+                self._stats['misses'] += 1
+                return None
+
+            similarities = self.vectors[candidates] @ query
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self._stats['misses'] += 1
+                return None
+
+            slot = candidates[best]
+            self.slots['last_used'][slot] = time.time()
+            self._stats['hits'] += 1
+            return self.slots['topic'][slot].decode('utf-8'), similarity
+
+    def add(self, topic, settings):
+        """Remember that topic has a cached result for these settings"""
+        if not embeddable(topic):
+            return
+        vector = self.vectorizer.embed(topic)
+        if not vector.any():
+            return
+        encoded = slot_topic(topic)
+        if encoded is None:
+            return
+        digest = settings_digest(settings).encode()
+
+        with self._lock:
+            same = np.flatnonzero(
+                self.slots['used'] & (self.slots['settings'] == digest) & (self.slots['topic'] == encoded)
+            )
+            if len(same):
+                slot = same[0]
+            else:
+                free = np.flatnonzero(~self.slots['used'])
+                if len(free):
+                    slot = free[0]
+                else:
+                    slot = int(np.argmin(self.slots['last_used']))
+                    self._stats['evictions'] += 1
+
+            self.vectors[slot] = vector
+            self.slots[slot] = (True, time.time(), digest, encoded)
+
+    def forget(self, topic, settings):
+        """Drop a topic whose cached result is gone"""
+        encoded = slot_topic(topic)
+        if encoded is None:
+            return
+        digest = settings_digest(settings).encode()
+        with self._lock:
+            self.slots['used'] &= ~((self.slots['settings'] == digest) & (self.slots['topic'] == encoded))
+
+    def flush(self):
+        """Write memory-mapped changes to disk"""
+        if self.path:
+            with self._lock:
+                self.vectors.flush()
+                self.slots.flush()
+
+    def clear(self):
+        with self._lock:
+            self.slots['used'] = False
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = int(self.slots['used'].sum())
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['capacity'] = self.capacity
+        stats['threshold'] = self.threshold
+        return stats
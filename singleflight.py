@@ -0,0 +1,195 @@
+"""
+Single-flight request coalescing: concurrent callers with the same key share one computation
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from metrics import COALESCED_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """An in-flight computation that other threads can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SQLiteLease:
+    """Per-key leases in a SQLite file, so one worker process computes a key at a time
+
+    A lease expires after ttl seconds, so a worker that dies mid-analysis
+    only blocks the others until then.
+    """
+
+    def __init__(self, path, ttl=300):
+        self.path = path
+        self.ttl = ttl
+        self._reconnect()
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS leases '
+            '(key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+        # A forked worker needs its own connection and owner ID
+        os.register_at_fork(after_in_child=self._reconnect)
+
+    def _reconnect(self):
+        self.owner = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5, isolation_level=None)
+
+    def acquire(self, key):
+        """Take the lease for key; False if another live worker holds it"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+                'WHERE leases.expires_at < ?',
+                (key, self.owner, now + self.ttl, now)
+            )
+            return cursor.rowcount == 1
+
+    def held(self, key):
+        """True while any worker holds an unexpired lease for key"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT 1 FROM leases WHERE key = ? AND expires_at >= ?', (key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def release(self, key):
+        with self._lock:
+            self._conn.execute('DELETE FROM leases WHERE key = ? AND owner = ?', (key, self.owner))
+
+
+class SingleFlight:
+    """Lets concurrent callers with the same key share one call
+
+    Within a process, the first caller for a key runs the computation and
+    later callers block until it finishes, then get the same result (or
+    exception). With a lease, the process that runs it also holds a
+    cross-process lease; other workers wait for the lease to be released
+    and then call lookup(), which should read the result from a cache they
+    share (e.g. the SQLite tier of ResultCache).
+
+    A caller with a deadline (deadline.Deadline) waits only until it runs
+    out, then calls its own fn, which should stop at once and say so. A
+    result that shareable(result) rejects, such as one the leader's deadline
+    cut short, is not handed to waiting callers that still have time; they
+    run again instead.
+    """
+
+    def __init__(self, lease=None, poll_interval=0.25):
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, lookup=None, deadline=None, shareable=None):
+        """Return fn() for key, running it at most once at a time across callers"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            COALESCED_REQUESTS.inc(scope='local')
+            if not call.done.wait(deadline.timeout() if deadline else None):
+                return fn()
+            if call.error is not None:
+                raise call.error
+            if shareable and not shareable(call.result) and not (deadline and deadline.cancelled):
+                return self.do(key, fn, lookup, deadline, shareable)
+            return call.result
+
+        try:
+            call.result = self._run(key, fn, lookup, deadline)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def _run(self, key, fn, lookup, deadline):
+        if self.lease is None:
+            return fn()
+
+        try:
+            while not self.lease.acquire(key):
+                # Another worker is on it; wait for it to finish and publish
+                while self.lease.held(key):
+                    if deadline is None:
+                        time.sleep(self.poll_interval)
+                    elif deadline.wait(self.poll_interval):
+                        return fn()
+
+                result = lookup() if lookup else None
+                if result is not None:
+                    COALESCED_REQUESTS.inc(scope='cross_worker')
+                    return result
+        except sqlite3.Error as e:
+            # Coalescing is an optimization; never fail the request over it
+            logger.warning(f"Lease check failed, running without it: {e}")
+            return fn()
+
+        try:
+            return fn()
+        finally:
+            try:
+                self.lease.release(key)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not release lease: {e}")
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines on one event loop (in-process only)
+
+    deadline and shareable work as in SingleFlight.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, fn, deadline=None, shareable=None):
+        """Return await fn() for key, sharing one in-flight call between callers"""
+        future = self._calls.get(key)
+        if future is not None:
+            COALESCED_REQUESTS.inc(scope='local')
+            try:
+                # shield: one impatient caller cancelling must not cancel the others
+                result = await asyncio.wait_for(asyncio.shield(future), deadline.timeout() if deadline else None)
+            except asyncio.TimeoutError:
+                return await fn()
+            if shareable and not shareable(result) and not (deadline and deadline.cancelled):
+                return await self.do(key, fn, deadline, shareable)
+            return result
+
+        future = self._calls[key] = asyncio.ensure_future(fn())
+        future.add_done_callback(lambda _: self._forget(key, future))
+        return await asyncio.shield(future)
+
+    def _forget(self, key, future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+
+    def in_flight(self):
+        return len(self._calls)
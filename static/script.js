@@ -6,17 +6,28 @@ class XtarzLabApp {
         this.analyzeBtn = document.getElementById('analyzeBtn');
         this.newAnalysisBtn = document.getElementById('newAnalysisBtn');
         this.historyList = document.getElementById('historyList');
+        this.historySearch = document.getElementById('historySearch');
+        this.historySentinel = document.getElementById('historySentinel');
         this.toast = document.getElementById('toast');
         
         this.analysisInProgress = false;
-        this.chatHistory = JSON.parse(localStorage.getItem('xtarzlab_history') || '[]');
+        this.stopAnalysis = null;
+        
+        // History lives on the server and is fetched a page at a time
+        this.historyQuery = '';
+        this.historyCursor = null;
+        this.historyDone = false;
+        this.historyLoading = false;
         
         this.init();
     }
     
     init() {
         this.bindEvents();
-        this.loadChatHistory();
+        this.watchHistoryScroll();
+        this.resetHistory();
+        // History used to be kept in the browser
+        localStorage.removeItem('xtarzlab_history');
         this.autoResizeTextarea();
         this.checkServerHealth();
     }
@@ -28,6 +39,12 @@ class XtarzLabApp {
         // Auto-resize textarea
         const textarea = document.getElementById('topic');
         textarea.addEventListener('input', () => this.autoResizeTextarea());
+        
+        let searchTimer = null;
+        this.historySearch.addEventListener('input', () => {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => this.resetHistory(this.historySearch.value.trim()), 250);
+        });
     }
     
     autoResizeTextarea() {
@@ -53,54 +70,132 @@ class XtarzLabApp {
     }
     
     async startAnalysis(topic) {
-        try {
-            this.analysisInProgress = true;
-            
-            // Add user message
-            this.addMessage('user', topic);
-            
-            // Add assistant typing indicator
-            const typingId = this.addTypingIndicator();
-            
-            // Update button state
-            this.analyzeBtn.disabled = true;
-            this.analyzeBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i>';
-            
-            // Make API call
-            const response = await fetch('/api/analyze', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({ topic: topic })
-            });
-            
-            const result = await response.json();
-            
-            // Remove typing indicator
+        this.analysisInProgress = true;
+        
+        // Add user message
+        this.addMessage('user', topic);
+        
+        // Add assistant typing indicator
+        const typingId = this.addTypingIndicator();
+        
+        // Update button state
+        this.analyzeBtn.disabled = true;
+        this.analyzeBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i>';
+        
+        let report = null;
+        let timer = null;
+        
+        const finish = () => {
+            source.close();
+            clearTimeout(timer);
+            this.stopAnalysis = null;
             this.removeTypingIndicator(typingId);
-            
-            if (result.success) {
-                this.addMessage('assistant', result.result, true);
-                this.addToHistory(topic, result.result);
-                this.showToast('Analysis completed successfully!', 'success');
-            } else {
-                this.addMessage('assistant', `Sorry, I encountered an error: ${result.error}`, false);
-                this.showToast('Analysis failed', 'error');
-            }
-            
-        } catch (error) {
-            console.error('Error:', error);
-            this.removeTypingIndicator();
-            this.addMessage('assistant', 'Sorry, I encountered a network error. Please try again.', false);
-            this.showToast('Network error', 'error');
-        } finally {
             this.analysisInProgress = false;
             this.analyzeBtn.disabled = false;
             this.analyzeBtn.innerHTML = '<i class="fas fa-paper-plane"></i>';
             this.analysisForm.reset();
             this.autoResizeTextarea();
+        };
+        
+        const ensureReport = () => {
+            if (!report) {
+                this.removeTypingIndicator(typingId);
+                const messageDiv = this.addMessage('assistant', '<div class="analysis-report"></div>', true);
+                report = messageDiv.querySelector('.analysis-report');
+            }
+            return report;
+        };
+        
+        // Stream the report and render each section (or token) as soon as it arrives.
+        // The server stops at the time budget; closing the stream stops it sooner.
+        const streamUrl = document.body.dataset.streamUrl || '/api/analyze/stream';
+        const budget = parseFloat(document.body.dataset.requestTimeout) || 0;
+        let url = `${streamUrl}?topic=${encodeURIComponent(topic)}`;
+        if (budget > 0) {
+            url += `&timeout=${budget}`;
+        }
+        const source = new EventSource(url);
+        this.stopAnalysis = finish;
+        
+        if (budget > 0) {
+            // The server sends a partial result when the budget runs out; give up
+            // if it hasn't shortly after, rather than wait on a stalled connection
+            timer = setTimeout(() => {
+                finish();
+                this.addMessage('assistant', 'Sorry, the analysis timed out. Please try again.', false);
+                this.showToast('Analysis timed out', 'error');
+            }, (budget + 10) * 1000);
+        }
+        
+        source.addEventListener('section', (e) => {
+            const data = JSON.parse(e.data);
+            ensureReport().insertAdjacentHTML('beforeend', data.html);
+            this.scrollToBottom();
+        });
+        
+        source.addEventListener('token', (e) => {
+            const data = JSON.parse(e.data);
+            // Text nodes, not HTML: tokens can split tags and are untrusted model output
+            this.getStageOutput(ensureReport(), data.stage).append(data.text);
+            this.scrollToBottom();
+        });
+        
+        source.addEventListener('stage', (e) => {
+            const data = JSON.parse(e.data);
+            const output = this.getStageOutput(ensureReport(), data.stage);
+            output.textContent = data.output;
+            output.parentElement.classList.add('stage-done');
+        });
+        
+        source.addEventListener('done', (e) => {
+            finish();
+            const result = JSON.parse(e.data);
+            
+            if (result.partial) {
+                if (report) {
+                    this.addToHistory(topic, report.outerHTML);
+                } else {
+                    this.addMessage('assistant', 'Sorry, the analysis ran out of time. Please try again.', false);
+                }
+                this.showToast('Time budget exceeded, showing partial results', 'error');
+                return;
+            }
+            
+            this.addToHistory(topic, report ? report.outerHTML : '');
+            this.showToast('Analysis completed successfully!', 'success');
+        });
+        
+        source.addEventListener('error', (e) => {
+            finish();
+            
+            if (e.data) {
+                const result = JSON.parse(e.data);
+                if (result.retry_after) {
+                    // Rejected by the rate limit (429) or admission control (503)
+                    this.addMessage('assistant', `Sorry, ${result.error}. Please try again in ${result.retry_after} seconds.`, false);
+                    this.showToast(result.status === 429 ? 'Rate limit exceeded' : 'Server busy', 'error');
+                    return;
+                }
+                this.addMessage('assistant', `Sorry, I encountered an error: ${result.error}`, false);
+                this.showToast('Analysis failed', 'error');
+            } else {
+                console.error('Stream error:', e);
+                this.addMessage('assistant', 'Sorry, I encountered a network error. Please try again.', false);
+                this.showToast('Network error', 'error');
+            }
+        });
+    }
+    
+    getStageOutput(report, stage) {
+        let block = report.querySelector(`.stage-output[data-stage="${stage}"]`);
+        if (!block) {
+            block = document.createElement('div');
+            block.className = 'stage-output';
+            block.dataset.stage = stage;
+            block.innerHTML = `<h3>${this.escapeHtml(stage)}</h3><div class="stage-text"></div>`;
+            report.appendChild(block);
         }
+        return block.querySelector('.stage-text');
     }
     
     addMessage(type, content, isHtml = false) {
@@ -182,40 +277,102 @@ class XtarzLabApp {
     }
     
     addToHistory(topic, result) {
-        const historyItem = {
-            id: Date.now(),
-            topic: topic,
-            result: result.substring(0, 100) + '...',
-            timestamp: new Date().toISOString()
-        };
-        
-        this.chatHistory.unshift(historyItem);
-        this.chatHistory = this.chatHistory.slice(0, 10); // Keep only last 10
-        
-        localStorage.setItem('xtarzlab_history', JSON.stringify(this.chatHistory));
-        this.loadChatHistory();
+        // The server saves the analysis; show it right away unless a search is active
+        if (!this.historyQuery) {
+            const item = { topic: topic, result: result, created_at: Date.now() / 1000 };
+            this.historyList.prepend(this.createHistoryItem(item));
+        }
     }
     
-    loadChatHistory() {
+    watchHistoryScroll() {
+        // Fetch the next page when the end of the list scrolls into view
+        this.historyObserver = new IntersectionObserver((entries) => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                this.loadHistoryPage();
+            }
+        }, { root: this.historySentinel.closest('.sidebar-content') });
+    }
+    
+    resetHistory(query = '') {
+        this.historyQuery = query;
+        this.historyCursor = null;
+        this.historyDone = false;
         this.historyList.innerHTML = '';
+        this.loadHistoryPage();
+    }
+    
+    async loadHistoryPage() {
+        if (this.historyLoading || this.historyDone) return;
         
-        this.chatHistory.forEach(item => {
-            const historyItem = document.createElement('div');
-            historyItem.className = 'history-item';
-            historyItem.innerHTML = `
-                <div style="font-weight: 500; margin-bottom: 4px;">${item.topic}</div>
-                <div style="font-size: 12px; color: #8e8ea0;">${new Date(item.timestamp).toLocaleDateString()}</div>
-            `;
-            
-            historyItem.addEventListener('click', () => {
-                this.loadHistoryItem(item);
-            });
+        this.historyLoading = true;
+        const query = this.historyQuery;
+        const params = new URLSearchParams();
+        if (query) params.set('q', query);
+        if (this.historyCursor !== null) params.set('cursor', this.historyCursor);
+        
+        try {
+            const response = await fetch(`${query ? '/api/history/search' : '/api/history'}?${params}`);
+            const page = await response.json();
             
-            this.historyList.appendChild(historyItem);
+            if (query === this.historyQuery) {
+                if (page.success) {
+                    page.items.forEach(item => this.historyList.appendChild(this.createHistoryItem(item)));
+                    this.historyCursor = page.next_cursor;
+                }
+                this.historyDone = !page.success || page.next_cursor === null;
+            }
+        } catch (error) {
+            console.error('History error:', error);
+            this.historyDone = true;
+        } finally {
+            this.historyLoading = false;
+        }
+        
+        if (query !== this.historyQuery) {
+            // The search changed while this page was loading
+            this.loadHistoryPage();
+        } else if (!this.historyDone) {
+            // Observing again re-checks whether the list end is still in view
+            this.historyObserver.unobserve(this.historySentinel);
+            this.historyObserver.observe(this.historySentinel);
+        }
+    }
+    
+    createHistoryItem(item) {
+        const historyItem = document.createElement('div');
+        historyItem.className = 'history-item';
+        historyItem.title = item.preview || '';
+        historyItem.innerHTML = `
+            <div style="font-weight: 500; margin-bottom: 4px;">${this.escapeHtml(item.topic)}</div>
+            <div style="font-size: 12px; color: #8e8ea0;">${new Date(item.created_at * 1000).toLocaleDateString()}</div>
+        `;
+        
+        historyItem.addEventListener('click', () => {
+            this.loadHistoryItem(item);
         });
+        
+        return historyItem;
     }
     
-    loadHistoryItem(item) {
+    async loadHistoryItem(item) {
+        // Reports are only fetched when opened, so pages of history stay small
+        let result = item.result;
+        if (!result) {
+            try {
+                const response = await fetch(`/api/history/${item.id}`);
+                const data = await response.json();
+                if (!data.success) {
+                    this.showToast(data.error, 'error');
+                    return;
+                }
+                result = data.result;
+            } catch (error) {
+                console.error('History error:', error);
+                this.showToast('Network error', 'error');
+                return;
+            }
+        }
+        
         // Clear current chat
         this.chatMessages.innerHTML = `
             <div class="message assistant-message">
@@ -234,10 +391,15 @@ class XtarzLabApp {
         
         // Add the history item
         this.addMessage('user', item.topic);
-        this.addMessage('assistant', item.result, true);
+        this.addMessage('assistant', result, true);
     }
     
     startNewAnalysis() {
+        // Stop a running analysis; closing its stream cancels it on the server
+        if (this.stopAnalysis) {
+            this.stopAnalysis();
+        }
+        
         // Clear chat
         this.chatMessages.innerHTML = `
             <div class="message assistant-message">